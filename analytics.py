@@ -5,15 +5,41 @@ import matplotlib
 
 matplotlib.use("Agg")
 import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.transforms import Bbox
 from matplotlib.ticker import MaxNLocator
 import matplotlib.font_manager as fm
 
 import os
 import glob
 import io
+import logging
+import threading
+import warnings
 
 import concurrent.futures
-from functools import lru_cache
+from functools import partial
+
+from services.render_jobs import (
+    RenderJob,
+    campus_plot_key,
+    branch_plot_key,
+    select_key,
+    predict_key,
+    live_predict_key,
+)
+from services.render_cache import RenderCache
+from services.data_reload import FileWatcher, changed_rows, describe_change
+from services.lru import evictable_lru_cache
+from services.dataset import DatabaseDataset, DatabasePredictions, IndexedDataset
+from services.snapshot import DEFAULT_PATH as SNAPSHOT_PATH, Snapshot, write_snapshot
+from services.url_cache import URL_CACHE
+from services.branches import load_branch_mappings, normalize_branch_name
+from predictions import LivePredictor, quantize_difficulty
+from services.numpy_model import SOURCE_FILES, source_digest
+
+log = logging.getLogger(__name__)
 
 # seaborn typesettings for more visually-pleasing plots
 sns.set_style("whitegrid")
@@ -33,138 +59,216 @@ custom_font = load_custom_font()
 if custom_font:
     plt.rcParams["font.family"] = custom_font
 
+# bump whenever plot or table styling changes, images rendered with the old look stop matching
+STYLE_VERSION = 1
+
+RENDER_CACHE = RenderCache(
+    style=f"{STYLE_VERSION}/{custom_font}/{matplotlib.__version__}/{sns.__version__}"
+)
+
+
+CUTOFF_COLUMNS = ["campus", "branch", "marks", "year"]
+
+
+def _read_parallel(reader, files):
+    with concurrent.futures.ThreadPoolExecutor() as executor:
+        return list(executor.map(reader, files))
+
 
 # loading so many csv files at once can cause slow startups so parallelizing loadups
 def load_data_parallel(path_pattern):
     files = glob.glob(path_pattern)
     if not files:
-        print(f"warning: no files found matching {path_pattern}")
-        return pd.DataFrame(columns=["campus", "branch", "marks", "year"])
+        log.warning("no files found matching %s", path_pattern)
+        return pd.DataFrame(columns=CUTOFF_COLUMNS)
 
-    with concurrent.futures.ThreadPoolExecutor() as executor:
-        results = list(executor.map(pd.read_csv, files))
-
-    return pd.concat(results, ignore_index=True)
-
-
-# branch-aliasing for better ux
-def load_branch_mappings(filepath="branch_names.txt"):
-    alias_to_actual = {}
-    actual_to_alias = {}
-    if not os.path.exists(filepath):
-        return {}, {}
-    with open(filepath, "r") as f:
-        for line in f:
-            line = line.strip()
-            if ":" in line:
-                full_name, alias = line.split(":", 1)
-                full_name = full_name.strip()
-                alias = alias.strip()
-                alias_to_actual[alias.lower()] = full_name
-                actual_to_alias[full_name.lower()] = alias
-    return alias_to_actual, actual_to_alias
-
-
-def normalize_branch_name(user_input, alias_to_full):
-    user_input = user_input.strip().lower()
-    if user_input in alias_to_full:
-        return alias_to_full[user_input]
-    for alias, full_name in alias_to_full.items():
-        if full_name.lower() == user_input:
-            return full_name
-    return None
+    return pd.concat(_read_parallel(pd.read_csv, files), ignore_index=True)
 
 
-data_path = os.path.join("data", "analysis_data", "*.csv")
-df = load_data_parallel(data_path)
+def _read_prediction(filepath):
+    p_df = pd.read_csv(filepath)
+    if "campus" in p_df.columns:
+        p_df["campus"] = p_df["campus"].str.title()
+    return p_df
 
-alias_to_actual, actual_to_alias = load_branch_mappings("branch_names.txt")
 
-PREDICTIONS = {}
+def _read_prediction_safely(filepath):
+    try:
+        return _read_prediction(filepath)
+    except Exception as e:
+        log.error("error loading %s: %s", filepath, e)
+        return None
+
+
+def _load_sources(paths, reader, snapshot):
+    """
+    {path: frame}, memory-mapped from the snapshot for files it still matches and parsed
+    with reader for the rest. also says whether anything had to be parsed.
+    """
+
+    stale = [path for path in paths if snapshot is None or not snapshot.is_fresh(path)]
+    parsed = dict(zip(stale, _read_parallel(reader, stale)))
+    frames = {
+        path: parsed[path] if path in parsed else snapshot.frame(path) for path in paths
+    }
+    return frames, bool(stale)
+
+
+# "csv" keeps the whole history in memory, "database" queries the cutoffs/predictions tables
+# filled by `python -m database.ingest` for every render instead
+DATA_SOURCE = os.getenv("DATA_SOURCE", "csv").strip().lower()
+
+data_path = os.path.join("data", "analysis_data", "*.csv")
 _pred_files = {
     "worst": "predict/worst_case.csv",
     "most-likely": "predict/most_likely_case.csv",
     "best": "predict/best_case.csv",
 }
-for key, filepath in _pred_files.items():
-    if os.path.exists(filepath):
-        try:
-            p_df = pd.read_csv(filepath)
-            if "campus" in p_df.columns:
-                p_df["campus"] = p_df["campus"].str.title()
-            PREDICTIONS[key] = p_df
-        except Exception as e:
-            print(f"error loading {filepath}: {e}")
 
+alias_to_actual, actual_to_alias = load_branch_mappings("branch_names.txt")
+
+# filled by reload_changed_data() at the bottom of this module, renders read each of these
+# exactly once so a reload swapping them mid-render never mixes old & new data in one response
+df = pd.DataFrame(columns=CUTOFF_COLUMNS)
+DATASET = IndexedDataset(df)
+PREDICTIONS = {}
+data_version = 0
+
+_analysis_frames = {}
+_analysis_watcher = FileWatcher()
+_prediction_watcher = FileWatcher()
+_reload_lock = threading.Lock()
+_database_version = None
+# (latest year, its lower-cased (campus, branch) pairs) the live predictions were made from
+_live_reference = (None, frozenset())
 
-# this for returning raw bytes
-def _tabulate_to_bytes(data, headers, limit=25):
-    top_rows = data[:limit]
-    num_columns = len(headers)
+
+class _TableTemplate:
+    """
+    a pre-built, pre-styled table figure for one (rows, columns) shape.
+    only the cell text changes between tables, so the figure, the cell styling and the
+    bounding box of the cells are all computed once and every render is a text swap, a
+    measure of the new text and one savefig.
+    """
 
     header_color = "#40466e"
-    row_colors = ["#f8f9fa", "#ffffff"]
+    row_colors = ("#f8f9fa", "#ffffff")
     edge_color = "black"
     text_color = "#333333"
     header_text_color = "#ffffff"
 
-    row_height = 0.5
-    fig_height = (len(top_rows) + 1) * row_height + 0.5
+    def __init__(self, num_rows, col_widths):
+        row_height = 0.5
+        fig_height = (num_rows + 1) * row_height + 0.5
+        num_columns = len(col_widths)
+
+        # a bare Figure keeps templates out of pyplot's global figure manager
+        self.fig = Figure(figsize=(10, fig_height))
+        FigureCanvasAgg(self.fig)
+        ax = self.fig.add_subplot()
+        ax.axis("off")
+        ax.axis("tight")
+
+        table = ax.table(
+            cellText=[[""] * num_columns for _ in range(num_rows)],
+            colLabels=[""] * num_columns,
+            cellLoc="center",
+            loc="center",
+            colWidths=col_widths,
+        )
+
+        table.auto_set_font_size(False)
+        table.set_fontsize(16)
+        table.scale(1, 2.0)
+
+        for (row, col), cell in table.get_celld().items():
+            cell.set_edgecolor(self.edge_color)
+            cell.set_linewidth(1)
+            if row == 0:
+                cell.set_facecolor(self.header_color)
+                cell.set_text_props(weight="bold", color=self.header_text_color)
+                cell.set_height(0.08)
+            else:
+                cell.set_facecolor(self.row_colors[row % 2])
+                cell.set_text_props(color=self.text_color)
+
+        with warnings.catch_warnings():
+            # tables aren't tight_layout-aware, same warning plt.tight_layout() always gave
+            warnings.simplefilter("ignore", UserWarning)
+            self.fig.tight_layout()
+
+        # cell geometry doesn't depend on the text, so the tight box is measured once and
+        # reused instead of bbox_inches="tight" re-running layout on every save
+        renderer = self.fig.canvas.get_renderer()
+        self.bbox = self.fig.get_tightbbox(renderer).padded(0.1)
+        # text is centred in its cell and may spill past it, so the box is widened per render
+        # by the widest text of each column around that column's centre, in inches
+        self.to_inches = self.fig.dpi_scale_trans.inverted()
+        self.centers = []
+        for col in range(num_columns):
+            cell = table[0, col].get_window_extent(renderer).transformed(self.to_inches)
+            self.centers.append((cell.x0 + cell.x1) / 2)
+
+        self.texts = [
+            [table[row, col].get_text() for col in range(num_columns)]
+            for row in range(num_rows + 1)
+        ]
+        self.lock = threading.Lock()
+
+    def render(self, headers, rows):
+        with self.lock:
+            for text, value in zip(self.texts[0], headers):
+                text.set_text(value)
+            for text_row, row in zip(self.texts[1:], rows):
+                for text, value in zip(text_row, row):
+                    text.set_text(value)
+
+            buf = io.BytesIO()
+            self.fig.savefig(
+                buf, format="png", bbox_inches=self._bbox(), dpi=150, facecolor="white"
+            )
+            return buf.getvalue()
+
+    def _bbox(self):
+        renderer = self.fig.canvas.get_renderer()
+        left, right = self.bbox.x0, self.bbox.x1
+        for col, center in enumerate(self.centers):
+            width = max(
+                row[col].get_window_extent(renderer).transformed(self.to_inches).width
+                for row in self.texts
+            )
+            left = min(left, center - width / 2 - 0.1)
+            right = max(right, center + width / 2 + 0.1)
+        return Bbox.from_extents(left, self.bbox.y0, right, self.bbox.y1)
+
+
+_table_templates = {}
+_table_templates_lock = threading.Lock()
+
+
+def _get_table_template(num_rows, col_widths):
+    key = (num_rows, tuple(col_widths))
+    with _table_templates_lock:
+        template = _table_templates.get(key)
+        if template is None:
+            template = _table_templates[key] = _TableTemplate(num_rows, col_widths)
+    return template
 
-    fig, ax = plt.subplots(figsize=(10, fig_height))
-    ax.axis("off")
-    ax.axis("tight")
+
+# this for returning raw bytes
+def _tabulate_to_bytes(data, headers, limit=25):
+    top_rows = data[:limit]
+    num_columns = len(headers)
 
     col_widths = [0.15, 0.6, 0.15, 0.1]
     if len(col_widths) != num_columns:
         col_widths = [1.0 / num_columns] * num_columns
 
-    table = ax.table(
-        cellText=top_rows,
-        colLabels=headers,
-        cellLoc="center",
-        loc="center",
-        colWidths=col_widths,
-    )
-
-    table.auto_set_font_size(False)
-    table.set_fontsize(16)
-    table.scale(1, 2.0)
-
-    for (row, col), cell in table.get_celld().items():
-        cell.set_edgecolor(edge_color)
-        cell.set_linewidth(1)
-        if row == 0:
-            cell.set_facecolor(header_color)
-            cell.set_text_props(weight="bold", color=header_text_color)
-            cell.set_height(0.08)
-        else:
-            cell.set_facecolor(row_colors[row % 2])
-            cell.set_text_props(color=text_color)
-
-    buf = io.BytesIO()
-    plt.tight_layout()
-    plt.savefig(
-        buf,
-        format="png",
-        bbox_inches="tight",
-        dpi=150,
-        facecolor="white",
-        pad_inches=0.1,
-    )
-    plt.close()
-    return buf.getvalue()
+    return _get_table_template(len(top_rows), col_widths).render(headers, top_rows)
 
 
 # using LRU-Caching techniques for faster generation if command has been accessed prior
-@lru_cache(maxsize=32)
-def _get_campus_plot_bytes(campus_name):
-    campus_name = campus_name.strip().lower()
-    filtered_df = df[df["campus"].str.lower() == campus_name]
-
-    if filtered_df.empty:
-        return None
-
+def _draw_campus_plot(campus_name, filtered_df):
     fig, ax = plt.subplots(figsize=(12, 8), dpi=150)
     sns.lineplot(
         data=filtered_df,
@@ -197,20 +301,7 @@ def _get_campus_plot_bytes(campus_name):
     return buf.getvalue()
 
 
-@lru_cache(maxsize=64)
-def _get_branch_plot_bytes(campus_name, branch_name):
-    normalized_branch = normalize_branch_name(branch_name, alias_to_actual)
-    if not normalized_branch:
-        return None
-
-    campus_name = campus_name.strip().lower()
-    filtered_df = df[
-        (df["campus"].str.lower() == campus_name)
-        & (df["branch"].str.lower() == normalized_branch.lower())
-    ]
-    if filtered_df.empty:
-        return None
-
+def _draw_branch_plot(campus_name, filtered_df):
     fig, ax = plt.subplots(figsize=(10, 6), dpi=150)
     sns.lineplot(
         data=filtered_df,
@@ -272,35 +363,81 @@ def _get_branch_plot_bytes(campus_name, branch_name):
     return buf.getvalue()
 
 
-@lru_cache(maxsize=32)
-def _get_select_table_bytes(year, campus_filter, limit):
-    target_df = df[df["year"] == year]
-    if target_df.empty:
+# using LRU-Caching techniques for faster generation if command has been accessed prior,
+# anything rendered before a restart is picked back up from the on-disk RENDER_CACHE
+@evictable_lru_cache(maxsize=32)
+def _get_campus_plot_bytes(campus_name):
+    campus_name = campus_name.strip().lower()
+    rows = DATASET.campus(campus_name)
+    if rows is None:
         return None
 
-    if campus_filter:
-        target_campus = campus_filter.strip().lower()
-        target_df = target_df[target_df["campus"].str.lower() == target_campus]
-        if target_df.empty:
-            return None
+    filtered_df = rows.to_frame()
+
+    return RENDER_CACHE.get_or_render(
+        "campus_plot",
+        (campus_name,),
+        filtered_df,
+        partial(_draw_campus_plot, campus_name, filtered_df),
+    )
 
-    target_df = target_df.sort_values(by="marks", ascending=False)
 
-    table_data = target_df[["campus", "branch", "marks", "year"]].copy()
-    table_data["campus"] = table_data["campus"].str.title()
-    final_data = table_data.values.tolist()
+@evictable_lru_cache(maxsize=64)
+def _get_branch_plot_bytes(campus_name, branch_name):
+    normalized_branch = normalize_branch_name(branch_name, alias_to_actual)
+    if not normalized_branch:
+        return None
+
+    campus_name = campus_name.strip().lower()
+    rows = DATASET.campus_branch(campus_name, normalized_branch)
+    if rows is None:
+        return None
+
+    filtered_df = rows.to_frame()
+
+    return RENDER_CACHE.get_or_render(
+        "branch_plot",
+        (campus_name, normalized_branch),
+        filtered_df,
+        partial(_draw_branch_plot, campus_name, filtered_df),
+    )
+
+
+def _cached_table(name, rows, headers, limit):
+    top_rows = rows[:limit]
+    return RENDER_CACHE.get_or_render(
+        name,
+        (limit,),
+        (headers, top_rows),
+        partial(_tabulate_to_bytes, top_rows, headers, limit=limit),
+    )
+
+
+# sized so a warmup pass over every year x (each campus + all) fits without evicting itself
+@evictable_lru_cache(maxsize=128)
+def _get_select_table_bytes(year, campus_filter, limit):
+    rows = DATASET.year(year, campus_filter or None)
+    if rows is None:
+        return None
+
+    final_data = rows.tolist()
     headers = ["Campus", "Course", "Marks", "Year"]
 
-    return _tabulate_to_bytes(final_data, headers, limit=limit)
+    return _cached_table("select_table", final_data, headers, limit)
 
 
-@lru_cache(maxsize=32)
+@evictable_lru_cache(maxsize=32)
 def _get_prediction_bytes(situation, campus_filter, limit):
-    df_pred = PREDICTIONS.get(situation.lower())
-    if df_pred is None:
+    predictions, situation = PREDICTIONS, situation.lower()
+    if situation not in predictions:
         return None
 
-    target_df = df_pred.copy()
+    if isinstance(predictions, DatabasePredictions):
+        # the query only returns the campus asked for instead of the whole scenario
+        target_df = predictions.campus(situation, campus_filter or None)
+    else:
+        # nothing below mutates it, filtering & sorting already hand back new frames
+        target_df = predictions[situation]
 
     if campus_filter:
         target = campus_filter.strip().title()
@@ -315,7 +452,7 @@ def _get_prediction_bytes(situation, campus_filter, limit):
     table_data = target_df.values.tolist()
     headers = [h.title() for h in target_df.columns.tolist()]
 
-    return _tabulate_to_bytes(table_data, headers, limit=limit)
+    return _cached_table("prediction_table", table_data, headers, limit)
 
 
 # these are for recieving cached bytes
@@ -355,13 +492,398 @@ def get_predictions(limit=25, campus_filter=None, situation="most-likely"):
     return io.BytesIO(img_bytes)
 
 
-# this is for discord-CDNs
-URL_CACHE = {}
+MODEL_DIR = "models"
+# what LivePredictor loads, the pickles and the numpy artifact compiled from them
+_MODEL_FILES = (*SOURCE_FILES, "model.npz")
+
+# built on the first live prediction, so processes that never serve one never unpickle the model
+_live_predictor = None
+_live_predictor_lock = threading.Lock()
+_model_tag = None
+_model_watcher = FileWatcher()
+
+
+def _get_live_predictor():
+    global _live_predictor
+
+    with _live_predictor_lock:
+        if _live_predictor is None:
+            _live_predictor = LivePredictor(MODEL_DIR)
+        predictor = _live_predictor
+
+    # the latest year's (campus, branch) pairs predict the next year, like predictions.py does
+    dataset = DATASET
+    latest = dataset.years()[-1]
+    predictor.set_reference(dataset.year(latest).to_frame(), latest + 1)
+    return predictor
+
 
+def live_model_tag():
+    """
+    short hash of the model files, part of every live-prediction cache key so that uploads
+    made with an older model are never served after retraining.
+    """
 
+    global _model_tag
+
+    if _model_tag is None:
+        _model_tag = source_digest(MODEL_DIR)[:8]
+    return _model_tag
+
+
+def reload_changed_model():
+    """
+    drops the resident model, its tag and every live prediction made with it once a file in
+    MODEL_DIR changed, e.g. after a retrain. the next live prediction loads the new model and
+    is keyed under its new tag, so no upload of the old one is served again.
+    returns whether anything changed.
+    """
+
+    global _live_predictor, _model_tag
+
+    paths = [os.path.join(MODEL_DIR, name) for name in _MODEL_FILES]
+    changed, removed = _model_watcher.changes(paths)
+    if not (changed or removed):
+        return False
+
+    with _live_predictor_lock:
+        _live_predictor = None
+        _model_tag = None
+    _get_live_prediction_bytes.cache_clear()
+    return True
+
+
+@evictable_lru_cache(maxsize=64)
+def _get_live_prediction_bytes(difficulty, campus_filter, limit):
+    if not DATASET.years():
+        return None
+
+    target_df = _get_live_predictor().predict(difficulty)
+    if campus_filter:
+        target_df = target_df[target_df["campus"] == campus_filter.strip().title()]
+        if target_df.empty:
+            return None
+
+    headers = ["Campus", "Course", "Marks", "Year"]
+    return _cached_table(
+        "live_prediction_table", target_df.values.tolist(), headers, limit
+    )
+
+
+def get_live_predictions(limit=25, campus_filter=None, difficulty=0.5):
+    """
+    predictions at any difficulty in [0, 1], quantized to 0.01 so nearby values share a result.
+    """
+
+    img_bytes = _get_live_prediction_bytes(
+        quantize_difficulty(difficulty), campus_filter, limit
+    )
+    if img_bytes is None:
+        return None
+    return io.BytesIO(img_bytes)
+
+
+def render_jobs(limit=25):
+    """
+    every response the plot/select/predict commands can produce with the data loaded right now,
+    keyed the same way main.py keys them.
+    """
+
+    dataset, predictions = DATASET, PREDICTIONS
+    campuses = dataset.campuses()
+    jobs = []
+
+    for campus in campuses:
+        jobs.append(
+            RenderJob(campus_plot_key(campus), "plot_marks_by_campus", (campus,))
+        )
+
+    # only aliased branches can be asked for by name, so those are the only ones worth rendering
+    for campus in campuses:
+        for branch in sorted(set(alias_to_actual.values())):
+            jobs.append(
+                RenderJob(
+                    branch_plot_key(campus, branch),
+                    "plot_marks_by_branch",
+                    (campus, branch),
+                )
+            )
+
+    for year in dataset.years():
+        for campus_title in [None] + [c.title() for c in campuses]:
+            jobs.append(
+                RenderJob(
+                    select_key(int(year), campus_title),
+                    "select",
+                    (limit, int(year), campus_title),
+                )
+            )
+
+    for situation in predictions:
+        for campus in [None] + campuses:
+            jobs.append(
+                RenderJob(
+                    predict_key(situation, campus),
+                    "get_predictions",
+                    (limit, campus, situation),
+                )
+            )
+
+    return jobs
+
+
+def render_cache_info():
+    """
+    hit/miss/size of every in-memory render cache of this process, plus the disk cache.
+    """
+
+    info = {
+        func.__name__: func.cache_info()
+        for func in (
+            _get_campus_plot_bytes,
+            _get_branch_plot_bytes,
+            _get_select_table_bytes,
+            _get_prediction_bytes,
+            _get_live_prediction_bytes,
+        )
+    }
+    disk = RENDER_CACHE.stats()
+    info["render_cache_disk"] = {"hits": disk["hits"], "misses": disk["misses"]}
+    return info
+
+
+# this is for discord-CDNs, persisted so that a restart doesn't re-upload every plot
 def get_cached_url(key):
     return URL_CACHE.get(key)
 
 
 def save_url_to_cache(key, url):
-    URL_CACHE[key] = url
+    URL_CACHE.set(key, url)
+
+
+def _changed_live_campuses(dataset):
+    """
+    campuses whose live predictions differ between the previous dataset and this one, those
+    only depend on the latest year and which (campus, branch) pairs it has, not on marks.
+    """
+
+    global _live_reference
+
+    years = dataset.years()
+    year, pairs = None, frozenset()
+    if years:
+        year = years[-1]
+        rows = dataset.year(year)
+        pairs = frozenset(
+            (campus.lower(), branch.lower())
+            for campus, branch in zip(rows.campus.tolist(), rows.branch.tolist())
+        )
+
+    old_year, old_pairs = _live_reference
+    _live_reference = (year, pairs)
+    # a new latest year moves every prediction, else only campuses that gained or lost a pair
+    changed = old_pairs | pairs if year != old_year else old_pairs ^ pairs
+    return frozenset(campus for campus, _ in changed)
+
+
+def _evict_renders(change):
+    def campus_plot(campus_name):
+        return campus_name.strip().lower() in change.campuses
+
+    def branch_plot(campus_name, branch_name):
+        branch = normalize_branch_name(branch_name, alias_to_actual) or branch_name
+        return (campus_name.strip().lower(), branch.lower()) in change.branches
+
+    def select_table(year, campus_filter, limit):
+        if campus_filter is None:
+            return any(year == changed for _, changed in change.campus_years)
+        return (campus_filter.strip().lower(), year) in change.campus_years
+
+    def prediction_table(situation, campus_filter, limit):
+        return situation.lower() in change.scenarios
+
+    def live_prediction(difficulty, campus_filter, limit):
+        if not change.live_campuses:
+            return False
+        return (
+            not campus_filter or campus_filter.strip().lower() in change.live_campuses
+        )
+
+    return (
+        _get_live_prediction_bytes.evict(live_prediction)
+        + _get_campus_plot_bytes.evict(campus_plot)
+        + _get_branch_plot_bytes.evict(branch_plot)
+        + _get_select_table_bytes.evict(select_table)
+        + _get_prediction_bytes.evict(prediction_table)
+    )
+
+
+def reload_changed_data():
+    """
+    re-reads only the cutoff/prediction csv files whose content changed since the last call,
+    swaps the new df/PREDICTIONS in and drops the in-memory renders they affected.
+    returns the DataChange, or None when nothing changed.
+    """
+
+    global df, DATASET, PREDICTIONS, data_version, _analysis_frames
+
+    # a retrained model invalidates only the live predictions, their keys move with the tag
+    reload_changed_model()
+
+    if DATA_SOURCE == "database":
+        return _reload_from_database()
+
+    with _reload_lock:
+        changed, removed = _analysis_watcher.changes(sorted(glob.glob(data_path)))
+        pred_paths = [path for path in _pred_files.values() if os.path.exists(path)]
+        pred_changed, pred_removed = _prediction_watcher.changes(pred_paths)
+
+        if not (changed or removed or pred_changed or pred_removed):
+            return None
+
+        snapshot = Snapshot.open(SNAPSHOT_PATH) if SNAPSHOT_PATH else None
+        loaded, parsed = _load_sources(changed, pd.read_csv, snapshot)
+        loaded_preds, parsed_preds = _load_sources(
+            pred_changed, _read_prediction_safely, snapshot
+        )
+
+        frames = dict(_analysis_frames)
+        affected = []
+        for path in changed:
+            frame = loaded[path]
+            affected.append(changed_rows(frames.get(path), frame))
+            frames[path] = frame
+        for path in removed:
+            affected.append(frames.pop(path))
+
+        predictions = dict(PREDICTIONS)
+        scenarios = set()
+        for situation, path in _pred_files.items():
+            if path in pred_changed:
+                if loaded_preds[path] is None:
+                    predictions.pop(situation, None)
+                else:
+                    predictions[situation] = loaded_preds[path]
+                scenarios.add(situation)
+            elif path in pred_removed:
+                predictions.pop(situation, None)
+                scenarios.add(situation)
+
+        if frames:
+            new_df = pd.concat(
+                [frames[path] for path in sorted(frames)], ignore_index=True
+            )
+        else:
+            log.warning("no files found matching %s", data_path)
+            new_df = pd.DataFrame(columns=CUTOFF_COLUMNS)
+
+        rows = pd.concat(affected, ignore_index=True) if affected else new_df.iloc[:0]
+        change = describe_change(rows, scenarios)
+
+        dataset = IndexedDataset(new_df)
+
+        # each name is rebound in one step, a render that already read the old objects
+        # finishes on them undisturbed
+        _analysis_frames = frames
+        df, DATASET = new_df, dataset
+        PREDICTIONS = predictions
+        data_version += 1
+
+        change = change._replace(live_campuses=_changed_live_campuses(dataset))
+        _evict_renders(change)
+
+        sources = set(frames) | {_pred_files[s] for s in predictions}
+        if SNAPSHOT_PATH and (
+            parsed
+            or parsed_preds
+            or set(snapshot.tables if snapshot else ()) != sources
+        ):
+            write_data_snapshot()
+
+        return change
+
+
+def _cutoff_repository():
+    # imported here, the csv mode never needs a DATABASE_URL
+    from database.repository import CutoffRepository
+
+    return CutoffRepository()
+
+
+def _reload_from_database():
+    """
+    the database counterpart of a csv reload: one cheap version query, and when an ingest
+    changed the tables, fresh lookups plus the eviction of every render built from them.
+    """
+
+    global DATASET, PREDICTIONS, data_version, _database_version
+
+    with _reload_lock:
+        repository = _cutoff_repository()
+        version = repository.version()
+        if version == _database_version:
+            return None
+
+        dataset = DatabaseDataset(repository)
+        predictions = DatabasePredictions(repository)
+        keys = pd.DataFrame(repository.keys(), columns=["campus", "branch", "year"])
+        change = describe_change(keys, set(predictions) | set(PREDICTIONS))
+
+        DATASET, PREDICTIONS = dataset, predictions
+        data_version += 1
+        _database_version = version
+
+        change = change._replace(live_campuses=_changed_live_campuses(dataset))
+        _evict_renders(change)
+        return change
+
+
+def write_data_snapshot():
+    """
+    compiles the currently loaded csv data into the binary snapshot the next start maps in.
+    """
+
+    tables = dict(_analysis_frames)
+    for situation, frame in PREDICTIONS.items():
+        tables[_pred_files[situation]] = frame
+    try:
+        write_snapshot(tables, SNAPSHOT_PATH)
+    except OSError as e:
+        log.warning("could not write data snapshot %s: %s", SNAPSHOT_PATH, e)
+
+
+def affected_url_keys(change):
+    """
+    URL_CACHE keys (as main.py builds them) of every response a DataChange may have altered.
+    """
+
+    keys = {campus_plot_key(campus) for campus in change.campuses}
+    keys.update(branch_plot_key(campus, branch) for campus, branch in change.branches)
+
+    for campus, year in change.campus_years:
+        keys.add(select_key(year, campus.title()))
+        keys.add(select_key(year, None))
+
+    # the predictions cover the campuses of the dataset, asking the frames (or in database
+    # mode, the predictions table once per scenario) would only find the same names
+    campuses = set(change.campuses) | set(DATASET.campuses())
+    for situation in change.scenarios:
+        keys.update(predict_key(situation, campus) for campus in [None, *campuses])
+
+    if change.live_campuses:
+        try:
+            tag = live_model_tag()
+        except FileNotFoundError:
+            # without a model nothing was ever predicted live, let alone uploaded
+            return keys
+        # every difficulty main.py can key a live prediction under, 0.00 to 1.00
+        keys.update(
+            live_predict_key(step / 100, campus, tag)
+            for step in range(101)
+            for campus in [None, *change.live_campuses]
+        )
+
+    return keys
+
+
+reload_changed_data()
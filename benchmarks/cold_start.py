@@ -0,0 +1,68 @@
+"""
+cold-start cost of loading the cutoff & prediction data: parsing every csv against
+memory-mapping the compiled snapshot. each run is a fresh interpreter, the heavy imports
+(pandas, matplotlib, seaborn) are paid before the clock starts so only the data load and
+the analytics module body are timed.
+
+    uv run python -m benchmarks.cold_start --years 60
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+from benchmarks.common import write_synthetic_data
+
+PROBE = """
+import time
+import pandas, matplotlib.pyplot, seaborn
+start = time.perf_counter()
+import analytics
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def cold_start(root, repo_root, snapshot_path):
+    env = dict(os.environ, DATA_SNAPSHOT_PATH=snapshot_path, PYTHONPATH=repo_root)
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=root,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--years", type=int, default=13, help="years of synthetic cutoff history"
+    )
+    args = parser.parse_args()
+
+    repo_root = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp, years=range(2025 - args.years + 1, 2026))
+        snapshot_path = os.path.join(tmp, "data.snapshot")
+
+        # the first start with a snapshot path parses the csv files & compiles the snapshot
+        build = cold_start(tmp, repo_root, snapshot_path)
+
+        for name, path in (("csv", ""), ("snapshot", snapshot_path)):
+            timings = [cold_start(tmp, repo_root, path) for _ in range(args.repeat)]
+            print(
+                f"{name:<40} min {min(timings):>9.2f} ms   median {statistics.median(timings):>9.2f} ms"
+            )
+
+        print(f"{'first start (parse + compile)':<40} {build:>13.2f} ms")
+        print(f"snapshot size {os.path.getsize(snapshot_path) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
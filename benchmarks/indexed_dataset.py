@@ -0,0 +1,86 @@
+"""
+lookup latency of the per-request `.str.lower()` filters the renders used to run against
+the IndexedDataset lookups that replaced them, plus the memory each one holds.
+
+    uv run python -m benchmarks.indexed_dataset --copies 4
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+
+import pandas as pd
+
+from benchmarks.common import measure, report, write_synthetic_data
+from services.dataset import IndexedDataset
+
+
+def legacy_campus(df, campus):
+    return df[df["campus"].str.lower() == campus]
+
+
+def legacy_branch(df, campus, branch):
+    return df[
+        (df["campus"].str.lower() == campus)
+        & (df["branch"].str.lower() == branch.lower())
+    ]
+
+
+def legacy_select(df, year, campus):
+    target_df = df[df["year"] == year]
+    target_df = target_df[target_df["campus"].str.lower() == campus]
+    target_df = target_df.sort_values(by="marks", ascending=False)
+    table_data = target_df[["campus", "branch", "marks", "year"]].copy()
+    table_data["campus"] = table_data["campus"].str.title()
+    return table_data.values.tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument(
+        "--copies",
+        type=int,
+        default=1,
+        help="stack the synthetic history this many times to emulate a bigger dataset",
+    )
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp)
+        files = glob.glob(os.path.join(tmp, "data", "analysis_data", "*.csv"))
+        df = pd.concat([pd.read_csv(f) for f in files] * args.copies, ignore_index=True)
+
+    branch = df["branch"].iloc[0]
+    report("build IndexedDataset", measure(lambda: IndexedDataset(df), 5))
+    dataset = IndexedDataset(df)
+
+    cases = (
+        (
+            "campus",
+            lambda: legacy_campus(df, "goa"),
+            lambda: dataset.campus("goa").to_frame(),
+        ),
+        (
+            "campus + branch",
+            lambda: legacy_branch(df, "goa", branch),
+            lambda: dataset.campus_branch("goa", branch).to_frame(),
+        ),
+        (
+            "year + campus table rows",
+            lambda: legacy_select(df, 2024, "goa"),
+            lambda: dataset.year(2024, "goa").tolist(),
+        ),
+    )
+    for name, legacy, indexed in cases:
+        report(f"{name} legacy", measure(legacy, args.repeat))
+        report(f"{name} indexed", measure(indexed, args.repeat))
+
+    print(f"\n{len(df)} rows")
+    print(f"DataFrame       {df.memory_usage(deep=True).sum() / 1024:>9.1f} KiB")
+    print(f"IndexedDataset  {dataset.memory_usage() / 1024:>9.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
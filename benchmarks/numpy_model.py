@@ -0,0 +1,103 @@
+"""
+serving cost of the pickled scikit-learn model against the exported numpy artifact:
+load time & peak memory in a fresh interpreter (pandas/numpy already imported), then
+predict latency for one scenario grid and for a 100-difficulty sweep.
+
+    uv run python -m benchmarks.numpy_model
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import warnings
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import measure, report, write_synthetic_data
+
+PROBE = """
+import resource, time, warnings
+import numpy, pandas
+warnings.simplefilter("ignore")
+before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+{load}
+elapsed = (time.perf_counter() - start) * 1000
+print(elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before)
+"""
+
+LOADERS = {
+    "sklearn": "import predictions; predictions.PickledModel(*predictions.load_model())",
+    "numpy": "from services.numpy_model import NumpyModel; NumpyModel('models/model.npz')",
+}
+
+
+def cold_load(load):
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(load=load)],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed, rss = result.stdout.split()
+    return float(elapsed), int(rss)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    import predictions
+    from services.numpy_model import NumpyModel
+
+    for name, load in LOADERS.items():
+        elapsed, rss = cold_load(load)
+        print(
+            f"{name + ' load':<40} {elapsed:>9.2f} ms   +{rss / 1024:.1f} MiB peak rss"
+        )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp)
+        reference = pd.read_csv(
+            os.path.join(tmp, "data", "analysis_data", "cutoff_2025.csv")
+        )
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        models = {
+            "sklearn": predictions.PickledModel(*predictions.load_model()),
+            "numpy": NumpyModel("models/model.npz"),
+        }
+
+    pairs = reference[["campus", "branch"]].drop_duplicates()
+    for label, difficulties in (
+        ("1 scenario", [0.5]),
+        ("100-step sweep", np.linspace(0, 1, 100)),
+    ):
+        grid = pd.DataFrame(
+            {
+                "campus": np.tile(pairs["campus"].to_numpy(), len(difficulties)),
+                "branch": np.tile(pairs["branch"].to_numpy(), len(difficulties)),
+                "year": 2026,
+                "difficulty": np.repeat(difficulties, len(pairs)),
+            }
+        )
+        for name, model in models.items():
+            report(
+                f"{label} ({len(grid)} rows) {name}",
+                measure(partial(model.predict, grid), args.repeat),
+            )
+
+    print(
+        f"\nmodel.npz {os.path.getsize('models/model.npz') / 1024:.1f} KiB, "
+        f"pickles {sum(os.path.getsize(os.path.join('models', f)) for f in ('scaler.pkl', 'model.pkl')) / 1024:.1f} KiB"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+compares the old reminder path (load every user, filter in python) with the indexed
+window query on synthetic users.
+
+    uv run python -m benchmarks.reminder_selection --users 100000
+"""
+
+import argparse
+import random
+import tempfile
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import measure, report
+from database.connection import run_sync
+from database.models import Base, UserExam
+from database.repository import AsyncExamRepository, ExamRepository
+from services.reminder import REMINDER_WINDOWS, Reminder, _reminder_message
+
+
+def seed(session_factory, users, today):
+    rng = random.Random(42)
+    rows = [
+        {
+            "user_id": user_id,
+            "username": f"user{user_id}",
+            "channel_id": rng.randrange(1, 500),
+            # mostly long-expired or far-off dates, the way the table looks after a few seasons
+            "exam_date": today + timedelta(days=rng.randint(-720, 120)),
+        }
+        for user_id in range(1, users + 1)
+    ]
+
+    with session_factory() as session:
+        session.execute(insert(UserExam), rows)
+        session.commit()
+
+
+def async_session_factory(path):
+    """
+    the repositories run on the async engine, seeding stays on a plain sync one.
+    """
+
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    return engine, async_sessionmaker(
+        bind=engine, autoflush=False, expire_on_commit=False
+    )
+
+
+def full_scan(repo, today):
+    reminders = []
+    for user_exam in repo.get_all_users():
+        days_until = (user_exam.exam_date - today).days
+        if _reminder_message(user_exam.exam_date, days_until):
+            reminders.append(user_exam.user_id)
+    return reminders
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    today = date.today()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+        session_factory = sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False
+        )
+        seed(session_factory, args.users, today)
+
+        async_engine, async_factory = async_session_factory(Path(tmp) / "bench.db")
+        repo = ExamRepository(session_factory=async_factory)
+        reminder = Reminder()
+        reminder.reminder.repo = AsyncExamRepository(session_factory=async_factory)
+
+        def windowed():
+            return reminder.users_to_remind()
+
+        expected = len(full_scan(repo, today))
+        assert len(windowed()) == expected
+
+        print(f"{args.users} users, {expected} due today, windows {REMINDER_WINDOWS}")
+        report(
+            "get_all_users + python filter",
+            measure(lambda: full_scan(repo, today), args.repeat),
+        )
+        report("indexed window query (paged)", measure(windowed, args.repeat))
+
+        run_sync(async_engine.dispose())
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+throughput of 50 concurrent mixed render requests: the old default thread-pool path against
+the process-pool RenderService, both starting with cold caches on synthetic data.
+
+    uv run python -m benchmarks.render_farm --requests 50 --workers 4
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from benchmarks.common import write_synthetic_data
+
+
+async def run_requests(render, jobs):
+    start = time.perf_counter()
+    await asyncio.gather(*(render(job) for job in jobs))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    repo_root = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp)
+        # analytics reads its csv files relative to the working directory
+        os.chdir(tmp)
+        sys.path.insert(0, repo_root)
+
+        import analytics
+        from services.render_service import RenderService
+
+        rng = random.Random(7)
+        jobs = rng.choices(analytics.render_jobs(), k=args.requests)
+
+        async def thread_path(job):
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, getattr(analytics, job.func), *job.args
+            )
+
+        threaded = asyncio.run(run_requests(thread_path, jobs))
+
+        # forked workers inherit the parent's memory, they must not start with warm caches
+        for cached in (
+            analytics._get_campus_plot_bytes,
+            analytics._get_branch_plot_bytes,
+            analytics._get_select_table_bytes,
+            analytics._get_prediction_bytes,
+        ):
+            cached.cache_clear()
+
+        service = RenderService(workers=args.workers)
+        service.start()
+        # let every worker finish importing analytics, startup is not what is measured here
+        asyncio.run(
+            run_requests(
+                lambda job: service.render("plot_marks_by_campus", "x"),
+                [None] * args.workers,
+            )
+        )
+        pooled = asyncio.run(
+            run_requests(lambda job: service.render(job.func, *job.args), jobs)
+        )
+        service.shutdown()
+
+        os.chdir(repo_root)
+
+    print(f"{args.requests} mixed requests ({len(set(jobs))} distinct)")
+    print(
+        f"default thread pool          {threaded:>7.2f} s   {args.requests / threaded:>6.1f} req/s"
+    )
+    print(
+        f"process pool ({args.workers} workers)     {pooled:>7.2f} s   {args.requests / pooled:>6.1f} req/s"
+    )
+
+
+if __name__ == "__main__":
+    main()
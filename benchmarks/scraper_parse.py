@@ -0,0 +1,90 @@
+"""
+parse throughput of the cutoff scraper on a synthetic page carrying every year's tables like
+the admissions site does: the full BeautifulSoup tree the old data_pipeline.py built, a
+SoupStrainer restricted to the year's div, and the lxml xpath the scraper uses.
+
+    uv run python -m benchmarks.scraper_parse --years 13
+"""
+
+import argparse
+import random
+from functools import partial
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from benchmarks.common import CAMPUSES, branch_names, measure, report
+from services.scraper import parse_cutoffs, year_div_id
+
+
+def synthetic_page(years, branches, seed=42):
+    rng = random.Random(seed)
+    parts = [
+        "<html><head><title>BITSAT Cutoff Scores</title>",
+        "<script>" + "var x = 1;\n" * 200 + "</script></head><body>",
+        "<nav>" + "<a href='#'>link</a>" * 50 + "</nav>",
+    ]
+    for year in years:
+        parts.append(f'<div id="{year_div_id(year)}" class="tab-pane">')
+        parts.append(
+            "<table><tr><th>Note</th></tr><tr><td>out of 390</td></tr></table>"
+        )
+        parts.append(
+            "<table><tr><th>Campus</th><th>Program</th><th>Cutoff Score</th><th>Remarks</th></tr>"
+        )
+        for campus in CAMPUSES:
+            label = "K K Birla Goa Campus" if campus == "Goa" else campus
+            for branch in branches:
+                parts.append(
+                    f"<tr><td>{label}</td><td>{branch}</td>"
+                    f"<td>{rng.randint(150, 330)}</td><td>-</td></tr>"
+                )
+        parts.append("</table></div>")
+    parts.append("</body></html>")
+    return "".join(parts).encode()
+
+
+def legacy_parse(html, year):
+    soup = BeautifulSoup(html, "lxml")
+    div = soup.find("div", id=year_div_id(year))
+    return [
+        [td.get_text(strip=True) for td in row.find_all("td")]
+        for table in div.find_all("table")
+        for row in table.find_all("tr")[1:]
+    ]
+
+
+def strainer_parse(html, year):
+    strainer = SoupStrainer("div", id=year_div_id(year))
+    soup = BeautifulSoup(html, "lxml", parse_only=strainer)
+    return [
+        [td.get_text(strip=True) for td in row.find_all("td")]
+        for table in soup.find_all("table")
+        for row in table.find_all("tr")[1:]
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--years", type=int, default=13, help="years of tables per page"
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    years = range(2025 - args.years + 1, 2026)
+    html = synthetic_page(years, branch_names())
+    megabytes = len(html) / 1e6
+    print(f"page: {megabytes:.2f} MB, {len(years)} years\n")
+
+    for name, func in (
+        ("full soup", legacy_parse),
+        ("soup strainer", strainer_parse),
+        ("lxml xpath", parse_cutoffs),
+    ):
+        result = measure(partial(func, html, 2025), repeat=args.repeat)
+        report(name, result)
+        print(f"{'':<40} {megabytes / (result['median_ms'] / 1000):>9.2f} MB/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+the whole microbenchmark suite on synthetic data, offline, with the results stored as json so
+two commits can be compared:
+
+    uv run python -m benchmarks.suite                        # -> .cache/benchmarks/<commit>.json
+    uv run python -m benchmarks.suite -k render --repeat 10
+    uv run python -m benchmarks.suite --compare .cache/benchmarks/<older commit>.json
+
+renders are measured cold (nothing cached), from the on-disk render cache (a restart) and warm
+(in-memory hit).
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from functools import partial
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import measure, report, write_synthetic_data
+from benchmarks.reminder_selection import async_session_factory, seed
+
+RESULTS_DIR = os.path.join(".cache", "benchmarks")
+
+
+# each bench_* yields (name, thunk), calling the thunk measures it
+def bench_renders(analytics, repeat, tmp):
+    from services.render_cache import RenderCache
+
+    branch = min(analytics.alias_to_actual.values())
+    cases = {
+        "campus_plot": (analytics._get_campus_plot_bytes, ("pilani",)),
+        "branch_plot": (analytics._get_branch_plot_bytes, ("goa", branch)),
+        "select_table": (analytics._get_select_table_bytes, (2025, None, 25)),
+        "prediction_table": (
+            analytics._get_prediction_bytes,
+            ("most-likely", "Pilani", 25),
+        ),
+    }
+    fresh_dirs = itertools.count()
+
+    for name, (func, args) in cases.items():
+
+        def cold(func=func):
+            func.cache_clear()
+            directory = os.path.join(tmp, "renders", str(next(fresh_dirs)))
+            analytics.RENDER_CACHE = RenderCache(directory)
+
+        def call(func=func, args=args):
+            assert func(*args) is not None
+
+        yield f"render {name} cold", partial(measure, call, repeat, setup=cold)
+        yield (
+            f"render {name} disk",
+            partial(measure, call, repeat, setup=func.cache_clear),
+        )
+        yield f"render {name} warm", partial(measure, call, repeat * 100)
+
+
+def bench_tabulate(analytics, repeat, tmp):
+    rows = analytics.DATASET.year(2025).tolist()
+    headers = ["Campus", "Course", "Marks", "Year"]
+    for limit in (10, 25):
+        yield (
+            f"_tabulate_to_bytes {limit} rows",
+            partial(
+                measure,
+                partial(analytics._tabulate_to_bytes, rows, headers, limit),
+                repeat,
+            ),
+        )
+
+
+def bench_parsing(analytics, repeat, tmp):
+    from main import parse_campus
+    from services.branches import normalize_branch_name
+
+    queries = ["pilani cse", "Goa  mech", "hyderabad b.e. computer science", "eee"]
+    aliases = list(analytics.alias_to_actual)[:20] + ["not a branch", "B.E. Civil"]
+
+    yield (
+        f"parse_campus x{len(queries)}",
+        lambda: measure(lambda: [parse_campus(q) for q in queries], repeat * 100),
+    )
+    yield (
+        f"normalize_branch_name x{len(aliases)}",
+        lambda: measure(
+            lambda: [
+                normalize_branch_name(a, analytics.alias_to_actual) for a in aliases
+            ],
+            repeat * 100,
+        ),
+    )
+
+
+def bench_loading(analytics, repeat, tmp):
+    yield (
+        "load_data_parallel",
+        lambda: measure(
+            lambda: analytics.load_data_parallel(analytics.data_path), repeat
+        ),
+    )
+
+
+def _session_factory(path):
+    from database.models import Base
+
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    return engine, sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+
+def bench_reminders(analytics, repeat, tmp, users=(1_000, 100_000)):
+    from database.connection import run_sync
+    from database.repository import AsyncExamRepository
+    from services.reminder import Reminder
+
+    def run(count):
+        # seeding 100k users takes a while, only pay for it when this one is selected
+        path = os.path.join(tmp, f"reminders_{count}.db")
+        engine, session_factory = _session_factory(path)
+        seed(session_factory, count, date.today())
+        async_engine, async_factory = async_session_factory(path)
+        reminder = Reminder()
+        reminder.reminder.repo = AsyncExamRepository(session_factory=async_factory)
+        try:
+            return measure(reminder.users_to_remind, repeat)
+        finally:
+            run_sync(async_engine.dispose())
+            engine.dispose()
+
+    for count in users:
+        yield f"users_to_remind {count} users", partial(run, count)
+
+
+def bench_repository(analytics, repeat, tmp):
+    from database.connection import run_sync
+    from database.repository import ExamRepository
+
+    path = os.path.join(tmp, "crud.db")
+    engine, session_factory = _session_factory(path)
+    async_engine, async_factory = async_session_factory(path)
+    repo = ExamRepository(session_factory=async_factory)
+    rng = random.Random(42)
+    seed(session_factory, 1000, date.today())
+
+    new_ids = itertools.count(10_000)
+    exam = date.today() + timedelta(days=30)
+    calls = repeat * 20
+
+    yield (
+        "ExamRepository insert",
+        lambda: measure(
+            lambda: repo.set_user_exam(next(new_ids), "new", 1, exam), calls
+        ),
+    )
+    yield (
+        "ExamRepository update",
+        lambda: measure(
+            lambda: repo.set_user_exam(rng.randint(1, 1000), "renamed", 2, exam),
+            calls,
+        ),
+    )
+    yield (
+        "ExamRepository get",
+        lambda: measure(lambda: repo.get_user_exam(rng.randint(1, 1000)), calls),
+    )
+
+    deleted = itertools.count(10_000)
+    yield (
+        "ExamRepository delete",
+        lambda: measure(lambda: repo.delete_user_exam(next(deleted)), calls),
+    )
+    run_sync(async_engine.dispose())
+    engine.dispose()
+
+
+GROUPS = [
+    bench_renders,
+    bench_tabulate,
+    bench_parsing,
+    bench_loading,
+    bench_reminders,
+    bench_repository,
+]
+
+
+def _commit(repo_root):
+    def git(*args):
+        return subprocess.run(
+            ["git", *args], cwd=repo_root, capture_output=True, text=True, check=False
+        )
+
+    try:
+        head = git("rev-parse", "--short", "HEAD")
+        dirty = git("status", "--porcelain", "--untracked-files=no").stdout.strip()
+    except OSError:
+        return "unknown"
+    if head.returncode != 0:
+        return "unknown"
+    return head.stdout.strip() + ("-dirty" if dirty else "")
+
+
+def compare(results, baseline, threshold):
+    """
+    prints the median of every benchmark against the baseline run, returns the names that got
+    slower by more than threshold (0.1 = 10%).
+    """
+
+    print(f"\ncompared with {baseline['commit']} ({baseline['timestamp']}):")
+    regressions = []
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<40} new")
+            continue
+        ratio = result["median_ms"] / before["median_ms"]
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <- slower"
+            regressions.append(name)
+        elif ratio < 1 - threshold:
+            flag = "  faster"
+        print(
+            f"{name:<40} {before['median_ms']:>10.3f} -> {result['median_ms']:>10.3f} ms"
+            f"   x{ratio:.2f}{flag}"
+        )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "-k", dest="keyword", default="", help="only run benchmarks whose name has this"
+    )
+    parser.add_argument(
+        "--output", default=None, help="defaults to .cache/benchmarks/<commit>.json"
+    )
+    parser.add_argument("--compare", default=None, help="an earlier results json")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1, help="slowdown counted as a regression"
+    )
+    args = parser.parse_args(argv)
+
+    repo_root = os.getcwd()
+    commit = _commit(repo_root)
+    output = args.output or os.path.join(RESULTS_DIR, f"{commit}.json")
+    output = os.path.abspath(output)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp)
+        # analytics reads its csv files relative to the working directory
+        os.chdir(tmp)
+        sys.path.insert(0, repo_root)
+        try:
+            import warnings
+
+            import analytics
+
+            warnings.simplefilter("ignore", UserWarning)
+
+            for group in GROUPS:
+                # every benchmark comes as (name, thunk) so the deselected ones never run
+                for name, run in group(analytics, args.repeat, tmp):
+                    if args.keyword not in name:
+                        continue
+                    results[name] = run()
+                    report(name, results[name])
+        finally:
+            os.chdir(repo_root)
+
+    run = {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(run, f, indent=2)
+    print(f"\nwrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
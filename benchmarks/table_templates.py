@@ -0,0 +1,127 @@
+"""
+per-table latency of the template-based _tabulate_to_bytes against the original
+build-style-and-tight-save path, for the tables behind `select` and `get_predictions`.
+
+    uv run python -m benchmarks.table_templates
+"""
+
+import argparse
+import io
+import os
+import sys
+import tempfile
+from functools import partial
+
+from benchmarks.common import measure, report, write_synthetic_data
+
+
+def legacy_tabulate_to_bytes(plt, data, headers, limit=25):
+    # the implementation _tabulate_to_bytes replaced, kept here as the baseline
+    top_rows = data[:limit]
+    num_columns = len(headers)
+
+    header_color = "#40466e"
+    row_colors = ["#f8f9fa", "#ffffff"]
+    edge_color = "black"
+    text_color = "#333333"
+    header_text_color = "#ffffff"
+
+    row_height = 0.5
+    fig_height = (len(top_rows) + 1) * row_height + 0.5
+
+    _, ax = plt.subplots(figsize=(10, fig_height))
+    ax.axis("off")
+    ax.axis("tight")
+
+    col_widths = [0.15, 0.6, 0.15, 0.1]
+    if len(col_widths) != num_columns:
+        col_widths = [1.0 / num_columns] * num_columns
+
+    table = ax.table(
+        cellText=top_rows,
+        colLabels=headers,
+        cellLoc="center",
+        loc="center",
+        colWidths=col_widths,
+    )
+
+    table.auto_set_font_size(False)
+    table.set_fontsize(16)
+    table.scale(1, 2.0)
+
+    for (row, col), cell in table.get_celld().items():
+        cell.set_edgecolor(edge_color)
+        cell.set_linewidth(1)
+        if row == 0:
+            cell.set_facecolor(header_color)
+            cell.set_text_props(weight="bold", color=header_text_color)
+            cell.set_height(0.08)
+        else:
+            cell.set_facecolor(row_colors[row % 2])
+            cell.set_text_props(color=text_color)
+
+    buf = io.BytesIO()
+    plt.tight_layout()
+    plt.savefig(
+        buf,
+        format="png",
+        bbox_inches="tight",
+        dpi=150,
+        facecolor="white",
+        pad_inches=0.1,
+    )
+    plt.close()
+    return buf.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    repo_root = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        write_synthetic_data(tmp)
+        os.chdir(tmp)
+        sys.path.insert(0, repo_root)
+
+        import warnings
+
+        import analytics
+
+        warnings.simplefilter("ignore", UserWarning)
+
+        year_df = analytics.df[analytics.df["year"] == 2025].sort_values(
+            by="marks", ascending=False
+        )
+        select_rows = year_df[["campus", "branch", "marks", "year"]].values.tolist()
+        select_headers = ["Campus", "Course", "Marks", "Year"]
+
+        pred_df = analytics.PREDICTIONS["most-likely"]
+        pred_df = pred_df[pred_df["campus"] == "Pilani"]
+        pred_rows = pred_df.values.tolist()
+        pred_headers = [h.title() for h in pred_df.columns.tolist()]
+
+        for name, rows, headers in (
+            ("select 2025 (25 rows)", select_rows, select_headers),
+            ("predict pilani (14 rows)", pred_rows, pred_headers),
+        ):
+            report(
+                f"{name} legacy",
+                measure(
+                    partial(legacy_tabulate_to_bytes, analytics.plt, rows, headers),
+                    args.repeat,
+                ),
+            )
+            report(
+                f"{name} template",
+                measure(
+                    partial(analytics._tabulate_to_bytes, rows, headers), args.repeat
+                ),
+            )
+
+        os.chdir(repo_root)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,61 +1,69 @@
-from bs4 import BeautifulSoup
-import requests
-import urllib3
-import pandas as pd
+"""
+scrapes the BITSAT cutoffs of every given year page into data/analysis_data:
 
-# the site has some insecure/incomplete SSL certificate chain
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+    uv run python data_pipeline.py
+    uv run python data_pipeline.py --page 2024=<url> --page 2025=<url>
+
+pages are fetched concurrently and conditionally, so re-running it only downloads pages that
+changed on the site and only appends (campus, branch, year) rows that aren't stored yet.
+"""
+
+import argparse
+import time
+
+from services import scraper
 
 # change URL each year in accordance to new cutoff-data
-URL = "https://admissions.bits-pilani.ac.in/FD/BITSAT_cutOffs.html?FQwp43qOeKhayi8LEQVUtJn3QNZ0TciWLP4NKxNMfcgzQdzcqZCCLqDBZRDnjcsHWFGgSC&yr=2025-2026&eKhayi8LEQwp4NKxN+CfCh+3qOVUtJn3QNZ0TciWLP4"
-
-# static value for year chosen
-year = 2025
-
-html_text = requests.get(URL, verify=False).text
-soup = BeautifulSoup(html_text, "lxml")
-
-# to modify accordingly
-div = soup.find("div", id="2025-2026")
-
-data = []
-tables = div.find_all("table")
-
-for table in tables:
-    rows = table.find_all("tr")
-
-    # skip any tiny-tables in the way
-    if len(rows) < 3:
-        continue
-
-    for row in rows[1:]:
-        cols = row.find_all("td")
-
-        if len(cols) >= 4:
-            campus = cols[0].get_text(strip=True)
-            program = cols[1].get_text(strip=True)
-            cutoff = cols[2].get_text(strip=True)
-
-            if "Goa" in campus:
-                campus = "Goa"
-            elif campus not in ["Pilani", "Goa", "Hyderabad"]:
-                continue
-
-            # validating if data row
-            if cutoff.isdigit() and program.lower() != "program":
-                data.append(
-                    {
-                        "campus": campus,
-                        "branch": program,
-                        "marks": int(cutoff),
-                        "year": year,
-                    }
-                )
-
-if data:
-    df = pd.DataFrame(data)
-    df = df.drop_duplicates()
-    df.to_csv("bitsat_cutoffs.csv", index=False)
-    print(df.head(10))
-else:
-    print("\ntask failed")
+PAGES = {
+    2025: "https://admissions.bits-pilani.ac.in/FD/BITSAT_cutOffs.html?FQwp43qOeKhayi8LEQVUtJn3QNZ0TciWLP4NKxNMfcgzQdzcqZCCLqDBZRDnjcsHWFGgSC&yr=2025-2026&eKhayi8LEQwp4NKxN+CfCh+3qOVUtJn3QNZ0TciWLP4",
+}
+
+
+def _page(value):
+    year, _, url = value.partition("=")
+    if not year.isdigit() or not url:
+        raise argparse.ArgumentTypeError(f"expected year=url, got {value!r}")
+    return int(year), url
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--page",
+        type=_page,
+        action="append",
+        metavar="YEAR=URL",
+        help="year page to scrape, defaults to the pages listed in PAGES",
+    )
+    parser.add_argument("--output-dir", default=scraper.OUTPUT_DIR)
+    parser.add_argument("--validators", default=scraper.VALIDATORS_PATH)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument(
+        "--force", action="store_true", help="ignore ETag/Last-Modified, refetch all"
+    )
+    args = parser.parse_args(argv)
+
+    pages = args.page or sorted(PAGES.items())
+
+    start = time.perf_counter()
+    results, added = scraper.update(
+        pages,
+        output_dir=args.output_dir,
+        validators_path=args.validators,
+        workers=args.workers,
+        force=args.force,
+    )
+
+    for result in results:
+        print(
+            f"{result.year}: {result.status}, {len(result.rows)} rows parsed, "
+            f"{added.get(result.year, 0)} new"
+        )
+    print(f"done in {time.perf_counter() - start:.2f}s")
+    return results, added
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import asyncio
 import os
-from sqlalchemy import create_engine
+import threading
+from contextlib import contextmanager, asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from dotenv import load_dotenv
 
@@ -10,6 +15,22 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
     raise ValueError("DATABASE_URL not found")
 
+
+def to_async_url(url):
+    """
+    swaps the sync driver of a database-url for its asyncio counterpart.
+    """
+
+    url = make_url(url)
+    backend = url.get_backend_name()
+
+    if backend == "postgresql":
+        return url.set(drivername="postgresql+asyncpg")
+    if backend == "sqlite":
+        return url.set(drivername="sqlite+aiosqlite")
+    return url
+
+
 engine = create_engine(
     DATABASE_URL,
     echo=False,
@@ -19,7 +40,136 @@ engine = create_engine(
     pool_recycle=3600,
 )
 
-SessionLocal = sessionmaker(bind=engine, autocommit=False, autoflush=False)
+# rows are handed back after their session closes, so they must not expire on commit
+SessionLocal = sessionmaker(
+    bind=engine, autocommit=False, autoflush=False, expire_on_commit=False
+)
+
+# the bot itself talks to postgres through this one so that no query blocks the event-loop
+async_engine = create_async_engine(
+    os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL),
+    echo=False,
+    pool_size=5,
+    max_overflow=10,
+    pool_pre_ping=True,
+    pool_recycle=3600,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+
+_pool_peaks = {}
+_pool_lock = threading.Lock()
+
+
+def watch_pool(target):
+    """
+    records checkout totals & the high-water mark of a pool, this is what pool_size and
+    max_overflow should be sized from.
+    """
+
+    pool = getattr(target, "sync_engine", target).pool
+    peaks = {"checkouts": 0, "peak_checked_out": 0, "peak_overflow": 0}
+    _pool_peaks[id(pool)] = peaks
+
+    @event.listens_for(pool, "checkout")
+    def on_checkout(dbapi_conn, conn_record, conn_proxy):
+        with _pool_lock:
+            peaks["checkouts"] += 1
+            peaks["peak_checked_out"] = max(
+                peaks["peak_checked_out"], _pool_call(pool, "checkedout")
+            )
+            peaks["peak_overflow"] = max(
+                peaks["peak_overflow"], _pool_call(pool, "overflow")
+            )
+
+    return pool
+
+
+def _pool_call(pool, name):
+    # only QueuePool-like pools report these, NullPool/StaticPool do not
+    method = getattr(pool, name, None)
+    return max(method(), 0) if method else 0
+
+
+def pool_stats(target=None):
+    """
+    live & peak checkout numbers of the sync (default) or async engine.
+    """
+
+    pool = getattr(target or engine, "sync_engine", target or engine).pool
+    peaks = _pool_peaks.get(id(pool), {})
+
+    return {
+        "pool_size": _pool_call(pool, "size"),
+        "checked_in": _pool_call(pool, "checkedin"),
+        "checked_out": _pool_call(pool, "checkedout"),
+        "overflow": _pool_call(pool, "overflow"),
+        "checkouts": peaks.get("checkouts", 0),
+        "peak_checked_out": peaks.get("peak_checked_out", 0),
+        "peak_overflow": peaks.get("peak_overflow", 0),
+    }
+
+
+watch_pool(engine)
+watch_pool(async_engine)
+
+
+@contextmanager
+def session_scope(session_factory=SessionLocal):
+    """
+    one unit of work, commits when the block finishes and rolls back if it raises.
+    """
+
+    session = session_factory()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+@asynccontextmanager
+async def async_session_scope(session_factory=AsyncSessionLocal):
+    """
+    async counterpart of session_scope.
+    """
+
+    async with session_factory() as session:
+        try:
+            yield session
+            await session.commit()
+        except Exception:
+            await session.rollback()
+            raise
+
+
+_runner_loop = None
+_runner_lock = threading.Lock()
+
+
+def run_sync(coro):
+    """
+    runs coro to completion and returns its result, for the blocking wrappers around the
+    async repository & services. every call goes to the same event-loop on a daemon thread,
+    so the async engine's pooled connections never move between loops. not for use from the
+    bot process, its own loop already owns that pool.
+    """
+
+    global _runner_loop
+
+    with _runner_lock:
+        if _runner_loop is None:
+            _runner_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_runner_loop.run_forever, name="run-sync", daemon=True
+            ).start()
+    return asyncio.run_coroutine_threadsafe(coro, _runner_loop).result()
 
 
 def get_db():
@@ -32,3 +182,12 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    async database session with automatic cleanup.
+    """
+
+    async with AsyncSessionLocal() as db:
+        yield db
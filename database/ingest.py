@@ -0,0 +1,149 @@
+"""
+loads the cutoff & prediction csv files into the cutoffs/predictions tables:
+
+    uv run python -m database.ingest
+    uv run python -m database.ingest --cutoffs "data/analysis_data/cutoff_2025.csv" --no-predictions
+
+every year (and scenario) found in the files replaces what the table held for it, all in one
+transaction. postgres receives the rows through COPY, other databases through executemany.
+"""
+
+import argparse
+import glob
+import io
+import os
+import time
+
+import pandas as pd
+from sqlalchemy import delete
+
+from .connection import engine as default_engine
+from .models import Base, Cutoff, Prediction
+from .repository import branch_key, campus_key
+
+CUTOFF_FILES = os.path.join("data", "analysis_data", "*.csv")
+PREDICTION_FILES = {
+    "worst": os.path.join("predict", "worst_case.csv"),
+    "most-likely": os.path.join("predict", "most_likely_case.csv"),
+    "best": os.path.join("predict", "best_case.csv"),
+}
+
+COLUMNS = ["campus", "branch", "branch_key", "marks", "year"]
+
+
+def _normalize(frame):
+    frame = frame[["campus", "branch", "marks", "year"]].dropna()
+    frame = frame.assign(
+        campus=frame["campus"].astype(str).map(campus_key),
+        branch=frame["branch"].astype(str).str.strip(),
+        marks=frame["marks"].astype(int),
+        year=frame["year"].astype(int),
+    )
+    frame["branch_key"] = frame["branch"].map(branch_key)
+    # the unique index is on (campus, branch_key, year), the first row of a repeat wins
+    return frame.drop_duplicates(["campus", "branch_key", "year"])[COLUMNS]
+
+
+def read_cutoffs(paths):
+    frames = [pd.read_csv(path) for path in paths]
+    if not frames:
+        return pd.DataFrame(columns=COLUMNS)
+    return _normalize(pd.concat(frames, ignore_index=True))
+
+
+def read_predictions(files):
+    frames = []
+    for scenario, path in files.items():
+        if os.path.exists(path):
+            frames.append(_normalize(pd.read_csv(path)).assign(scenario=scenario))
+    if not frames:
+        return pd.DataFrame(columns=["scenario", *COLUMNS])
+    return pd.concat(frames, ignore_index=True)[["scenario", *COLUMNS]]
+
+
+def _copy_rows(connection, table, frame):
+    buffer = io.StringIO()
+    frame.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(
+            f"COPY {table.name} ({', '.join(frame.columns)}) FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    finally:
+        cursor.close()
+
+
+def _load_rows(connection, table, frame):
+    if frame.empty:
+        return
+    if connection.dialect.driver == "psycopg2":
+        _copy_rows(connection, table, frame)
+    else:
+        connection.execute(table.insert(), frame.to_dict("records"))
+
+
+def ingest(cutoffs, predictions, engine=default_engine):
+    """
+    replaces the years in cutoffs and the scenarios in predictions, returns the rows written
+    per table.
+    """
+
+    Base.metadata.create_all(engine, tables=[Cutoff.__table__, Prediction.__table__])
+
+    with engine.begin() as connection:
+        if not cutoffs.empty:
+            years = sorted(int(year) for year in cutoffs["year"].unique())
+            connection.execute(delete(Cutoff).where(Cutoff.year.in_(years)))
+            _load_rows(connection, Cutoff.__table__, cutoffs)
+
+        if not predictions.empty:
+            scenarios = sorted(predictions["scenario"].unique())
+            connection.execute(
+                delete(Prediction).where(Prediction.scenario.in_(scenarios))
+            )
+            _load_rows(connection, Prediction.__table__, predictions)
+
+    return {"cutoffs": len(cutoffs), "predictions": len(predictions)}
+
+
+def main(argv=None, engine=default_engine):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--cutoffs", default=CUTOFF_FILES, help="glob of cutoff csv files"
+    )
+    parser.add_argument(
+        "--predictions-dir",
+        default=None,
+        help="directory holding worst_case.csv, most_likely_case.csv & best_case.csv",
+    )
+    parser.add_argument("--no-predictions", action="store_true")
+    args = parser.parse_args(argv)
+
+    files = {}
+    if not args.no_predictions:
+        files = dict(PREDICTION_FILES)
+        if args.predictions_dir:
+            files = {
+                scenario: os.path.join(args.predictions_dir, os.path.basename(path))
+                for scenario, path in files.items()
+            }
+
+    start = time.perf_counter()
+    cutoffs = read_cutoffs(sorted(glob.glob(args.cutoffs)))
+    predictions = read_predictions(files)
+    written = ingest(cutoffs, predictions, engine)
+
+    print(
+        f"ingested {written['cutoffs']} cutoffs and {written['predictions']} predictions "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return written
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, Integer, BigInteger, String, Date
+from datetime import datetime, UTC
+from sqlalchemy import (
+    Column,
+    Integer,
+    BigInteger,
+    String,
+    Date,
+    DateTime,
+    Index,
+    UniqueConstraint,
+)
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -10,8 +20,96 @@ class UserExam(Base):
     id = Column(Integer, primary_key=True)
     user_id = Column(BigInteger, unique=True, nullable=False)
     username = Column(String)
-    exam_date = Column(Date, nullable=False)
+    exam_date = Column(Date, nullable=False, index=True)
     channel_id = Column(BigInteger, nullable=False)
 
     def __repr__(self):
         return f"<UserExam(user={self.username}, date={self.exam_date})>"
+
+
+class ReminderDelivery(Base):
+    """
+    one row per reminder that actually went out, the unique constraint is what keeps a
+    restarted bot from sending the same window twice.
+    """
+
+    __tablename__ = "reminder_deliveries"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "exam_date", "window_days", name="uq_reminder_delivery"
+        ),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(BigInteger, nullable=False)
+    exam_date = Column(Date, nullable=False, index=True)
+    # days before the exam this reminder was for (30, 7, ..., 0)
+    window_days = Column(Integer, nullable=False)
+    channel_id = Column(BigInteger)
+    delivered_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(UTC),
+    )
+
+    def __repr__(self):
+        return f"<ReminderDelivery(user={self.user_id}, date={self.exam_date}, window={self.window_days})>"
+
+
+class Cutoff(Base):
+    """
+    closing marks of one (campus, branch) in one year, loaded by `python -m database.ingest`.
+    campus is stored title-cased and the branch once more lower-cased, so every lookup is an
+    equality on indexed columns instead of lower() over the whole table.
+    """
+
+    __tablename__ = "cutoffs"
+    __table_args__ = (
+        Index(
+            "ix_cutoffs_campus_branch_year", "campus", "branch_key", "year", unique=True
+        ),
+        Index("ix_cutoffs_year_campus", "year", "campus"),
+        # ids must keep growing across delete + re-insert, CutoffRepository.version() relies on it
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    campus = Column(String(32), nullable=False)
+    branch = Column(String, nullable=False)
+    branch_key = Column(String, nullable=False)
+    marks = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<Cutoff(campus={self.campus}, branch={self.branch}, year={self.year}, marks={self.marks})>"
+
+
+class Prediction(Base):
+    """
+    predicted cutoff of one (campus, branch) under a scenario ("worst", "most-likely", "best").
+    """
+
+    __tablename__ = "predictions"
+    __table_args__ = (
+        Index(
+            "ix_predictions_scenario_campus_branch_year",
+            "scenario",
+            "campus",
+            "branch_key",
+            "year",
+            unique=True,
+        ),
+        Index("ix_predictions_year_campus", "year", "campus"),
+        {"sqlite_autoincrement": True},
+    )
+
+    id = Column(Integer, primary_key=True)
+    scenario = Column(String(32), nullable=False)
+    campus = Column(String(32), nullable=False)
+    branch = Column(String, nullable=False)
+    branch_key = Column(String, nullable=False)
+    marks = Column(Integer, nullable=False)
+    year = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<Prediction(scenario={self.scenario}, campus={self.campus}, branch={self.branch}, marks={self.marks})>"
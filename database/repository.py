@@ -1,67 +1,365 @@
 from datetime import date
-from typing import Optional, List
-from .models import UserExam
-from .connection import SessionLocal
+from collections.abc import Iterable, Iterator, AsyncIterator
+from sqlalchemy import select, delete, func, and_, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import UserExam, ReminderDelivery, Cutoff, Prediction
+from .connection import (
+    SessionLocal,
+    AsyncSessionLocal,
+    session_scope,
+    async_session_scope,
+    run_sync,
+)
 
+# rows read per query when paging through reminder candidates, each page has its own session
+STREAM_BATCH_SIZE = 1000
 
-class ExamRepository:
+
+def _reminder_candidates_query(exam_dates: Iterable[date], after: tuple | None):
+    # plain columns instead of ORM objects, nothing here needs identity-map tracking
+    query = (
+        select(UserExam.user_id, UserExam.channel_id, UserExam.exam_date)
+        .where(UserExam.exam_date.in_(list(exam_dates)))
+        .order_by(UserExam.exam_date, UserExam.user_id)
+        .limit(STREAM_BATCH_SIZE)
+    )
+    if after is not None:
+        # keyset paging, the next page starts right behind the last (exam_date, user_id)
+        exam_date, user_id = after
+        query = query.where(
+            or_(
+                UserExam.exam_date > exam_date,
+                and_(UserExam.exam_date == exam_date, UserExam.user_id > user_id),
+            )
+        )
+    return query
+
+
+def _next_page(page: list) -> tuple | None:
+    # where the following page starts, None once a short page showed there is nothing left
+    if len(page) < STREAM_BATCH_SIZE:
+        return None
+    return page[-1].exam_date, page[-1].user_id
+
+
+def _deliveries_insert(dialect_name: str, rows: list[dict]):
+    # one multi-row INSERT, rows that already exist are skipped by the unique constraint
+    if dialect_name == "sqlite":
+        return sqlite.insert(ReminderDelivery).values(rows).on_conflict_do_nothing()
+    return (
+        postgresql.insert(ReminderDelivery)
+        .values(rows)
+        .on_conflict_do_nothing(constraint="uq_reminder_delivery")
+    )
+
+
+def _delivered_keys_query(exam_dates: Iterable[date]):
+    return select(
+        ReminderDelivery.user_id,
+        ReminderDelivery.exam_date,
+        ReminderDelivery.window_days,
+    ).where(ReminderDelivery.exam_date.in_(list(exam_dates)))
+
+
+class AsyncExamRepository:
     """
     handles database operations for user-exam tracking.
+    every call gets its own AsyncSession, so concurrent commands never share one.
     """
 
-    def __init__(self):
-        self.db = SessionLocal()
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.session_factory = session_factory
 
-    def set_user_exam(
+    async def set_user_exam(
         self, user_id: int, username: str, channel_id: int, exam_date: date
     ) -> UserExam:
         """
         set/update user's exam date
         """
 
-        user_exam = self.db.query(UserExam).filter(UserExam.user_id == user_id).first()
-
-        if user_exam:
-            user_exam.exam_date = exam_date
-            user_exam.username = username
-            user_exam.channel_id = channel_id
-        else:
-            user_exam = UserExam(
-                user_id=user_id,
-                username=username,
-                channel_id=channel_id,
-                exam_date=exam_date,
+        async with async_session_scope(self.session_factory) as session:
+            result = await session.execute(
+                select(UserExam).where(UserExam.user_id == user_id)
             )
-            self.db.add(user_exam)
+            user_exam = result.scalars().first()
+
+            if user_exam:
+                user_exam.exam_date = exam_date
+                user_exam.username = username
+                user_exam.channel_id = channel_id
+            else:
+                user_exam = UserExam(
+                    user_id=user_id,
+                    username=username,
+                    channel_id=channel_id,
+                    exam_date=exam_date,
+                )
+                session.add(user_exam)
 
-        self.db.commit()
         return user_exam
 
-    def get_user_exam(self, user_id: int) -> Optional[UserExam]:
+    async def get_user_exam(self, user_id: int) -> UserExam | None:
         """
         get details.
         """
 
-        return self.db.query(UserExam).filter(UserExam.user_id == user_id).first()
+        async with async_session_scope(self.session_factory) as session:
+            result = await session.execute(
+                select(UserExam).where(UserExam.user_id == user_id)
+            )
+            return result.scalars().first()
 
-    def get_all_users(self) -> List[UserExam]:
+    async def get_all_users(self) -> list[UserExam]:
         """
         get all users with exam dates.
         """
 
-        return self.db.query(UserExam).all()
+        async with async_session_scope(self.session_factory) as session:
+            result = await session.execute(select(UserExam))
+            return list(result.scalars().all())
 
-    def delete_user_exam(self, user_id: int) -> bool:
+    async def reminder_candidates_page(
+        self, exam_dates: Iterable[date], after: tuple | None = None
+    ) -> list:
+        """
+        up to STREAM_BATCH_SIZE candidate rows following the (exam_date, user_id) after.
+        """
+
+        async with async_session_scope(self.session_factory) as session:
+            result = await session.execute(
+                _reminder_candidates_query(exam_dates, after)
+            )
+            return result.all()
+
+    async def reminder_candidate_pages(
+        self, exam_dates: Iterable[date]
+    ) -> AsyncIterator[list]:
+        """
+        every candidate for exam_dates, one page (list of rows) at a time.
+        """
+
+        exam_dates, after = list(exam_dates), None
+        while True:
+            page = await self.reminder_candidates_page(exam_dates, after)
+            yield page
+            after = _next_page(page)
+            if after is None:
+                return
+
+    async def stream_reminder_candidates(
+        self, exam_dates: Iterable[date]
+    ) -> AsyncIterator:
+        """
+        stream (user_id, channel_id, exam_date) rows whose exam falls on one of exam_dates,
+        uses the exam_date index so expired dates are never read.
+        a page is read and its session closed before any of its rows is handed out, so a
+        caller that stops early or keeps the iterator around holds no pooled connection.
+        """
+
+        async for page in self.reminder_candidate_pages(exam_dates):
+            for row in page:
+                yield row
+
+    async def get_delivered_keys(self, exam_dates: Iterable[date]) -> set:
+        """
+        (user_id, exam_date, window_days) of reminders already sent for these exam dates.
+        """
+
+        async with async_session_scope(self.session_factory) as session:
+            result = await session.execute(_delivered_keys_query(exam_dates))
+            return {tuple(row) for row in result}
+
+    async def last_delivery_date(self) -> date | None:
+        """
+        day the newest reminder in the ledger went out, None if the ledger is empty.
+        """
+
+        async with async_session_scope(self.session_factory) as session:
+            delivered_at = await session.scalar(
+                select(func.max(ReminderDelivery.delivered_at))
+            )
+            return delivered_at.date() if delivered_at else None
+
+    async def record_deliveries(self, rows: list[dict]) -> None:
+        """
+        write a batch of sent reminders to the ledger in a single statement.
+        """
+
+        if not rows:
+            return
+        async with async_session_scope(self.session_factory) as session:
+            await session.execute(_deliveries_insert(session.bind.dialect.name, rows))
+
+    async def delete_user_exam(self, user_id: int) -> bool:
         """
         remove user-records from the database.
         """
 
-        user_exam = self.get_user_exam(user_id)
-        if user_exam:
-            self.db.delete(user_exam)
-            self.db.commit()
-            return True
-        return False
+        async with async_session_scope(self.session_factory) as session:
+            result = await session.execute(
+                delete(UserExam).where(UserExam.user_id == user_id)
+            )
+            return result.rowcount > 0
+
+
+class ExamRepository:
+    """
+    blocking wrapper around AsyncExamRepository for scripts, benchmarks and the shell,
+    each call runs the async one through run_sync.
+    """
 
-    def close(self):
-        self.db.close()
+    def __init__(self, session_factory=AsyncSessionLocal):
+        self.repo = AsyncExamRepository(session_factory)
+
+    def set_user_exam(
+        self, user_id: int, username: str, channel_id: int, exam_date: date
+    ) -> UserExam:
+        return run_sync(
+            self.repo.set_user_exam(user_id, username, channel_id, exam_date)
+        )
+
+    def get_user_exam(self, user_id: int) -> UserExam | None:
+        return run_sync(self.repo.get_user_exam(user_id))
+
+    def get_all_users(self) -> list[UserExam]:
+        return run_sync(self.repo.get_all_users())
+
+    def iter_reminder_candidates(self, exam_dates: Iterable[date]) -> Iterator:
+        pages = self.repo.reminder_candidate_pages(exam_dates)
+        while True:
+            try:
+                page = run_sync(anext(pages))
+            except StopAsyncIteration:
+                return
+            yield from page
+
+    def get_delivered_keys(self, exam_dates: Iterable[date]) -> set:
+        return run_sync(self.repo.get_delivered_keys(exam_dates))
+
+    def last_delivery_date(self) -> date | None:
+        return run_sync(self.repo.last_delivery_date())
+
+    def record_deliveries(self, rows: list[dict]) -> None:
+        run_sync(self.repo.record_deliveries(rows))
+
+    def delete_user_exam(self, user_id: int) -> bool:
+        return run_sync(self.repo.delete_user_exam(user_id))
+
+
+def campus_key(campus: str) -> str:
+    return campus.strip().title()
+
+
+def branch_key(branch: str) -> str:
+    return branch.strip().lower()
+
+
+class CutoffRepository:
+    """
+    read side of the cutoffs/predictions tables. every query selects the plain
+    (campus, branch, marks, year) columns of exactly the rows one command renders, through
+    the composite indexes, so nothing but that slice is ever held in memory.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+
+    def _rows(self, query) -> list[tuple]:
+        with session_scope(self.session_factory) as session:
+            return [tuple(row) for row in session.execute(query)]
+
+    def _scalars(self, query) -> list:
+        with session_scope(self.session_factory) as session:
+            return list(session.scalars(query))
+
+    def campus(self, campus: str) -> list[tuple]:
+        """
+        every year of every branch of one campus, for the campus plot. rows come in the order
+        of the csv files they were ingested from, which is the order the plot colours by.
+        """
+
+        return self._rows(
+            select(Cutoff.campus, Cutoff.branch, Cutoff.marks, Cutoff.year)
+            .where(Cutoff.campus == campus_key(campus))
+            .order_by(Cutoff.year, Cutoff.id)
+        )
+
+    def campus_branch(self, campus: str, branch: str) -> list[tuple]:
+        """
+        every year of one branch at one campus, for the branch plot.
+        """
+
+        return self._rows(
+            select(Cutoff.campus, Cutoff.branch, Cutoff.marks, Cutoff.year)
+            .where(
+                Cutoff.campus == campus_key(campus),
+                Cutoff.branch_key == branch_key(branch),
+            )
+            .order_by(Cutoff.year)
+        )
+
+    def year(self, year: int, campus: str | None = None) -> list[tuple]:
+        """
+        one year's table, optionally of one campus, highest marks first.
+        """
+
+        query = select(Cutoff.campus, Cutoff.branch, Cutoff.marks, Cutoff.year).where(
+            Cutoff.year == year
+        )
+        if campus is not None:
+            query = query.where(Cutoff.campus == campus_key(campus))
+        return self._rows(
+            query.order_by(Cutoff.marks.desc(), Cutoff.campus, Cutoff.branch_key)
+        )
+
+    def years(self) -> list[int]:
+        return self._scalars(select(Cutoff.year).distinct().order_by(Cutoff.year))
+
+    def campuses(self) -> list[str]:
+        return self._scalars(select(Cutoff.campus).distinct().order_by(Cutoff.campus))
+
+    def keys(self) -> list[tuple]:
+        """
+        (campus, branch, year) of every stored cutoff, what a reload has to invalidate.
+        """
+
+        return self._rows(select(Cutoff.campus, Cutoff.branch, Cutoff.year))
+
+    def scenarios(self) -> list[str]:
+        return self._scalars(
+            select(Prediction.scenario).distinct().order_by(Prediction.scenario)
+        )
+
+    def predictions(self, scenario: str, campus: str | None = None) -> list[tuple]:
+        """
+        one scenario's predicted table, optionally of one campus, highest marks first.
+        """
+
+        query = select(
+            Prediction.campus, Prediction.branch, Prediction.marks, Prediction.year
+        ).where(Prediction.scenario == scenario.lower())
+        if campus is not None:
+            query = query.where(Prediction.campus == campus_key(campus))
+        return self._rows(
+            query.order_by(
+                Prediction.marks.desc(), Prediction.campus, Prediction.branch_key
+            )
+        )
+
+    def version(self) -> tuple:
+        """
+        row count & highest id of both tables. an ingest deletes and re-inserts, so ids only
+        grow and any ingest changes this, it's what a reload polls instead of the data.
+        """
+
+        with session_scope(self.session_factory) as session:
+            return tuple(
+                session.execute(
+                    select(
+                        select(func.count(Cutoff.id)).scalar_subquery(),
+                        select(func.max(Cutoff.id)).scalar_subquery(),
+                        select(func.count(Prediction.id)).scalar_subquery(),
+                        select(func.max(Prediction.id)).scalar_subquery(),
+                    )
+                ).one()
+            )
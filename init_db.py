@@ -4,6 +4,12 @@ from database.connection import engine
 
 def init_database():
     Base.metadata.create_all(engine)
+
+    # create_all skips tables that already exist, so indexes added later have to be created by hand
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
     print("all database-tables were created successfully")
 
 
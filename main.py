@@ -3,27 +3,58 @@ from discord.ext import commands, tasks
 import logging
 from dotenv import load_dotenv
 
+import io
+import math
 import os
 import re
 
 from datetime import datetime, time as dt_time, timezone, timedelta
+from time import perf_counter
 import asyncio
 from functools import partial
 
-from services.exam_tracker import ExamTracker
-from services.reminder import Reminder
-import analytics as anal
+from services.exam_tracker import AsyncExamTracker
+from services.reminder import AsyncReminder
+from services.dispatcher import ReminderDispatcher
+from services.render_jobs import (
+    campus_plot_key,
+    branch_plot_key,
+    select_key,
+    predict_key,
+    live_predict_key,
+)
+from services.warmup import warm_renders
+from services.render_service import RenderService
+from services.analytics_service import AnalyticsService
+from services.branches import load_branch_mappings, normalize_branch_name
+from services.arguments import split_difficulty
+from services.url_cache import URL_CACHE, refresh_expiring
+from services.metrics import REGISTRY, start_http_server
+from services.single_flight import SingleFlight
+from services.rate_limit import Cooldowns, rate_limited
+from services import logging_config
+from database.connection import engine, async_engine, pool_stats
 
 load_dotenv()
 
 CAMPUSES = ["pilani", "goa", "hyderabad"]
 
-exam_tracker = ExamTracker()
-reminder_service = Reminder()
+exam_tracker = AsyncExamTracker()
+reminder_service = AsyncReminder()
 
 token = os.getenv("DISCORD_TOKEN")
 
-handler = logging.FileHandler(filename="discord.log", encoding="utf-8", mode="w")
+# optional startup pre-render of every plot/table, WARMUP_CHANNEL_ID additionally pre-uploads them
+WARMUP_RENDERS = os.getenv("WARMUP_RENDERS", "0") == "1"
+WARMUP_CHANNEL_ID = os.getenv("WARMUP_CHANNEL_ID")
+
+# how often the cutoff/prediction csv files are checked for changes
+DATA_RELOAD_SECONDS = int(os.getenv("DATA_RELOAD_SECONDS", "60"))
+# how often cached attachment urls close to expiring are re-signed
+URL_REFRESH_MINUTES = int(os.getenv("URL_REFRESH_MINUTES", "60"))
+
+log = logging.getLogger("bot")
+
 intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
@@ -31,51 +62,201 @@ intents.members = True
 bot = commands.Bot(command_prefix="!!", intents=intents)
 bot.remove_command("help")
 
+reminder_dispatcher = ReminderDispatcher(
+    bot,
+    concurrency=int(os.getenv("REMINDER_CONCURRENCY", "4")),
+    on_delivered=reminder_service.mark_delivered,
+)
+reminder_lock = asyncio.Lock()
+
+render_service = RenderService()
+# identical requests in flight at the same time, keyed by their URL_CACHE key
+render_flight = SingleFlight()
+# token buckets per user & channel for the commands that can render
+cooldowns = Cooldowns()
+reminders_caught_up = False
+
+COMMAND_SECONDS = REGISTRY.histogram(
+    "bot_command_seconds",
+    "seconds spent per command & phase: parse, render, upload, cached (a URL_CACHE hit) and total",
+    ["command", "phase"],
+)
+REMINDER_RUN_SECONDS = REGISTRY.histogram(
+    "bot_reminder_run_seconds",
+    "seconds one reminder pass took, selection through the ledger flush",
+    buckets=(0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0),
+)
+RENDERS_SAVED = REGISTRY.counter(
+    "bot_renders_saved_total",
+    "requests that joined an identical render already in flight instead of starting one",
+)
+UPLOADS_SAVED = REGISTRY.counter(
+    "bot_uploads_saved_total",
+    "requests that reused the attachment url of an identical in-flight request's upload",
+)
+COMMANDS_LIMITED = REGISTRY.counter(
+    "bot_commands_limited_total",
+    "commands turned away by the per user/channel cooldowns",
+    ["command"],
+)
+REMINDERS = REGISTRY.counter(
+    "bot_reminders_total", "reminders handled, by outcome", ["outcome"]
+)
+
+# analytics (pandas/matplotlib & all the csv data) loads in the background after on_ready
+analytics_service = AnalyticsService()
+alias_to_actual, _ = load_branch_mappings("branch_names.txt")
+
+# bumped by every data reload, an upload rendered across a reload is not cached
+data_generation = 0
+
 DISCLAIMER_MSG = "all scores pre-**2022** have been standardized to **390**, so a score in **2021** which may have been **300** becomes **260** in current standards and settings of exam."
 
 IST = timezone(timedelta(hours=5, minutes=30))
+REMINDER_TIME = dt_time(hour=9, minute=0)
+
+
+async def send_cached(ctx, command, cache_key, title, url, disclaimer):
+    start = perf_counter()
+    embed = discord.Embed(title=title)
+    embed.set_image(url=url)
+    await ctx.send(embed=embed)
+    if disclaimer:
+        await ctx.send(DISCLAIMER_MSG)
+    seconds = perf_counter() - start
+    COMMAND_SECONDS.observe(seconds, command=command, phase="cached")
+    log.debug(
+        "cache hit",
+        extra={
+            "command": command,
+            "cache_key": cache_key,
+            "send_ms": round(seconds * 1000, 1),
+        },
+    )
+
+
+async def slow_down(ctx, retry_after):
+    command = ctx.command.qualified_name if ctx.command else "unknown"
+    COMMANDS_LIMITED.inc(command=command)
+    log.info(
+        "cooldown",
+        extra={
+            "command": command,
+            "user_id": ctx.author.id,
+            "channel_id": ctx.channel.id,
+            "retry_after": round(retry_after, 1),
+        },
+    )
+    await ctx.send(
+        f"easy there, that's a lot of requests at once! try again in {math.ceil(retry_after)}s."
+    )
+
+
+async def upload(ctx, command, cache_key, data, filename, disclaimer):
+    """
+    sends the rendered image as a file, returns its attachment url ("" if discord gave none)
+    or None when the upload failed, which the user has been told about.
+    """
+
+    try:
+        file = discord.File(fp=io.BytesIO(data), filename=filename)
+        start = perf_counter()
+        sent_message = await ctx.send(file=file)
+        COMMAND_SECONDS.observe(perf_counter() - start, command=command, phase="upload")
+        if disclaimer:
+            await ctx.send(DISCLAIMER_MSG)
+    except Exception as e:
+        log.exception(
+            "upload failed", extra={"command": command, "cache_key": cache_key}
+        )
+        await ctx.send(f"error uploading: {e}")
+        return None
+
+    return sent_message.attachments[0].url if sent_message.attachments else ""
 
 
 async def display(ctx, cache_key, title, generator_func, filename, disclaimer=True):
     """
     generates a plot/table based on user-req throught generator_func availed in analytics.py, if cache-hit is found it immediately sends the embed of that to user.
+    generator_func is only called (and awaited) on a cache-miss so hits never render anything.
+    identical requests arriving while one renders share that render, and its upload's url.
     disclaimer message is optional.
     """
 
-    cached_url = anal.get_cached_url(cache_key)
+    command = ctx.command.qualified_name if ctx.command else "unknown"
+    invoked_at = getattr(ctx, "invoked_at", None)
+    if invoked_at is not None:
+        COMMAND_SECONDS.observe(
+            perf_counter() - invoked_at, command=command, phase="parse"
+        )
+
+    # the url cache is backed by sqlite, its lookups & writes stay off the event loop
+    loop = asyncio.get_running_loop()
+    cached_url = await loop.run_in_executor(None, URL_CACHE.get, cache_key)
 
     if cached_url:
-        print(f"cache hit: {cache_key}")
-        embed = discord.Embed(title=title)
-        embed.set_image(url=cached_url)
-        await ctx.send(embed=embed)
-        if disclaimer:
-            await ctx.send(DISCLAIMER_MSG)
+        await send_cached(ctx, command, cache_key, title, cached_url, disclaimer)
         return True
 
-    image_buffer = await generator_func
-
-    if image_buffer is None:
-        return None
+    if not analytics_service.is_ready:
+        await ctx.send("still loading the cutoff data, one moment...")
+    await analytics_service.ready()
+
+    async def render_and_upload():
+        # a reload finishing while this renders may have invalidated what comes back
+        generation = data_generation
+        start = perf_counter()
+        image_buffer = await generator_func()
+        render_seconds = perf_counter() - start
+        COMMAND_SECONDS.observe(render_seconds, command=command, phase="render")
+
+        if image_buffer is None:
+            return None, None
+        with image_buffer:
+            data = image_buffer.getvalue()
+
+        url = await upload(ctx, command, cache_key, data, filename, disclaimer)
+        cached = bool(url) and generation == data_generation
+        if cached:
+            await loop.run_in_executor(None, URL_CACHE.set, cache_key, url)
+        log.info(
+            "rendered",
+            extra={
+                "command": command,
+                "cache_key": cache_key,
+                "render_ms": round(render_seconds * 1000, 1),
+                "url_cached": cached,
+            },
+        )
+        return data, url
 
-    try:
-        image_buffer.seek(0)
-        file = discord.File(fp=image_buffer, filename=filename)
-        sent_message = await ctx.send(file=file)
-        if disclaimer:
-            await ctx.send(DISCLAIMER_MSG)
+    # joining an identical render that is already running costs no more than a cache hit.
+    # nothing is awaited between this check and do(), which registers the render before it
+    # first yields, so the check always agrees with the shared flag do() hands back
+    if cache_key not in render_flight:
+        retry_after = cooldowns.charge_render(ctx.author.id, ctx.channel.id)
+        if retry_after:
+            await slow_down(ctx, retry_after)
+            # answered already, True keeps the caller from reporting missing data
+            return True
 
-        if sent_message.attachments:
-            anal.save_url_to_cache(cache_key, sent_message.attachments[0].url)
-            print(f"cached: {cache_key}")
+    (data, url), shared = await render_flight.do(cache_key, render_and_upload)
 
-    except Exception as e:
-        await ctx.send(f"error uploading: {e}")
+    if data is None:
         return None
-    finally:
-        image_buffer.close()
+    if not shared:
+        # this caller's render, the upload above went to its own channel
+        return True if url is not None else None
+
+    RENDERS_SAVED.inc()
+    if url:
+        UPLOADS_SAVED.inc()
+        await send_cached(ctx, command, cache_key, title, url, disclaimer)
+        return True
 
-    return True
+    # the first upload failed or gave no url, the shared render still saves this one a render
+    url = await upload(ctx, command, cache_key, data, filename, disclaimer)
+    return True if url is not None else None
 
 
 def parse_campus(args):
@@ -86,42 +267,36 @@ def parse_campus(args):
     return None, clean_args
 
 
-async def send_dm(user_id, message):
-    try:
-        user = await bot.fetch_user(user_id)
-        await user.send(message)
-        print(f"sent DM fallback to {user.name}")
-    except Exception as e:
-        print(f"failed to DM user {user_id}: {e}")
+async def run_reminders(since=None, until=None):
+    """
+    send whatever reminders are still due today, or from since to until for a catch-up,
+    the delivery ledger makes this safe to run more than once a day.
+    """
+
+    async with reminder_lock:
+        with REMINDER_RUN_SECONDS.time():
+            reminders = await reminder_service.users_to_remind(since, until)
+            try:
+                stats = await reminder_dispatcher.dispatch(reminders)
+            finally:
+                await reminder_service.flush_deliveries()
+
+        outcomes = {
+            outcome: getattr(stats, outcome)
+            for outcome in ("sent", "merged", "dm_fallback", "failed")
+        }
+        for outcome, count in outcomes.items():
+            REMINDERS.inc(count, outcome=outcome)
+        log.info("reminders dispatched", extra=outcomes)
 
 
-@tasks.loop(time=dt_time(hour=9, minute=0, tzinfo=IST))
+@tasks.loop(time=REMINDER_TIME.replace(tzinfo=IST))
 async def send_exam_reminders():
     """
     send daily reminders in the channel where interaction with bot was made.
     """
 
-    reminder_service.reset_daily_tracking()
-    reminders = reminder_service.users_to_remind()
-
-    for reminder in reminders:
-        channel = bot.get_channel(reminder["channel_id"])
-        msg = f"<@{reminder['user_id']}> {reminder['message']}"
-
-        if channel:
-            try:
-                await channel.send(msg)
-                print(
-                    f"sent reminder to user {reminder['user_id']} in channel {channel.name}"
-                )
-            except discord.Forbidden:
-                print(f"no permission in channel {reminder['channel_id']}")
-                await send_dm(reminder["user_id"], reminder["message"])
-            except Exception as e:
-                print(f"failed to send reminder: {e}")
-        else:
-            print(f"channel {reminder['channel_id']} not found")
-            await send_dm(reminder["user_id"], reminder["message"])
+    await run_reminders()
 
 
 @send_exam_reminders.before_loop
@@ -129,14 +304,277 @@ async def before_reminder():
     await bot.wait_until_ready()
 
 
+async def catch_up_reminders():
+    """
+    a restart would otherwise lose every window that came due while the bot was down, so
+    each user gets the nearest one the ledger is missing, today's only once 09:00 IST passed.
+    """
+
+    now = datetime.now(IST)
+    today = now.date()
+    until = today if now.time() >= REMINDER_TIME else today - timedelta(days=1)
+    since = await reminder_service.missed_since(today)
+    if since <= until:
+        await run_reminders(since, until)
+
+
+@tasks.loop(seconds=DATA_RELOAD_SECONDS)
+async def reload_data():
+    """
+    picks up new or regenerated csv files without a restart, only the affected renders and
+    uploads are thrown away.
+    """
+
+    global data_generation
+
+    anal = await analytics_service.ready()
+    loop = asyncio.get_running_loop()
+    change = await loop.run_in_executor(None, anal.reload_changed_data)
+    if change is None:
+        return
+
+    data_generation += 1
+    evicted = await loop.run_in_executor(
+        None, lambda: URL_CACHE.delete(anal.affected_url_keys(change))
+    )
+    log.info(
+        "data reloaded",
+        extra={
+            "campuses": sorted(change.campuses),
+            "scenarios": sorted(change.scenarios),
+            "urls_evicted": evicted,
+        },
+    )
+
+
+@tasks.loop(minutes=10)
+async def cleanup_cooldowns():
+    """
+    forgets the cooldown buckets that have refilled, so idle users don't pile up in memory.
+    """
+
+    dropped = cooldowns.cleanup()
+    if dropped:
+        log.debug("cooldown buckets dropped", extra={"dropped": dropped})
+
+
+async def resolve_urls(urls):
+    """
+    asks discord to re-sign expiring attachment urls, {old url: new url} for the ones it did.
+    """
+
+    data = await bot.http.request(
+        discord.http.Route("POST", "/attachments/refresh-urls"),
+        json={"attachment_urls": urls},
+    )
+    return {item["original"]: item["refreshed"] for item in data["refreshed_urls"]}
+
+
+@tasks.loop(minutes=URL_REFRESH_MINUTES)
+async def refresh_urls():
+    """
+    re-signs the cached urls that would turn into misses before the next pass, so a cached
+    plot keeps being served instead of rendered & uploaded again.
+    """
+
+    within = URL_CACHE.refresh_margin + 2 * URL_REFRESH_MINUTES * 60
+    try:
+        renewed = await refresh_expiring(URL_CACHE, resolve_urls, within)
+    except discord.HTTPException as e:
+        # whatever was not renewed is re-uploaded on its next request, as before
+        log.warning("url refresh failed: %s", e)
+        return
+    if renewed:
+        log.info("urls refreshed", extra={"renewed": renewed})
+
+
+@refresh_urls.before_loop
+async def before_refresh_urls():
+    await bot.wait_until_ready()
+
+
+@reload_data.before_loop
+async def before_reload():
+    await bot.wait_until_ready()
+    await analytics_service.ready()
+
+
+async def warmup():
+    """
+    fills the render caches (and optionally the URL cache) before the first user asks.
+    """
+
+    anal = await analytics_service.ready()
+    channel = bot.get_channel(int(WARMUP_CHANNEL_ID)) if WARMUP_CHANNEL_ID else None
+    loop = asyncio.get_running_loop()
+
+    # jobs go through one at a time, so warmup never holds more than one render worker
+    async def render(job):
+        return await render_service.render(job.func, *job.args)
+
+    async def upload(job, image_buffer):
+        if channel is None or await loop.run_in_executor(None, URL_CACHE.peek, job.key):
+            return False
+        try:
+            image_buffer.seek(0)
+            message = await channel.send(
+                file=discord.File(fp=image_buffer, filename=f"{job.key}.png")
+            )
+        except discord.HTTPException as e:
+            log.warning("warmup upload failed: %s", e, extra={"cache_key": job.key})
+            return False
+        finally:
+            image_buffer.close()
+        if message.attachments:
+            await loop.run_in_executor(
+                None, URL_CACHE.set, job.key, message.attachments[0].url
+            )
+            return True
+        return False
+
+    await warm_renders(anal.render_jobs(), render, upload)
+
+
+@REGISTRY.collector
+def runtime_metrics():
+    """
+    numbers kept by the caches, the render service & the db pools, read at scrape time.
+    """
+
+    caches = render_service.cache_stats()
+    renders = render_service.stats()
+    urls = URL_CACHE.stats()
+    pools = {"sync": pool_stats(engine), "async": pool_stats(async_engine)}
+
+    return [
+        (
+            "bot_render_cache_hits_total",
+            "counter",
+            "in-memory render cache hits, summed over the render workers",
+            [({"cache": name}, info["hits"]) for name, info in caches.items()],
+        ),
+        (
+            "bot_render_cache_misses_total",
+            "counter",
+            "in-memory render cache misses, summed over the render workers",
+            [({"cache": name}, info["misses"]) for name, info in caches.items()],
+        ),
+        ("bot_url_cache_hits_total", "counter", "URL_CACHE hits", [({}, urls["hits"])]),
+        (
+            "bot_url_cache_misses_total",
+            "counter",
+            "URL_CACHE misses, expiring urls included",
+            [({}, urls["misses"])],
+        ),
+        (
+            "bot_url_cache_renewed_total",
+            "counter",
+            "urls re-signed before they expired",
+            [({}, urls["renewed"])],
+        ),
+        (
+            "bot_url_cache_entries",
+            "gauge",
+            "urls in URL_CACHE",
+            [({}, urls["entries"])],
+        ),
+        (
+            "bot_render_in_flight",
+            "gauge",
+            "renders running on the render executor",
+            [({}, renders["in_flight"])],
+        ),
+        (
+            "bot_render_queued",
+            "gauge",
+            "renders waiting for a free render worker",
+            [({}, renders["queued"])],
+        ),
+        (
+            "bot_db_pool_checked_out",
+            "gauge",
+            "connections in use",
+            [({"engine": name}, stats["checked_out"]) for name, stats in pools.items()],
+        ),
+        (
+            "bot_db_pool_peak_checked_out",
+            "gauge",
+            "most connections ever in use at once",
+            [
+                ({"engine": name}, stats["peak_checked_out"])
+                for name, stats in pools.items()
+            ],
+        ),
+        (
+            "bot_db_pool_overflow",
+            "gauge",
+            "connections opened beyond pool_size",
+            [({"engine": name}, stats["overflow"]) for name, stats in pools.items()],
+        ),
+    ]
+
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.invoked_at = perf_counter()
+
+
+@bot.after_invoke
+async def stop_command_timer(ctx):
+    invoked_at = getattr(ctx, "invoked_at", None)
+    if invoked_at is not None and ctx.command:
+        seconds = perf_counter() - invoked_at
+        COMMAND_SECONDS.observe(
+            seconds, command=ctx.command.qualified_name, phase="total"
+        )
+        log.info(
+            "command",
+            extra={
+                "command": ctx.command.qualified_name,
+                "user_id": ctx.author.id,
+                "channel_id": ctx.channel.id,
+                "duration_ms": round(seconds * 1000, 1),
+                "failed": ctx.command_failed,
+            },
+        )
+
+
+async def start_metrics_server():
+    try:
+        runner = await start_http_server()
+    except OSError as e:
+        log.warning("metrics endpoint could not start: %s", e)
+        return
+    if runner:
+        log.info("metrics served on /metrics")
+
+
 @bot.event
 async def on_ready():
-    print("ready when you're")
+    global reminders_caught_up
+
+    log.info("ready when you're")
+    analytics_service.start()
     if not send_exam_reminders.is_running():
         send_exam_reminders.start()
+    if not reload_data.is_running():
+        reload_data.start()
+    if not cleanup_cooldowns.is_running():
+        cleanup_cooldowns.start()
+    if not refresh_urls.is_running():
+        refresh_urls.start()
+
+    # on_ready fires again on every reconnect, the catch-up only needs to happen once
+    if not reminders_caught_up:
+        reminders_caught_up = True
+        asyncio.create_task(catch_up_reminders())
+        asyncio.create_task(start_metrics_server())
+        if WARMUP_RENDERS:
+            asyncio.create_task(warmup())
 
 
 @bot.command(name="plot")
+@rate_limited(cooldowns, slow_down)
 async def plot(ctx, *, args: str = None):
     if not args:
         return await ctx.send("Usage: `!!plot <campus>`")
@@ -146,12 +584,11 @@ async def plot(ctx, *, args: str = None):
     if not campus:
         return await ctx.send("invalid campus. Please use Pilani, Goa, or Hyderabad.")
 
-    loop = asyncio.get_event_loop()
-    generator = loop.run_in_executor(None, partial(anal.plot_marks_by_campus, campus))
+    generator = partial(render_service.render, "plot_marks_by_campus", campus)
 
     result = await display(
         ctx,
-        cache_key=f"plot_{campus}",
+        cache_key=campus_plot_key(campus),
         title=f"{campus.title()} Cutoff Trends",
         generator_func=generator,
         filename=f"{campus}_plot.png",
@@ -162,6 +599,7 @@ async def plot(ctx, *, args: str = None):
 
 
 @bot.command(name="plot-branch")
+@rate_limited(cooldowns, slow_down)
 async def plot_branch(ctx, *, args: str = None):
     if not args:
         return await ctx.send("Usage: `!!plot-branch <branch> <campus>`")
@@ -178,14 +616,13 @@ async def plot_branch(ctx, *, args: str = None):
 
     await ctx.send(f"generating plot for **{branch}** in **{campus.title()}**...")
 
-    loop = asyncio.get_event_loop()
-    generator = loop.run_in_executor(
-        None, partial(anal.plot_marks_by_branch, campus, branch)
-    )
+    generator = partial(render_service.render, "plot_marks_by_branch", campus, branch)
 
     result = await display(
         ctx,
-        cache_key=f"plot_branch_{campus}_{branch}",
+        cache_key=branch_plot_key(
+            campus, normalize_branch_name(branch, alias_to_actual) or branch
+        ),
         title=f"{branch} - {campus.title()}",
         generator_func=generator,
         filename=f"{campus}_{branch}.png",
@@ -196,6 +633,7 @@ async def plot_branch(ctx, *, args: str = None):
 
 
 @bot.command(name="select")
+@rate_limited(cooldowns, slow_down)
 async def select(ctx, *, args: str = None):
     if not args:
         return await ctx.send("usage: `!!select 2024` or `!!select 2024 Pilani`")
@@ -217,14 +655,11 @@ async def select(ctx, *, args: str = None):
         f"fetching **{year}** cutoffs{filter_msg.replace(' - ', ' for ')}..."
     )
 
-    loop = asyncio.get_event_loop()
-    generator = loop.run_in_executor(
-        None, partial(anal.select, limit=25, year=year, campus_filter=campus_title)
-    )
+    generator = partial(render_service.render, "select", 25, year, campus_title)
 
     result = await display(
         ctx,
-        cache_key=f"select_{year}_{campus_title or 'all'}",
+        cache_key=select_key(year, campus_title),
         title=f"{year} Cutoffs{filter_msg}",
         generator_func=generator,
         filename=f"cutoff_{year}.png",
@@ -235,13 +670,17 @@ async def select(ctx, *, args: str = None):
 
 
 @bot.command(name="predict")
+@rate_limited(cooldowns, slow_down)
 async def predict(ctx, *, args: str = None):
     situation = "most-likely"
     campus = None
+    difficulty = None
 
     if args:
         raw_args = args.lower().replace("most likely", "most-likely")
 
+        difficulty, raw_args = split_difficulty(raw_args)
+
         for s in ["worst", "best", "most-likely"]:
             if s in raw_args:
                 situation = s
@@ -251,21 +690,18 @@ async def predict(ctx, *, args: str = None):
         campus = raw_args.replace(",", "").strip() or None
 
     filter_msg = f" - {campus.title()}" if campus else " - All Campuses"
+
+    if difficulty is not None:
+        return await predict_live(ctx, campus, difficulty, filter_msg)
     await ctx.send(
         f"fetching **{situation}** case predictions{filter_msg.replace(' - ', ' for ')}..."
     )
 
-    loop = asyncio.get_event_loop()
-    generator = loop.run_in_executor(
-        None,
-        partial(
-            anal.get_predictions, limit=25, campus_filter=campus, situation=situation
-        ),
-    )
+    generator = partial(render_service.render, "get_predictions", 25, campus, situation)
 
     result = await display(
         ctx,
-        cache_key=f"predict_{situation}_{campus or 'all'}",
+        cache_key=predict_key(situation, campus),
         title=f"{situation.title()} Case Predictions{filter_msg}",
         generator_func=generator,
         filename=f"pred_2026_{situation}.png",
@@ -275,6 +711,31 @@ async def predict(ctx, *, args: str = None):
         await ctx.send("no prediction data found.")
 
 
+async def predict_live(ctx, campus, difficulty, filter_msg):
+    """
+    !!predict with a difficulty coefficient, predicted by the model on the spot.
+    """
+
+    await ctx.send(
+        f"predicting at difficulty **{difficulty:.2f}**{filter_msg.replace(' - ', ' for ')}..."
+    )
+    anal = await analytics_service.ready()
+
+    generator = partial(
+        render_service.render, "get_live_predictions", 25, campus, difficulty
+    )
+    result = await display(
+        ctx,
+        cache_key=live_predict_key(difficulty, campus, anal.live_model_tag()),
+        title=f"Predictions at Difficulty {difficulty:.2f}{filter_msg}",
+        generator_func=generator,
+        filename=f"pred_difficulty_{difficulty:.2f}.png",
+    )
+
+    if result is None:
+        await ctx.send("no prediction data found.")
+
+
 @bot.command()
 async def sy(ctx):
     await ctx.send(
@@ -315,6 +776,71 @@ async def web(ctx):
     await ctx.send("the website: https://bitsat-predictor.com/")
 
 
+def format_stats():
+    """
+    the runtime metrics as a short plain-text report for !!stats.
+    """
+
+    lines = ["commands (count, mean, p95):"]
+    for (command, phase), (count, mean, p95) in sorted(
+        COMMAND_SECONDS.summary().items()
+    ):
+        bound = "inf" if p95 == float("inf") else f"{p95 * 1000:.0f}"
+        lines.append(
+            f"  {command:<12} {phase:<7} {count:>6} {mean * 1000:>8.1f} ms  <={bound} ms"
+        )
+    if len(lines) == 1:
+        lines.append("  nothing yet")
+
+    urls = URL_CACHE.stats()
+    lines.append(
+        f"url cache: {urls['hits']} hits, {urls['misses']} misses "
+        f"({urls['hit_ratio']:.0%}), {urls['entries']} entries, {urls['renewed']} renewed"
+    )
+
+    lines.append("render caches (hits/misses):")
+    for name, info in sorted(render_service.cache_stats().items()):
+        lines.append(f"  {name:<32} {info['hits']}/{info['misses']}")
+
+    renders = render_service.stats()
+    lines.append(
+        f"renders: {renders['in_flight']} in flight, {renders['queued']} queued, "
+        f"{renders['completed']} done on {renders['workers']} workers"
+    )
+    lines.append(
+        f"coalesced: {RENDERS_SAVED.get()} renders & {UPLOADS_SAVED.get()} uploads "
+        f"saved, {len(render_flight)} keys in flight"
+    )
+    lines.append(
+        f"cooldowns: {cooldowns.limited} commands limited, tracking "
+        f"{len(cooldowns.user)} users & {len(cooldowns.channel)} channels"
+    )
+
+    for name, target in (("sync", engine), ("async", async_engine)):
+        pool = pool_stats(target)
+        lines.append(
+            f"db pool {name}: {pool['checked_out']}/{pool['pool_size']} checked out, "
+            f"peak {pool['peak_checked_out']}, overflow {pool['overflow']}"
+        )
+
+    reminder_runs = REMINDER_RUN_SECONDS.summary().get(())
+    if reminder_runs:
+        count, mean, _ = reminder_runs
+        lines.append(f"reminders: {count} passes, {mean:.2f}s on average")
+    else:
+        lines.append("reminders: no pass yet")
+
+    return "\n".join(lines)
+
+
+@bot.command(name="stats")
+@commands.is_owner()
+async def stats(ctx):
+    loop = asyncio.get_running_loop()
+    report = await loop.run_in_executor(None, format_stats)
+    await ctx.send(f"```\n{report}\n```")
+
+
 @bot.command()
 async def time(ctx, flag: str = None, *, date_str: str = None):
     """
@@ -328,7 +854,7 @@ async def time(ctx, flag: str = None, *, date_str: str = None):
 
     try:
         if flag is None:
-            return await ctx.send(exam_tracker.get_countdown(ctx.author.id))
+            return await ctx.send(await exam_tracker.get_countdown(ctx.author.id))
 
         if flag in ["-s", "-set", "--set"]:
             if not date_str:
@@ -338,7 +864,7 @@ async def time(ctx, flag: str = None, *, date_str: str = None):
 
             try:
                 exam_date = datetime.strptime(date_str, "%d-%m-%Y").date()
-                message = exam_tracker.set_exam_date(
+                message = await exam_tracker.set_exam_date(
                     user_id=ctx.author.id,
                     username=str(ctx.author),
                     channel_id=ctx.channel.id,
@@ -351,7 +877,7 @@ async def time(ctx, flag: str = None, *, date_str: str = None):
                 )
 
         elif flag in ["-r", "-reset", "--reset"]:
-            await ctx.send(exam_tracker.reset(ctx.author.id))
+            await ctx.send(await exam_tracker.reset(ctx.author.id))
 
     except Exception as e:
         await ctx.send(f"error: {str(e)}")
@@ -365,8 +891,14 @@ async def on_command_error(ctx, error):
         await ctx.send(
             "invalid argument provided, did you type text instead of a year?"
         )
+    elif isinstance(error, commands.NotOwner):
+        await ctx.send("this command is only for the bot owner.")
     else:
-        print(f"error: {error}")
+        log.error(
+            "command error",
+            exc_info=error,
+            extra={"command": ctx.command.qualified_name if ctx.command else None},
+        )
         await ctx.send("an unexpected error occurred.")
 
 
@@ -388,6 +920,7 @@ This bot helps you get a rough idea of BITSAT exam cutoffs for the upcoming year
 
 - `!!predict [campus-name] [situation]` - shows predictions for 2026 BITSAT exam with different scenarios (worst/best/most-likely)
   Example: `!!predict`, `!!predict Pilani`, `!!predict Pilani worst`
+  or give a difficulty between 0 (easy) and 1 (hard) instead: `!!predict Pilani 0.65`
 
 - `!!da` - get exam-shift dates for both sessions
 
@@ -412,4 +945,13 @@ This bot helps you get a rough idea of BITSAT exam cutoffs for the upcoming year
     await ctx.send(helper)
 
 
-bot.run(token, log_handler=handler, log_level=logging.DEBUG)
+if __name__ == "__main__":
+    # render workers re-import this module, only the real entry point may start the bot
+    log_listener = logging_config.configure()
+    render_service.start()
+    try:
+        # logging is already set up above, discord.py must not add its own handler
+        bot.run(token, log_handler=None)
+    finally:
+        render_service.shutdown()
+        log_listener.stop()
@@ -1,42 +1,239 @@
-import pandas as pd
+"""
+writes the predicted cutoffs for every scenario in one run:
+
+    uv run python predictions.py
+    uv run python predictions.py --scenario worst_case=0.85 --sweep 0 1 0.05
+
+the model is unpickled once and all requested difficulties are stacked into a single frame,
+so the whole run is one transform and one predict.
+"""
+
+import argparse
+import os
 import pickle
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
 
+from services.numpy_model import NumpyModel, source_digest
 
-def predict_cutoffs(year, difficulty, reference_df, output_file="predictions.csv"):
-    with open("models/scaler.pkl", "rb") as f:
+# I'm taking 0.2 -> best case, 0.5 -> most-likely and 0.8 -> worst case
+SCENARIOS = {
+    "best_case": 0.2,
+    "most_likely_case": 0.5,
+    "worst_case": 0.8,
+}
+
+
+def load_model(model_dir="models"):
+    with open(os.path.join(model_dir, "scaler.pkl"), "rb") as f:
         preprocessor = pickle.load(f)
-    with open("models/model.pkl", "rb") as f:
+    with open(os.path.join(model_dir, "model.pkl"), "rb") as f:
         model = pickle.load(f)
+    return preprocessor, model
+
+
+class PickledModel:
+    """
+    the scikit-learn preprocessor + model behind the same predict(frame) as NumpyModel.
+    """
+
+    def __init__(self, preprocessor, model):
+        self.preprocessor = preprocessor
+        self.model = model
+
+    def predict(self, frame):
+        return self.model.predict(self.preprocessor.transform(frame))
+
+
+def load_runtime_model(model_dir="models"):
+    """
+    the exported numpy artifact when it was compiled from the current pickles, so serving
+    never imports scikit-learn, falling back to unpickling them otherwise.
+    """
+
+    artifact = os.path.join(model_dir, "model.npz")
+    if os.path.exists(artifact):
+        runtime = NumpyModel(artifact)
+        if runtime.source == source_digest(model_dir):
+            return runtime
+        print(
+            f"{artifact} is older than the pickles, re-export it with services.numpy_model"
+        )
+    return PickledModel(*load_model(model_dir))
+
+
+def predict_cutoffs(year, difficulties, reference_df, preprocessor, model):
+    """
+    predicted marks of every (campus, branch) in reference_df for each difficulty, stacked one
+    block per difficulty in the order given.
+    """
 
     # since I have dropped newer branches, I could remove this line of code and simply use itertools but this does the job so I'm letting it be.
+    pairs = reference_df[["campus", "branch"]].drop_duplicates()
 
-    prediction_data = reference_df[["campus", "branch"]].drop_duplicates().copy()
-    prediction_data["year"] = year
-    prediction_data["difficulty"] = difficulty
+    stacked = pd.DataFrame(
+        {
+            "campus": np.tile(pairs["campus"].to_numpy(), len(difficulties)),
+            "branch": np.tile(pairs["branch"].to_numpy(), len(difficulties)),
+            "year": year,
+            "difficulty": np.repeat(np.asarray(difficulties, dtype=float), len(pairs)),
+        }
+    )
+
+    stacked["marks"] = (
+        model.predict(preprocessor.transform(stacked)).round().astype(int)
+    )
+    return stacked
 
-    prediction_data_scaled = preprocessor.transform(prediction_data)
-    prediction_data["marks"] = model.predict(prediction_data_scaled).round().astype(int)
 
-    result = prediction_data[["campus", "branch", "marks", "year"]].sort_values(
+def scenario_frame(stacked, difficulty):
+    result = stacked[stacked["difficulty"] == difficulty]
+    return result[["campus", "branch", "marks", "year"]].sort_values(
         "marks", ascending=False
     )
 
-    result.to_csv(output_file, index=False)
-    return result
 
+def quantize_difficulty(difficulty, step=0.01):
+    return round(round(difficulty / step) * step, 6)
 
-# I'm taking 0.2 -> best case, 0.5 -> most-likely and 0.8 -> worst case
 
-# to manipulate
-coefficient_of_difficulty = 0.8
+class LivePredictor:
+    """
+    keeps the runtime model resident for predictions at arbitrary difficulties.
+    the campus x branch grid is built once per reference frame and results are memoized by
+    quantized difficulty, so a repeated difficulty costs a dict lookup.
+    """
+
+    def __init__(self, model_dir="models", step=0.01, memo_size=128):
+        self.model = load_runtime_model(model_dir)
+        self.step = step
+        self.memo_size = memo_size
+        self.grid = None
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+
+    def set_reference(self, reference_df, year):
+        """
+        (re)builds the grid, a no-op when the (campus, branch) pairs and year are unchanged.
+        """
+
+        pairs = reference_df[["campus", "branch"]].drop_duplicates()
+        grid = pairs.assign(year=year).reset_index(drop=True)
+        with self._lock:
+            if self.grid is not None and self.grid.equals(grid):
+                return
+            self.grid = grid
+            self._memo.clear()
+
+    def predict(self, difficulty):
+        """
+        (campus, branch, marks, year) at this difficulty, highest marks first.
+        """
+
+        difficulty = quantize_difficulty(difficulty, self.step)
+        with self._lock:
+            grid = self.grid
+            result = self._memo.get(difficulty)
+            if result is not None:
+                self._memo.move_to_end(difficulty)
+                return result
+
+        frame = grid.assign(difficulty=difficulty)
+        frame["marks"] = self.model.predict(frame).round().astype(int)
+        result = (
+            frame[["campus", "branch", "marks", "year"]]
+            .sort_values("marks", ascending=False)
+            .reset_index(drop=True)
+        )
+
+        with self._lock:
+            # a reference swapped in meanwhile makes this result stale, hand it out but don't keep it
+            if grid is self.grid:
+                self._memo[difficulty] = result
+                while len(self._memo) > self.memo_size:
+                    self._memo.popitem(last=False)
+        return result
+
+
+def _scenario(value):
+    name, _, difficulty = value.partition("=")
+    if not name or not difficulty:
+        raise argparse.ArgumentTypeError(f"expected name=difficulty, got {value!r}")
+    return name, float(difficulty)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--year", type=int, default=2026)
+    parser.add_argument("--reference", default="data/model_data/cutoff_2025.csv")
+    parser.add_argument("--models", default="models")
+    parser.add_argument("--output-dir", default="predict")
+    parser.add_argument(
+        "--scenario",
+        type=_scenario,
+        action="append",
+        metavar="NAME=DIFFICULTY",
+        help="writes <output-dir>/NAME.csv, defaults to best/most-likely/worst case",
+    )
+    parser.add_argument(
+        "--sweep",
+        type=float,
+        nargs=3,
+        metavar=("START", "STOP", "STEP"),
+        help="also write every difficulty in [START, STOP] to one csv",
+    )
+    parser.add_argument("--sweep-output", default="difficulty_sweep.csv")
+    args = parser.parse_args(argv)
+
+    scenarios = dict(args.scenario) if args.scenario else dict(SCENARIOS)
+    sweep = []
+    if args.sweep:
+        start, stop, step = args.sweep
+        sweep = np.round(np.arange(start, stop + step / 2, step), 6).tolist()
+
+    timings = {}
+    clock = time.perf_counter()
+
+    preprocessor, model = load_model(args.models)
+    reference_df = pd.read_csv(args.reference)
+    timings["load"] = time.perf_counter() - clock
+
+    clock = time.perf_counter()
+    difficulties = list(dict.fromkeys([*scenarios.values(), *sweep]))
+    stacked = predict_cutoffs(
+        args.year, difficulties, reference_df, preprocessor, model
+    )
+    timings["predict"] = time.perf_counter() - clock
+
+    clock = time.perf_counter()
+    os.makedirs(args.output_dir, exist_ok=True)
+    for name, difficulty in scenarios.items():
+        path = os.path.join(args.output_dir, f"{name}.csv")
+        scenario_frame(stacked, difficulty).to_csv(path, index=False)
+        print(f"wrote {path} (difficulty {difficulty})")
+
+    if sweep:
+        path = os.path.join(args.output_dir, args.sweep_output)
+        stacked[stacked["difficulty"].isin(sweep)].sort_values(
+            ["difficulty", "marks"], ascending=[True, False]
+        ).to_csv(path, index=False)
+        print(f"wrote {path} ({len(sweep)} difficulties)")
+    timings["write"] = time.perf_counter() - clock
+
+    print(
+        f"{len(stacked)} predictions for {len(difficulties)} difficulties: "
+        + ", ".join(
+            f"{step} {seconds * 1000:.1f} ms" for step, seconds in timings.items()
+        )
+    )
+    return stacked
 
-df = pd.read_csv("data/model_data/cutoff_2025.csv")
-predictions_2026 = predict_cutoffs(
-    year=2026,
-    difficulty=coefficient_of_difficulty,
-    reference_df=df,
-    output_file="predict/worst_case.csv",
-)
-print(predictions_2026)
 
-predictions_2026.to_csv("predict/worst_case.csv", index=False)
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+import asyncio
+import importlib
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+class AnalyticsService:
+    """
+    imports analytics.py (pandas, seaborn, matplotlib, fonts and every csv) on a worker thread
+    instead of at bot import, so the gateway connection never waits for it.
+    anything that needs the module awaits ready(), which also kicks the load off if nothing
+    started it yet.
+    """
+
+    def __init__(self, module_name="analytics"):
+        self.module_name = module_name
+        self.module = None
+        self.load_seconds = None
+        self._task = None
+
+    @property
+    def is_ready(self):
+        return self.module is not None
+
+    def start(self):
+        """
+        begins loading in the background, calling it again is a no-op.
+        """
+
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._load())
+        return self._task
+
+    async def _load(self):
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        try:
+            module = await loop.run_in_executor(
+                None, importlib.import_module, self.module_name
+            )
+        except Exception:
+            # let the next caller try again instead of caching the failure forever
+            self._task = None
+            raise
+
+        self.load_seconds = time.perf_counter() - start
+        self.module = module
+        log.info(
+            "%s ready",
+            self.module_name,
+            extra={"load_seconds": round(self.load_seconds, 2)},
+        )
+        return module
+
+    async def ready(self):
+        if self.module is not None:
+            return self.module
+        # shielded so one cancelled command doesn't cancel the load for everybody else
+        return await asyncio.shield(self.start())
@@ -0,0 +1,20 @@
+import re
+
+# e.g. 0.65 or .65 or 1
+_NUMBER = re.compile(r"\d+(?:\.\d*)?|\.\d+")
+
+
+def split_difficulty(args):
+    """
+    (difficulty, the rest) for `!!predict pilani 0.65`: only a number in [0, 1] as the last
+    argument is a difficulty, anything else (a year, a branch with digits) comes back as
+    (None, args) untouched.
+    """
+
+    head, _, last = args.replace(",", " ").rstrip().rpartition(" ")
+    if not _NUMBER.fullmatch(last):
+        return None, args
+    difficulty = float(last)
+    if not 0 <= difficulty <= 1:
+        return None, args
+    return difficulty, head.rstrip()
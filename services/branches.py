@@ -0,0 +1,29 @@
+import os
+
+
+# branch-aliasing for better ux
+def load_branch_mappings(filepath="branch_names.txt"):
+    alias_to_actual = {}
+    actual_to_alias = {}
+    if not os.path.exists(filepath):
+        return {}, {}
+    with open(filepath, "r") as f:
+        for line in f:
+            line = line.strip()
+            if ":" in line:
+                full_name, alias = line.split(":", 1)
+                full_name = full_name.strip()
+                alias = alias.strip()
+                alias_to_actual[alias.lower()] = full_name
+                actual_to_alias[full_name.lower()] = alias
+    return alias_to_actual, actual_to_alias
+
+
+def normalize_branch_name(user_input, alias_to_full):
+    user_input = user_input.strip().lower()
+    if user_input in alias_to_full:
+        return alias_to_full[user_input]
+    for full_name in alias_to_full.values():
+        if full_name.lower() == user_input:
+            return full_name
+    return None
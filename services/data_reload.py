@@ -0,0 +1,109 @@
+import hashlib
+import os
+from collections import namedtuple
+
+# what a reload touched, campuses/branches are lower-cased so they compare against cache args,
+# branches & campus_years are (campus, branch) and (campus, year) pairs, live_campuses are the
+# campuses whose live predictions moved because the reference rows they are made from did
+DataChange = namedtuple(
+    "DataChange",
+    ["campuses", "branches", "campus_years", "scenarios", "live_campuses"],
+    defaults=(frozenset(),),
+)
+
+
+def _digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FileWatcher:
+    """
+    remembers (mtime, size, content hash) per file, a file only counts as changed when its
+    content hash moved, so touching or re-saving an identical csv doesn't trigger a reload.
+    """
+
+    def __init__(self):
+        self._signatures = {}
+
+    def changes(self, paths):
+        """
+        returns (changed or new paths, removed paths) since the previous call.
+        """
+
+        changed = []
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+
+            previous = self._signatures.get(path)
+            if previous and previous[:2] == (stat.st_mtime_ns, stat.st_size):
+                continue
+
+            digest = _digest(path)
+            self._signatures[path] = (stat.st_mtime_ns, stat.st_size, digest)
+            if not previous or previous[2] != digest:
+                changed.append(path)
+
+        seen = set(paths)
+        removed = [
+            path
+            for path in self._signatures
+            if path not in seen or not os.path.exists(path)
+        ]
+        for path in removed:
+            del self._signatures[path]
+
+        return changed, removed
+
+
+def changed_rows(old, new):
+    """
+    rows present in only one of two versions of a cutoff frame (either may be None).
+    """
+
+    import pandas as pd
+
+    frames = [frame for frame in (old, new) if frame is not None]
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = [
+        c
+        for c in ("campus", "branch", "marks", "year")
+        if c in old.columns and c in new.columns
+    ]
+    merged = pd.merge(
+        old[columns].drop_duplicates(),
+        new[columns].drop_duplicates(),
+        how="outer",
+        indicator=True,
+    )
+    return merged[merged["_merge"] != "both"].drop(columns="_merge")
+
+
+def describe_change(rows, scenarios=()):
+    """
+    DataChange for a frame of changed cutoff rows plus any changed prediction scenarios.
+    """
+
+    import pandas as pd
+
+    # a first load "changes" every row, dedupe before building the sets
+    keys = pd.DataFrame(
+        {
+            "campus": rows["campus"].astype(str).str.lower(),
+            "branch": rows["branch"].astype(str).str.lower(),
+            "year": rows["year"].astype(int),
+        }
+    ).drop_duplicates()
+
+    campus, branch, year = (keys[c].tolist() for c in ("campus", "branch", "year"))
+    return DataChange(
+        set(campus), set(zip(campus, branch)), set(zip(campus, year)), set(scenarios)
+    )
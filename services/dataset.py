@@ -0,0 +1,231 @@
+import sys
+from collections import namedtuple
+from collections.abc import Mapping
+
+import numpy as np
+import pandas as pd
+
+
+class Rows(namedtuple("Rows", ["campus", "branch", "marks", "year"])):
+    """
+    one group of cutoff rows as numpy arrays, views into the dataset so nothing is copied.
+    """
+
+    __slots__ = ()
+
+    def to_frame(self):
+        return pd.DataFrame(self._asdict(), copy=False)
+
+    def tolist(self):
+        # plain python values, the same shape DataFrame.values.tolist() gave the tables
+        return [
+            list(row)
+            for row in zip(
+                self.campus.tolist(),
+                self.branch.tolist(),
+                self.marks.tolist(),
+                self.year.tolist(),
+            )
+        ]
+
+
+def _key(value):
+    return value.strip().lower()
+
+
+class _Ordering:
+    """
+    the dataset sorted one way, with a slice per group for every grouping that is contiguous
+    in that order, so a lookup is a dict hit plus four array slices.
+    """
+
+    def __init__(self, frame, by, ascending, groupings):
+        ordered = frame.sort_values(by, ascending=ascending, kind="mergesort")
+        self.columns = Rows(*(ordered[column].to_numpy() for column in Rows._fields))
+
+        self.indexes = []
+        for grouping in groupings:
+            groups = ordered.reset_index(drop=True).groupby(
+                list(grouping), observed=True, sort=False
+            )
+            self.indexes.append(
+                {
+                    key if isinstance(key, tuple) else (key,): slice(
+                        positions[0], positions[-1] + 1
+                    )
+                    for key, positions in groups.indices.items()
+                }
+            )
+
+    def get(self, index, key):
+        where = self.indexes[index].get(key)
+        if where is None:
+            return None
+        return Rows(*(column[where] for column in self.columns))
+
+    def nbytes(self):
+        # object columns only hold pointers, the strings themselves are shared with the frame
+        total = sum(column.nbytes for column in self.columns)
+        for index in self.indexes:
+            total += sys.getsizeof(index)
+            total += sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in index.items())
+        return total
+
+
+class IndexedDataset:
+    """
+    cutoff rows indexed once at load for the lookups the renders do on every request.
+
+    campus and branch are lower-cased into categoricals a single time here instead of
+    `.str.lower()`-ing the whole column per request, and the rows are kept sorted so that
+    (campus), (campus, branch) and (year, campus) groups are contiguous slices.
+
+    a campus' rows stay in source order, the campus plot colours its branches in the order
+    they first appear.
+    """
+
+    def __init__(self, frame):
+        frame = frame[list(Rows._fields)].copy()
+        frame["campus_key"] = frame["campus"].astype(str).str.strip().str.lower()
+        frame["campus_key"] = frame["campus_key"].astype("category")
+        frame["branch_key"] = frame["branch"].astype(str).str.strip().str.lower()
+        frame["branch_key"] = frame["branch_key"].astype("category")
+        frame["campus"] = frame["campus"].astype(str).str.title()
+        self.frame = frame
+
+        # mergesort is stable, so only the campuses are brought together
+        self._by_campus = _Ordering(frame, ["campus_key"], True, [("campus_key",)])
+        self._by_campus_branch = _Ordering(
+            frame,
+            ["campus_key", "branch_key", "year"],
+            True,
+            [("campus_key", "branch_key")],
+        )
+        # tables list the highest cutoffs first
+        self._by_year_campus = _Ordering(
+            frame,
+            ["year", "campus_key", "marks"],
+            [True, True, False],
+            [("year", "campus_key")],
+        )
+        self._by_year = _Ordering(frame, ["year", "marks"], [True, False], [("year",)])
+
+        self._campuses = sorted(frame["campus_key"].unique().tolist())
+        self._years = sorted(int(year) for year in frame["year"].unique())
+
+    def __len__(self):
+        return len(self.frame)
+
+    def campuses(self):
+        """
+        lower-cased campus names, sorted.
+        """
+
+        return self._campuses
+
+    def years(self):
+        return self._years
+
+    def campus(self, campus):
+        return self._by_campus.get(0, (_key(campus),))
+
+    def campus_branch(self, campus, branch):
+        return self._by_campus_branch.get(0, (_key(campus), _key(branch)))
+
+    def year(self, year, campus=None):
+        """
+        rows of one year, optionally of one campus, sorted by marks from highest.
+        """
+
+        if campus is None:
+            return self._by_year.get(0, (year,))
+        return self._by_year_campus.get(0, (year, _key(campus)))
+
+    def memory_usage(self):
+        """
+        bytes held by the dataset: the categorical frame plus every sorted copy & index.
+        """
+
+        return int(self.frame.memory_usage(deep=True).sum()) + sum(
+            ordering.nbytes()
+            for ordering in (
+                self._by_campus,
+                self._by_campus_branch,
+                self._by_year_campus,
+                self._by_year,
+            )
+        )
+
+
+def _to_rows(records):
+    if not records:
+        return None
+    campus, branch, marks, year = zip(*records)
+    return Rows(
+        np.array(campus, dtype=object),
+        np.array(branch, dtype=object),
+        np.array(marks, dtype=np.int64),
+        np.array(year, dtype=np.int64),
+    )
+
+
+class DatabaseDataset:
+    """
+    the IndexedDataset lookups served from the cutoffs table, each one a single indexed query
+    for exactly its rows, so memory stays flat however much history the table holds.
+    the campus & year lists are read once, a reload builds a new one when the tables change.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._campuses = [campus.lower() for campus in repository.campuses()]
+        self._years = repository.years()
+
+    def campus(self, campus):
+        return _to_rows(self.repository.campus(campus))
+
+    def campus_branch(self, campus, branch):
+        return _to_rows(self.repository.campus_branch(campus, branch))
+
+    def year(self, year, campus=None):
+        return _to_rows(self.repository.year(year, campus))
+
+    def campuses(self):
+        return self._campuses
+
+    def years(self):
+        return self._years
+
+
+class DatabasePredictions(Mapping):
+    """
+    scenario -> predicted cutoff frame, read from the predictions table on access.
+    """
+
+    def __init__(self, repository):
+        self.repository = repository
+        self._scenarios = repository.scenarios()
+
+    def __getitem__(self, scenario):
+        return self.campus(scenario, None)
+
+    def campus(self, scenario, campus):
+        """
+        one scenario's frame, only the rows of campus unless it is None, filtered by the query.
+        """
+
+        if scenario not in self._scenarios:
+            raise KeyError(scenario)
+        return pd.DataFrame(
+            self.repository.predictions(scenario, campus), columns=list(Rows._fields)
+        )
+
+    def __contains__(self, scenario):
+        # Mapping's default would read the whole scenario just to answer this
+        return scenario in self._scenarios
+
+    def __iter__(self):
+        return iter(self._scenarios)
+
+    def __len__(self):
+        return len(self._scenarios)
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+
+import aiohttp
+import discord
+
+log = logging.getLogger(__name__)
+
+# discord rejects messages longer than this
+MESSAGE_LIMIT = 2000
+
+# a rejected request or a dropped connection fails one send, the run carries on
+SEND_ERRORS = (discord.HTTPException, aiohttp.ClientError, OSError)
+
+
+@dataclass
+class DispatchStats:
+    sent: int = 0
+    merged: int = 0
+    dm_fallback: int = 0
+    failed: int = 0
+
+    def __str__(self):
+        return f"sent={self.sent} merged={self.merged} dm_fallback={self.dm_fallback} failed={self.failed}"
+
+
+def _format(reminder):
+    return f"<@{reminder['user_id']}> {reminder['message']}"
+
+
+def merge_reminders(reminders, limit=MESSAGE_LIMIT):
+    """
+    packs reminders for one channel into as few messages as fit under the length limit,
+    returns (text, reminders-in-that-text) pairs.
+    """
+
+    batches = []
+    text, batch = "", []
+
+    for reminder in reminders:
+        line = _format(reminder)
+        candidate = f"{text}\n\n{line}" if text else line
+
+        if batch and len(candidate) > limit:
+            batches.append((text, batch))
+            text, batch = line, [reminder]
+        else:
+            text = candidate
+            batch.append(reminder)
+
+    if batch:
+        batches.append((text, batch))
+    return batches
+
+
+class ReminderDispatcher:
+    """
+    sends the daily reminders through a bounded pool of workers.
+    a channel is only ever handled by one worker, so no two sends race inside the same
+    per-channel rate-limit bucket while different channels go out in parallel.
+    """
+
+    def __init__(self, bot, concurrency=4, on_delivered=None):
+        # zero workers would send nothing while the ledger still marks the day as done
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        self.bot = bot
+        self.concurrency = concurrency
+        # awaited with every group of reminders that made it out, e.g. to fill the ledger
+        self.on_delivered = on_delivered
+
+    async def dispatch(self, reminders):
+        stats = DispatchStats()
+        by_channel = {}
+        for reminder in reminders:
+            by_channel.setdefault(reminder["channel_id"], []).append(reminder)
+
+        queue = asyncio.Queue()
+        for item in by_channel.items():
+            queue.put_nowait(item)
+
+        workers = [
+            asyncio.create_task(self._worker(queue, stats))
+            for _ in range(min(self.concurrency, len(by_channel)))
+        ]
+        await asyncio.gather(*workers)
+        return stats
+
+    async def _worker(self, queue, stats):
+        while not queue.empty():
+            channel_id, reminders = queue.get_nowait()
+            await self._send_to_channel(channel_id, reminders, stats)
+
+    async def _send_to_channel(self, channel_id, reminders, stats):
+        channel = self.bot.get_channel(channel_id)
+
+        if channel is None:
+            log.warning(
+                "channel not found, falling back to DMs",
+                extra={"channel_id": channel_id},
+            )
+            for reminder in reminders:
+                await self._send_dm(reminder, stats)
+            return
+
+        batches = merge_reminders(reminders)
+        for position, (text, batch) in enumerate(batches):
+            try:
+                await channel.send(text)
+            except discord.Forbidden:
+                # no permission here means every remaining batch would fail the same way
+                log.warning(
+                    "no permission in channel, falling back to DMs",
+                    extra={"channel_id": channel_id},
+                )
+                for _, pending in batches[position:]:
+                    for reminder in pending:
+                        await self._send_dm(reminder, stats)
+                return
+            except SEND_ERRORS as e:
+                log.warning(
+                    "failed to send reminders: %s",
+                    e,
+                    extra={"channel_id": channel_id, "reminders": len(batch)},
+                )
+                stats.failed += len(batch)
+                continue
+
+            stats.sent += 1
+            stats.merged += len(batch) - 1
+            await self._delivered(batch)
+
+    async def _send_dm(self, reminder, stats):
+        user_id = reminder["user_id"]
+        try:
+            # the member cache is filled by the gateway, only hit REST when it misses
+            user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+            await user.send(reminder["message"])
+        except SEND_ERRORS as e:
+            log.warning("failed to DM reminder: %s", e, extra={"user_id": user_id})
+            stats.failed += 1
+            return
+
+        stats.dm_fallback += 1
+        await self._delivered([reminder])
+
+    async def _delivered(self, reminders):
+        if self.on_delivered:
+            await self.on_delivered(reminders)
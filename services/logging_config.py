@@ -0,0 +1,197 @@
+"""
+logging for the bot: whoever logs only puts the record on a queue, a QueueListener thread
+formats it and writes it to a size-rotated json-lines file and the console, so neither the
+event loop nor a render thread ever waits on disk.
+
+records carry their context as extra fields, e.g.
+    log.info("rendered", extra={"command": "plot", "cache_key": key, "render_ms": 310.2})
+"""
+
+import itertools
+import json
+import logging
+import logging.handlers
+import os
+import queue
+
+LOG_PATH = os.getenv("LOG_PATH", os.path.join("logs", "bot.log"))
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# per logger levels on top of LOG_LEVEL, e.g. "discord=INFO,discord.gateway=DEBUG,bot=DEBUG"
+LOG_LEVELS = os.getenv("LOG_LEVELS", "discord=INFO")
+LOG_MAX_BYTES = int(float(os.getenv("LOG_MAX_MB", "10")) * 1024 * 1024)
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+# keep 1 in N debug records of the chatty discord loggers, 0 drops all of them
+LOG_DEBUG_SAMPLE = int(os.getenv("LOG_DEBUG_SAMPLE", "100"))
+
+# every gateway event & http request is a debug record in these
+SAMPLED_LOGGERS = ("discord.gateway", "discord.client", "discord.state", "discord.http")
+
+# attributes every LogRecord has, anything else on a record came in through extra=
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {
+    "message",
+    "asctime",
+    "taskName",
+}
+
+
+def parse_levels(spec):
+    """
+    "name=LEVEL,name=LEVEL" -> {name: levelno}, raises ValueError on an unknown level.
+    """
+
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levelno = logging.getLevelName(level.strip().upper())
+        if not name.strip() or not isinstance(levelno, int):
+            raise ValueError(f"expected logger=LEVEL, got {item!r}")
+        levels[name.strip()] = levelno
+    return levels
+
+
+def extra_fields(record):
+    return {
+        key: value for key, value in vars(record).items() if key not in _RECORD_FIELDS
+    }
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    one json object per line: time, level, logger, message and every extra field.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        entry.update(extra_fields(record))
+        if record.exc_info:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """
+    the usual single line, with the extra fields appended as key=value.
+    """
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record):
+        line = super().format(record)
+        extra = extra_fields(record)
+        if not extra:
+            return line
+        first, newline, rest = line.partition("\n")
+        fields = " ".join(f"{key}={value}" for key, value in extra.items())
+        return f"{first} {fields}{newline}{rest}"
+
+
+class SampleFilter(logging.Filter):
+    """
+    of the records at or below level from the given loggers (and their children) only one
+    in every passes, everything else passes untouched.
+    """
+
+    def __init__(self, every, loggers=SAMPLED_LOGGERS, level=logging.DEBUG):
+        super().__init__()
+        self.every = every
+        self.loggers = tuple(loggers)
+        self.level = level
+        self._seen = itertools.count()
+
+    def filter(self, record):
+        if record.levelno > self.level or not any(
+            record.name == name or record.name.startswith(f"{name}.")
+            for name in self.loggers
+        ):
+            return True
+        if self.every <= 0:
+            return False
+        return next(self._seen) % self.every == 0
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record):
+        # args & tracebacks may not survive the trip to the listener thread, so they are
+        # rendered here, but the traceback stays apart from the message unlike the default
+        record = logging.makeLogRecord(vars(record))
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def _apply_levels(level, levels):
+    logging.getLogger().setLevel(level.upper() if isinstance(level, str) else level)
+    for name, levelno in parse_levels(levels).items():
+        logging.getLogger(name).setLevel(levelno)
+
+
+def configure(
+    path=LOG_PATH,
+    level=LOG_LEVEL,
+    levels=LOG_LEVELS,
+    max_bytes=LOG_MAX_BYTES,
+    backups=LOG_BACKUPS,
+    sample_every=LOG_DEBUG_SAMPLE,
+    console=True,
+):
+    """
+    routes every logger through a queue to the rotating file at path (none if empty) and the
+    console. returns the started QueueListener, stop() it on shutdown to flush the queue.
+    """
+
+    handlers = []
+    if path:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+        file_handler.setFormatter(JSONFormatter())
+        handlers.append(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(ConsoleFormatter())
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    # sampled before the record is queued, a dropped one costs nothing further
+    queue_handler.addFilter(SampleFilter(sample_every))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    _apply_levels(level, levels)
+
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    return listener
+
+
+def configure_worker(level=LOG_LEVEL, levels=LOG_LEVELS):
+    """
+    for render worker processes: a forked worker inherits the queue handler but not the
+    listener thread draining it, and must not share the rotating file with the bot process,
+    so it writes its (rare) records straight to stderr.
+    """
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler()
+    handler.setFormatter(ConsoleFormatter())
+    root.addHandler(handler)
+    _apply_levels(level, levels)
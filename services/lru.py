@@ -0,0 +1,66 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+
+
+def evictable_lru_cache(maxsize=128):
+    """
+    functools.lru_cache for positional args that can also drop just the entries matching a
+    predicate, so a data reload only throws away what it actually changed.
+    a value computed while an eviction happened is returned but not stored, since it may
+    have been built from the data that was just replaced.
+    """
+
+    def decorator(func):
+        cache = OrderedDict()
+        lock = threading.Lock()
+        state = {"generation": 0, "hits": 0, "misses": 0}
+
+        @wraps(func)
+        def wrapper(*args):
+            with lock:
+                if args in cache:
+                    cache.move_to_end(args)
+                    state["hits"] += 1
+                    return cache[args]
+                state["misses"] += 1
+                generation = state["generation"]
+
+            value = func(*args)
+
+            with lock:
+                if generation == state["generation"]:
+                    cache[args] = value
+                    cache.move_to_end(args)
+                    while len(cache) > maxsize:
+                        cache.popitem(last=False)
+            return value
+
+        def evict(predicate):
+            with lock:
+                stale = [args for args in cache if predicate(*args)]
+                for args in stale:
+                    del cache[args]
+                state["generation"] += 1
+            return len(stale)
+
+        def cache_clear():
+            with lock:
+                cache.clear()
+                state["generation"] += 1
+
+        def cache_info():
+            with lock:
+                return {
+                    "hits": state["hits"],
+                    "misses": state["misses"],
+                    "size": len(cache),
+                    "maxsize": maxsize,
+                }
+
+        wrapper.evict = evict
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        return wrapper
+
+    return decorator
@@ -0,0 +1,284 @@
+"""
+in-process metrics: counters, gauges and histograms in one registry, rendered as prometheus
+text for the local /metrics endpoint and summarized for !!stats.
+
+values that already live elsewhere (cache hit counts, pool usage, executor depth) are not
+copied on every change, a collector reads them when the registry is scraped.
+"""
+
+import asyncio
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+log = logging.getLogger(__name__)
+
+# seconds, from a warm cache hit up to a cold render on a busy worker
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# empty or 0 leaves the http endpoint off
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0") or 0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _label_key(labelnames, labels):
+    if set(labels) != set(labelnames):
+        raise ValueError(f"expected labels {labelnames}, got {sorted(labels)}")
+    return tuple(str(labels[name]) for name in labelnames)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in pairs
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def samples(self):
+        with self._lock:
+            return [
+                (self.name, values, value)
+                for values, value in sorted(self._values.items())
+            ]
+
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(_label_key(self.labelnames, labels), 0)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    """
+    bucketed durations per label set, cheap enough to observe on every command.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = _label_key(self.labelnames, labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "counts": [0] * (len(self.buckets) + 1),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            state["counts"][bisect.bisect_left(self.buckets, value)] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for values, state in sorted(self._values.items()):
+                cumulative = 0
+                for bound, count in zip((*self.buckets, float("inf")), state["counts"]):
+                    cumulative += count
+                    samples.append(
+                        (
+                            f"{self.name}_bucket",
+                            values,
+                            cumulative,
+                            (("le", _format_value(float(bound))),),
+                        )
+                    )
+                samples.append((f"{self.name}_sum", values, state["sum"]))
+                samples.append((f"{self.name}_count", values, state["count"]))
+        return samples
+
+    def summary(self):
+        """
+        label values -> (count, mean, approximate p95) in seconds, p95 being the upper bound
+        of the bucket the 95th percentile falls in.
+        """
+
+        result = {}
+        with self._lock:
+            for values, state in self._values.items():
+                count = state["count"]
+                target, cumulative, p95 = 0.95 * count, 0, float("inf")
+                for bound, bucket in zip(self.buckets, state["counts"]):
+                    cumulative += bucket
+                    if cumulative >= target:
+                        p95 = bound
+                        break
+                result[values] = (count, state["sum"] / count, p95)
+        return result
+
+
+class Registry:
+    """
+    every metric of the process by name, plus collectors called at scrape time which return
+    (name, kind, help, [(labels dict, value), ...]) families.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, cls, name, help, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} is already registered differently")
+            return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self._get_or_create(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._get_or_create(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+    def collector(self, func):
+        """
+        registers func as a collector, usable as a decorator.
+        """
+
+        with self._lock:
+            self._collectors.append(func)
+        return func
+
+    def collect(self):
+        """
+        families from collectors, a collector that fails is skipped rather than breaking
+        the whole scrape.
+        """
+
+        with self._lock:
+            collectors = list(self._collectors)
+
+        families = []
+        for collector in collectors:
+            try:
+                families.extend(collector())
+            except Exception:
+                log.exception(
+                    "metrics collector failed", extra={"collector": collector.__name__}
+                )
+        return families
+
+    def render(self):
+        """
+        everything in the prometheus text exposition format.
+        """
+
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, values, value, *extra in metric.samples():
+                labels = _format_labels(
+                    metric.labelnames, values, extra[0] if extra else ()
+                )
+                lines.append(f"{name}{labels} {_format_value(value)}")
+
+        for name, kind, help, samples in self.collect():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = _format_labels(
+                    tuple(labels), tuple(str(v) for v in labels.values())
+                )
+                lines.append(f"{name}{label_text} {_format_value(value)}")
+
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+async def start_http_server(registry=REGISTRY, host=METRICS_HOST, port=METRICS_PORT):
+    """
+    serves GET /metrics on host:port from the running event loop, returns the aiohttp runner
+    to clean up with, None if port is 0.
+    """
+
+    if not port:
+        return None
+
+    from aiohttp import web
+
+    async def metrics(request):
+        # collectors may wait on a cache lock held across sqlite I/O, so not on the loop
+        loop = asyncio.get_running_loop()
+        body = await loop.run_in_executor(None, registry.render)
+        return web.Response(body=body.encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    app = web.Application()
+    app.router.add_get("/metrics", metrics)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
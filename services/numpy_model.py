@@ -0,0 +1,164 @@
+"""
+the fitted cutoff model compiled into plain arrays, so serving it needs neither scikit-learn
+nor unpickling: category vocabularies, scaler means/scales, the polynomial term index and the
+regression coefficients in one .npz.
+
+    uv run python -m services.numpy_model    # models/*.pkl -> models/model.npz
+"""
+
+import hashlib
+import os
+
+import numpy as np
+
+FORMAT_VERSION = 1
+SOURCE_FILES = ("scaler.pkl", "model.pkl")
+
+
+def source_digest(model_dir="models"):
+    """
+    hash of the pickles an artifact was compiled from, to tell a stale export apart.
+    """
+
+    digest = hashlib.sha256()
+    for name in SOURCE_FILES:
+        with open(os.path.join(model_dir, name), "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def export_model(preprocessor, model, path, source=""):
+    """
+    compiles a fitted ColumnTransformer(OneHotEncoder, StandardScaler) and a
+    Pipeline(PolynomialFeatures, LinearRegression) into a .npz at path.
+    """
+
+    transformers = {
+        name: (step, columns) for name, step, columns in preprocessor.transformers_
+    }
+    # NumpyModel.transform lays out the one-hot blocks before the scaled columns, a
+    # preprocessor emitting them the other way round would be silently mispredicted
+    order = [name for name in transformers if name != "remainder"]
+    if order != ["cat", "num"] or preprocessor.remainder != "drop":
+        raise ValueError(
+            f"unsupported preprocessor layout: {preprocessor.transformers_}"
+        )
+
+    encoder, categorical = transformers["cat"]
+    scaler, numeric = transformers["num"]
+    if encoder.drop is not None or encoder.handle_unknown != "ignore":
+        raise ValueError(
+            "only OneHotEncoder(drop=None, handle_unknown='ignore') is supported"
+        )
+
+    poly, regressor = (step for _, step in model.steps)
+    if poly.include_bias or regressor.coef_.ndim != 1:
+        raise ValueError(
+            "expected PolynomialFeatures(include_bias=False) + 1-d LinearRegression"
+        )
+
+    # each output term as the input columns it multiplies, padded with -1 which maps to a
+    # constant column of ones, e.g. x3 -> [3, -1], x3^2 -> [3, 3], x3*x7 -> [3, 7]
+    powers = poly.powers_
+    terms = np.full((len(powers), int(powers.sum(axis=1).max())), -1, dtype=np.int32)
+    for row, term in enumerate(powers):
+        columns = np.repeat(np.arange(len(term)), term)
+        terms[row, : len(columns)] = columns
+
+    n_features = sum(len(c) for c in encoder.categories_) + len(numeric)
+    arrays = {
+        "version": np.array(FORMAT_VERSION),
+        "source": np.array(source),
+        "categorical_columns": np.array(categorical, dtype=str),
+        "numeric_columns": np.array(numeric, dtype=str),
+        "mean": np.asarray(
+            scaler.mean_ if scaler.with_mean else np.zeros(len(numeric)), dtype=float
+        ),
+        "scale": np.asarray(
+            scaler.scale_ if scaler.with_std else np.ones(len(numeric)), dtype=float
+        ),
+        "terms": terms,
+        "n_features": np.array(n_features),
+        "coef": np.asarray(regressor.coef_, dtype=float),
+        "intercept": np.array(float(regressor.intercept_)),
+    }
+    for position, categories in enumerate(encoder.categories_):
+        arrays[f"categories_{position}"] = np.asarray(categories, dtype=str)
+
+    np.savez(path, **arrays)
+
+
+class NumpyModel:
+    """
+    reproduces preprocessor.transform + model.predict with nothing but numpy.
+    """
+
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as artifact:
+            if int(artifact["version"]) != FORMAT_VERSION:
+                raise ValueError(f"{path} is format {int(artifact['version'])}")
+
+            self.source = str(artifact["source"])
+            self.categorical_columns = artifact["categorical_columns"].tolist()
+            self.numeric_columns = artifact["numeric_columns"].tolist()
+            self.categories = [
+                artifact[f"categories_{i}"]
+                for i in range(len(self.categorical_columns))
+            ]
+            self.mean = artifact["mean"]
+            self.scale = artifact["scale"]
+            self.terms = artifact["terms"]
+            self.n_features = int(artifact["n_features"])
+            self.coef = artifact["coef"]
+            self.intercept = float(artifact["intercept"])
+
+    def transform(self, frame):
+        """
+        dense feature matrix, one extra trailing column of ones for the padded term indexes.
+        """
+
+        rows = len(frame)
+        features = np.zeros((rows, self.n_features + 1))
+        features[:, -1] = 1.0
+
+        offset = 0
+        for column, categories in zip(self.categorical_columns, self.categories):
+            values = np.asarray(frame[column], dtype=str)
+            positions = np.searchsorted(categories, values)
+            positions = np.minimum(positions, len(categories) - 1)
+            # unseen categories leave their whole block at zero, like handle_unknown="ignore"
+            known = categories[positions] == values
+            features[np.flatnonzero(known), offset + positions[known]] = 1.0
+            offset += len(categories)
+
+        for column, mean, scale in zip(self.numeric_columns, self.mean, self.scale):
+            features[:, offset] = (
+                np.asarray(frame[column], dtype=float) - mean
+            ) / scale
+            offset += 1
+
+        return features
+
+    def predict(self, frame):
+        features = self.transform(frame)
+        polynomial = features[:, self.terms].prod(axis=2)
+        return polynomial @ self.coef + self.intercept
+
+
+if __name__ == "__main__":
+    import argparse
+    import pickle
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--models", default="models")
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    with open(os.path.join(args.models, "scaler.pkl"), "rb") as f:
+        preprocessor = pickle.load(f)
+    with open(os.path.join(args.models, "model.pkl"), "rb") as f:
+        model = pickle.load(f)
+
+    output = args.output or os.path.join(args.models, "model.npz")
+    export_model(preprocessor, model, output, source=source_digest(args.models))
+    print(f"wrote {output} ({os.path.getsize(output) / 1024:.1f} KiB)")
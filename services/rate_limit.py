@@ -0,0 +1,144 @@
+"""
+token-bucket cooldowns for the commands that can render: every user and every channel has a
+bucket that refills at a steady rate, a command served from cache costs little and a cold
+render costs more, so one person can't keep the render workers busy for everyone else.
+"""
+
+import os
+import time
+from functools import wraps
+
+# a user can burst this many tokens, then gets USER_PER_MINUTE back each minute
+USER_BURST = float(os.getenv("COOLDOWN_USER_BURST", "12"))
+USER_PER_MINUTE = float(os.getenv("COOLDOWN_USER_PER_MINUTE", "6"))
+CHANNEL_BURST = float(os.getenv("COOLDOWN_CHANNEL_BURST", "40"))
+CHANNEL_PER_MINUTE = float(os.getenv("COOLDOWN_CHANNEL_PER_MINUTE", "20"))
+HIT_COST = float(os.getenv("COOLDOWN_HIT_COST", "1"))
+RENDER_COST = float(os.getenv("COOLDOWN_RENDER_COST", "4"))
+
+
+class TokenBucketLimiter:
+    """
+    one bucket per key holding up to capacity tokens and refilling rate tokens a second.
+    a key starts with a full bucket, which is also why a bucket that refilled completely can be
+    forgotten without changing anything.
+    """
+
+    def __init__(self, capacity, rate, clock=time.monotonic):
+        if capacity <= 0 or rate <= 0:
+            raise ValueError("capacity and rate must be positive")
+        self.capacity = capacity
+        self.rate = rate
+        self.clock = clock
+        # key -> (tokens, when they were counted)
+        self._buckets = {}
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def tokens(self, key, now=None):
+        now = self.clock() if now is None else now
+        tokens, updated = self._buckets.get(key, (self.capacity, now))
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def retry_after(self, key, cost, now=None):
+        """
+        seconds until key can pay cost, 0 if it can right now.
+        """
+
+        if cost > self.capacity:
+            raise ValueError(f"cost {cost} is above the capacity {self.capacity}")
+        missing = cost - self.tokens(key, now)
+        return max(0.0, missing / self.rate)
+
+    def consume(self, key, cost, now=None):
+        now = self.clock() if now is None else now
+        self._buckets[key] = (self.tokens(key, now) - cost, now)
+
+    def cleanup(self, now=None):
+        """
+        forgets every bucket that is full again, returns how many were dropped.
+        """
+
+        now = self.clock() if now is None else now
+        full = [key for key in self._buckets if self.tokens(key, now) >= self.capacity]
+        for key in full:
+            del self._buckets[key]
+        return len(full)
+
+
+class Cooldowns:
+    """
+    a user bucket and a channel bucket, a command goes through only if both can pay for it.
+    """
+
+    def __init__(
+        self,
+        user=None,
+        channel=None,
+        hit_cost=HIT_COST,
+        render_cost=RENDER_COST,
+        clock=time.monotonic,
+    ):
+        # an empty limiter is falsy through __len__, so no `or` here
+        if user is None:
+            user = TokenBucketLimiter(USER_BURST, USER_PER_MINUTE / 60, clock)
+        if channel is None:
+            channel = TokenBucketLimiter(CHANNEL_BURST, CHANNEL_PER_MINUTE / 60, clock)
+        self.user = user
+        self.channel = channel
+        if render_cost < hit_cost:
+            raise ValueError("a render can't cost less than a cache hit")
+        self.hit_cost = hit_cost
+        self.render_cost = render_cost
+        self.clock = clock
+        self.limited = 0
+
+    def charge(self, user_id, channel_id, cost):
+        """
+        takes cost from both buckets and returns 0, or takes nothing and returns the seconds
+        until both could pay.
+        """
+
+        now = self.clock()
+        retry_after = max(
+            self.user.retry_after(user_id, cost, now),
+            self.channel.retry_after(channel_id, cost, now),
+        )
+        if retry_after:
+            self.limited += 1
+            return retry_after
+        self.user.consume(user_id, cost, now)
+        self.channel.consume(channel_id, cost, now)
+        return 0.0
+
+    def charge_render(self, user_id, channel_id):
+        """
+        the rest of a cold render's cost, on top of the hit cost paid when the command began.
+        """
+
+        return self.charge(user_id, channel_id, self.render_cost - self.hit_cost)
+
+    def cleanup(self):
+        return self.user.cleanup() + self.channel.cleanup()
+
+
+def rate_limited(cooldowns, on_limited):
+    """
+    command decorator: charges the hit cost to the invoking user & channel before the command
+    runs, or awaits on_limited(ctx, retry_after) instead of running it.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(ctx, *args, **kwargs):
+            retry_after = cooldowns.charge(
+                ctx.author.id, ctx.channel.id, cooldowns.hit_cost
+            )
+            if retry_after:
+                return await on_limited(ctx, retry_after)
+            return await func(ctx, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
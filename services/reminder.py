@@ -1,62 +1,179 @@
-from datetime import date
-from database.repository import ExamRepository
+from datetime import date, datetime, timedelta, UTC
+from database.connection import run_sync
+from database.repository import AsyncExamRepository
 
+# days before the exam on which a reminder goes out
+REMINDER_WINDOWS = (30, 7, 6, 5, 4, 3, 2, 1, 0)
 
-class Reminder:
+# ledger rows buffered before they are written in one multi-row insert
+DELIVERY_FLUSH_SIZE = 100
+
+# how many days back a startup catch-up looks for windows missed while the bot was down
+CATCH_UP_DAYS = 7
+
+
+def _reminder_message(exam_date: date, days_until: int):
+    if days_until == 30:
+        return f"**30 Days Until BITSAT**\nExam: {exam_date.strftime('%d %B %Y')}\nOne month to go"
+
+    elif days_until == 7:
+        return f"**1 Week Until BITSAT!**\nExam: {exam_date.strftime('%d %B %Y')}\nFinal week"
+
+    elif 1 <= days_until <= 6:
+        if days_until == 1:
+            return f"**Tomorrow is BITSAT!**\n{exam_date.strftime('%d %B %Y')}\nGet good sleep for tomorrow"
+        else:
+            return f"**{days_until} Days Until BITSAT**\n{exam_date.strftime('%d %B %Y')}\nPlease close discord & study for your own sake"
+    elif days_until == 0:
+        return f"**TODAY IS THE DAY!**\nBITSAT: {exam_date.strftime('%d %B %Y')}\nGood luck Soldier"
+    return None
+
+
+def _late_message(exam_date: date, days_until: int):
+    # a window caught up after it passed, worded for the days actually left
+    return (
+        _reminder_message(exam_date, days_until)
+        or f"**{days_until} Days Until BITSAT**\nExam: {exam_date.strftime('%d %B %Y')}"
+    )
+
+
+def _reminder_dates(since: date, until: date):
+    days = range((until - since).days + 1)
+    return sorted(
+        {
+            since + timedelta(days=day + window)
+            for day in days
+            for window in REMINDER_WINDOWS
+        }
+    )
+
+
+def _due_window(exam_date: date, since: date, until: date):
+    # the latest window that came due between since and until, it supersedes older ones
+    due = [
+        window
+        for window in REMINDER_WINDOWS
+        if since <= exam_date - timedelta(days=window) <= until
+    ]
+    return min(due, default=None)
+
+
+def _build_reminder(user_exam, today: date, delivered: set, since: date, until: date):
+    # windows up to today count, so one the daily run is about to send isn't caught up too
+    window_days = _due_window(user_exam.exam_date, since, today)
+    if window_days is None:
+        return None
+    if user_exam.exam_date - timedelta(days=window_days) > until:
+        return None
+
+    # if the ledger says it was already sent, don't send again :p
+    if (user_exam.user_id, user_exam.exam_date, window_days) in delivered:
+        return None
+
+    days_until = (user_exam.exam_date - today).days
+    if days_until == window_days:
+        message = _reminder_message(user_exam.exam_date, window_days)
+    elif days_until >= 0:
+        message = _late_message(user_exam.exam_date, days_until)
+    else:
+        message = None
+    if not message:
+        return None
+
+    return {
+        "user_id": user_exam.user_id,
+        "message": message,
+        "channel_id": user_exam.channel_id,
+        "exam_date": user_exam.exam_date,
+        "window_days": window_days,
+    }
+
+
+def _delivery_row(reminder, delivered_at):
+    return {
+        "user_id": reminder["user_id"],
+        "exam_date": reminder["exam_date"],
+        "window_days": reminder["window_days"],
+        "channel_id": reminder["channel_id"],
+        "delivered_at": delivered_at,
+    }
+
+
+class AsyncReminder:
     """
-    sends user reminders when their exam will take place if they have set a date.
+    sends user reminders when their exam will take place if they have set a date,
+    users are read through the async repository so the daily task never blocks the bot.
+    what has been sent is kept in the reminder_deliveries ledger, so running this again
+    after a restart only picks up what is still missing.
     """
 
-    def __init__(self):
-        self.repo = ExamRepository()
-        self.sent_today = set()
+    def __init__(self, flush_size=DELIVERY_FLUSH_SIZE):
+        self.repo = AsyncExamRepository()
+        self.flush_size = flush_size
+        self._pending = []
 
-    def users_to_remind(self):
+    async def users_to_remind(self, since=None, until=None):
         """
-        get users who need reminders today
+        get users who still need today's reminder. a catch-up passes the days to look back
+        over instead, each user then gets the nearest window that came due between since and
+        until unless the ledger has it.
         """
 
-        reminders = []
-        all_users = self.repo.get_all_users()
         today = date.today()
+        since, until = since or today, until or today
+        exam_dates = _reminder_dates(since, today)
+        delivered = await self.repo.get_delivered_keys(exam_dates)
+        reminders = []
 
-        for user_exam in all_users:
-            days_until = (user_exam.exam_date - today).days
-            user_id = user_exam.user_id
-
-            # if already sent, don't send again :p
-            if user_id in self.sent_today:
-                continue
-
-            message = None
-
-            if days_until == 30:
-                message = f"**30 Days Until BITSAT**\nExam: {user_exam.exam_date.strftime('%d %B %Y')}\nOne month to go"
-
-            elif days_until == 7:
-                message = f"**1 Week Until BITSAT!**\nExam: {user_exam.exam_date.strftime('%d %B %Y')}\nFinal week"
-
-            elif 1 <= days_until <= 6:
-                if days_until == 1:
-                    message = f"**Tomorrow is BITSAT!**\n{user_exam.exam_date.strftime('%d %B %Y')}\nGet good sleep for tomorrow"
-                else:
-                    message = f"**{days_until} Days Until BITSAT**\n{user_exam.exam_date.strftime('%d %B %Y')}\nPlease close discord & study for your own sake"
-            elif days_until == 0:
-                message = f"**TODAY IS THE DAY!**\nBITSAT: {user_exam.exam_date.strftime('%d %B %Y')}\nGood luck Soldier"
-            if message:
-                reminders.append(
-                    {
-                        "user_id": user_id,
-                        "message": message,
-                        "channel_id": user_exam.channel_id,
-                    }
-                )
-                self.sent_today.add(user_id)
+        async for user_exam in self.repo.stream_reminder_candidates(exam_dates):
+            reminder = _build_reminder(user_exam, today, delivered, since, until)
+            if reminder:
+                reminders.append(reminder)
 
         return reminders
 
-    def reset_daily_tracking(self):
-        self.sent_today.clear()
+    async def missed_since(self, today):
+        """
+        first day a startup catch-up has to look at: the day of the newest delivery, at most
+        CATCH_UP_DAYS back, or today when nothing was ever sent.
+        """
+
+        last = await self.repo.last_delivery_date()
+        if last is None:
+            return today
+        return max(last, today - timedelta(days=CATCH_UP_DAYS))
+
+    async def mark_delivered(self, reminders):
+        """
+        queue sent reminders for the ledger, written out flush_size rows at a time.
+        """
+
+        delivered_at = datetime.now(UTC)
+        self._pending.extend(_delivery_row(r, delivered_at) for r in reminders)
+        if len(self._pending) >= self.flush_size:
+            await self.flush_deliveries()
+
+    async def flush_deliveries(self):
+        # swapped out before awaiting so concurrent callers never write a row twice
+        rows, self._pending = self._pending, []
+        await self.repo.record_deliveries(rows)
+
+
+class Reminder:
+    """
+    blocking wrapper around AsyncReminder for scripts and benchmarks.
+    """
+
+    def __init__(self):
+        self.reminder = AsyncReminder()
+
+    def users_to_remind(self, since=None, until=None):
+        return run_sync(self.reminder.users_to_remind(since, until))
+
+    def mark_delivered(self, reminders):
+        """
+        write sent reminders to the ledger in one batch.
+        """
 
-    def __del__(self):
-        self.repo.close()
+        run_sync(self.reminder.mark_delivered(reminders))
+        run_sync(self.reminder.flush_deliveries())
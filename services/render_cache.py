@@ -0,0 +1,152 @@
+import hashlib
+import os
+import tempfile
+import threading
+
+DEFAULT_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join(".cache", "renders"))
+DEFAULT_MAX_BYTES = int(os.getenv("RENDER_CACHE_MB", "256")) * 1024 * 1024
+
+
+def fingerprint(data):
+    """
+    stable hash of the exact input a render used, a DataFrame slice or plain python rows.
+    """
+
+    digest = hashlib.sha256()
+    # imported here so this module stays cheap for anything that only needs the cache
+    import pandas as pd
+
+    if isinstance(data, pd.DataFrame):
+        digest.update(",".join(map(str, data.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+    else:
+        digest.update(repr(data).encode())
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """
+    content-addressed PNG cache on disk that survives restarts.
+
+    a key is the hash of (render function, arguments, hash of the data slice, style version),
+    so when a csv changes the slice hash changes with it and a stale image is never served.
+    files are written atomically (temp file + rename) and the directory is kept under
+    max_bytes by evicting the least recently used files, the directory is only scanned the
+    first time the cache is touched.
+    """
+
+    def __init__(self, directory=DEFAULT_DIR, max_bytes=DEFAULT_MAX_BYTES, style=""):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.style = style
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._total_bytes = None
+        self._lock = threading.Lock()
+
+    def key(self, func_name, args, data):
+        parts = [func_name, repr(args), fingerprint(data), self.style]
+        return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.png")
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        files = []
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".png"):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        return files
+
+    def _ensure_loaded(self):
+        if self._total_bytes is None:
+            self._total_bytes = sum(size for _, size, _ in self._scan())
+
+    def get(self, key):
+        with self._lock:
+            self._ensure_loaded()
+
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime doubles as the last-used time for LRU eviction
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return data
+
+    def put(self, key, data):
+        with self._lock:
+            self._ensure_loaded()
+            path = self._path(key)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                # another worker may have stored the same key already, its bytes are replaced
+                try:
+                    replaced = os.stat(path).st_size
+                except FileNotFoundError:
+                    replaced = 0
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+                raise
+
+            self._total_bytes += len(data) - replaced
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # rescan instead of trusting the running total, other render workers share the directory
+        files = sorted(self._scan())
+        total = sum(size for _, size, _ in files)
+
+        for _, size, path in files:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+
+        self._total_bytes = total
+
+    def get_or_render(self, func_name, args, data, render):
+        """
+        cached bytes for this exact input, calling render() and storing its output on a miss.
+        """
+
+        key = self.key(func_name, args, data)
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        image = render()
+        if image is not None:
+            self.put(key, image)
+        return image
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self._total_bytes or 0,
+        }
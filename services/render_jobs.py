@@ -0,0 +1,26 @@
+from collections import namedtuple
+
+# one pre-renderable response: the URL-cache key it is served under, the name of the
+# analytics function that renders it and the positional args for that function.
+RenderJob = namedtuple("RenderJob", ["key", "func", "args"])
+
+
+def campus_plot_key(campus):
+    return f"plot_{campus}"
+
+
+def branch_plot_key(campus, branch):
+    # keyed by the resolved branch name so `cse` and `computer science` share one upload
+    return f"plot_branch_{campus}_{branch.lower()}"
+
+
+def select_key(year, campus_title):
+    return f"select_{year}_{campus_title or 'all'}"
+
+
+def predict_key(situation, campus):
+    return f"predict_{situation}_{campus or 'all'}"
+
+
+def live_predict_key(difficulty, campus, model_tag):
+    return f"predict_d{difficulty:.2f}_{model_tag}_{campus or 'all'}"
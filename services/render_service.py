@@ -0,0 +1,138 @@
+import asyncio
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_WORKERS = int(os.getenv("RENDER_WORKERS", min(4, os.cpu_count() or 1)))
+
+# set once per worker process by _init_worker
+_analytics = None
+
+
+def _init_worker():
+    # every worker imports analytics exactly once, so each has its own dataset, fonts and
+    # pyplot state and no two renders ever share a figure manager
+    global _analytics
+    from services import logging_config
+
+    logging_config.configure_worker()
+
+    import analytics
+
+    _analytics = analytics
+
+
+def _ping():
+    return os.getpid()
+
+
+def _render(func_name, args):
+    # only a stat() per data file unless one changed, so every render sees the newest csvs
+    # no later than the bot process does and never serves what it just invalidated
+    _analytics.reload_changed_data()
+    image = getattr(_analytics, func_name)(*args)
+    # the worker's cache counters ride along, the bot process has no other way to see them
+    stats = (os.getpid(), _analytics.render_cache_info())
+    if image is None:
+        return None, stats
+    # plain bytes pickle cheaply on the way back to the bot process
+    return image.getvalue(), stats
+
+
+class RenderService:
+    """
+    runs the matplotlib/seaborn renders of analytics.py in a pool of worker processes,
+    so they neither fight over the GIL nor corrupt each other's pyplot state.
+    workers=0 keeps the old behaviour of rendering on the event-loop's thread pool.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self.workers = workers
+        self._executor = None
+        # renders submitted and not finished yet, queued or running
+        self.pending = 0
+        self.completed = 0
+        self._worker_caches = {}
+
+    def start(self):
+        if self.workers <= 0 or self._executor is not None:
+            return
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_worker
+        )
+        # spin every worker up now so the first command doesn't pay for the analytics import
+        for _ in range(self.workers):
+            self._executor.submit(_ping)
+
+    async def render(self, func_name, *args):
+        """
+        name of a public analytics render function & its args, returns a BytesIO or None.
+        """
+
+        loop = asyncio.get_running_loop()
+
+        self.pending += 1
+        try:
+            if self._executor is None:
+                import analytics
+
+                image = await loop.run_in_executor(
+                    None, getattr(analytics, func_name), *args
+                )
+                return image
+
+            data, (pid, caches) = await loop.run_in_executor(
+                self._executor, _render, func_name, args
+            )
+            self._worker_caches[pid] = caches
+            if data is None:
+                return None
+            return io.BytesIO(data)
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    def stats(self):
+        """
+        pending renders split into those running and those waiting for a free worker.
+        """
+
+        if self._executor is None:
+            # the event-loop's default thread pool, sized like ThreadPoolExecutor's default
+            capacity = min(32, (os.cpu_count() or 1) + 4)
+        else:
+            capacity = self.workers
+        in_flight = min(self.pending, capacity)
+        return {
+            "workers": capacity,
+            "in_flight": in_flight,
+            "queued": self.pending - in_flight,
+            "completed": self.completed,
+        }
+
+    def cache_stats(self):
+        """
+        in-memory render cache counters summed over every worker that has reported, or read
+        straight from analytics when rendering on threads.
+        """
+
+        if self._executor is None:
+            analytics = sys.modules.get("analytics")
+            reports = [analytics.render_cache_info()] if analytics else []
+        else:
+            reports = list(self._worker_caches.values())
+
+        totals = {}
+        for report in reports:
+            for name, info in report.items():
+                total = totals.setdefault(name, {"hits": 0, "misses": 0, "size": 0})
+                for field in total:
+                    total[field] += info.get(field, 0)
+        return totals
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._worker_caches.clear()
@@ -0,0 +1,262 @@
+"""
+cutoff scraper for the admissions pages: every year page is fetched concurrently over one
+pooled session with conditional requests, only the year's div is parsed, and only
+(campus, branch, year) rows that aren't already in data/analysis_data are appended.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+import tempfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import lxml.html
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+# the site has some insecure/incomplete SSL certificate chain
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+CAMPUSES = ("Pilani", "Goa", "Hyderabad")
+COLUMNS = ("campus", "branch", "marks", "year")
+
+OUTPUT_DIR = os.path.join("data", "analysis_data")
+VALIDATORS_PATH = os.path.join(".cache", "scraper_validators.json")
+
+log = logging.getLogger(__name__)
+
+PageResult = namedtuple("PageResult", ["year", "url", "status", "rows", "validators"])
+
+
+def year_div_id(year):
+    return f"{year}-{year + 1}"
+
+
+def parse_cutoffs(html, year):
+    """
+    cutoff rows of one year page. lxml builds the tree in C and an xpath picks out the year's
+    div, so the navigation, scripts and the other years' tables never become python objects.
+    """
+
+    if not html or not html.strip():
+        return []
+    divs = lxml.html.fromstring(html).xpath("//div[@id=$id]", id=year_div_id(year))
+
+    data = {}
+    for table in (table for div in divs for table in div.iter("table")):
+        rows = list(table.iter("tr"))
+
+        # skip any tiny-tables in the way
+        if len(rows) < 3:
+            continue
+
+        for row in rows[1:]:
+            cols = row.findall("td")
+            if len(cols) < 4:
+                continue
+
+            campus = cols[0].text_content().strip()
+            program = cols[1].text_content().strip()
+            cutoff = cols[2].text_content().strip()
+
+            if "Goa" in campus:
+                campus = "Goa"
+            elif campus not in CAMPUSES:
+                continue
+
+            # validating if data row
+            if cutoff.isdigit() and program.lower() != "program":
+                # the first row of a repeated (campus, branch) wins, like drop_duplicates
+                data.setdefault(
+                    (campus, program),
+                    {
+                        "campus": campus,
+                        "branch": program,
+                        "marks": int(cutoff),
+                        "year": year,
+                    },
+                )
+
+    return list(data.values())
+
+
+def make_session(pool_size=8):
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def load_validators(path=VALIDATORS_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        log.warning("ignoring unreadable scraper cache %s: %s", path, e)
+        return {}
+
+
+def save_validators(validators, path=VALIDATORS_PATH):
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    with os.fdopen(fd, "w") as f:
+        json.dump(validators, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def fetch_page(session, year, url, validators=None, timeout=30):
+    """
+    one year page. with the ETag/Last-Modified of the last successful fetch the server can
+    answer 304, which skips both the download and the parse.
+    """
+
+    headers = {}
+    if validators:
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    response = session.get(url, headers=headers, timeout=timeout, verify=False)
+    if response.status_code == 304:
+        return PageResult(year, url, "not-modified", [], validators)
+    response.raise_for_status()
+
+    fresh = {
+        "etag": response.headers.get("ETag"),
+        "last_modified": response.headers.get("Last-Modified"),
+    }
+    return PageResult(
+        year, url, "fetched", parse_cutoffs(response.content, year), fresh
+    )
+
+
+def fetch_pages(pages, session=None, validators=None, workers=8):
+    """
+    fetches & parses every (year, url) in pages concurrently, results in the order given.
+    a page that fails is reported with status "error" instead of failing the others.
+    """
+
+    validators = validators or {}
+    session = session or make_session(workers)
+
+    def fetch(page):
+        year, url = page
+        try:
+            return fetch_page(session, year, url, validators.get(url))
+        except (requests.RequestException, ValueError) as e:
+            log.warning(
+                "failed to fetch cutoffs: %s", e, extra={"year": year, "url": url}
+            )
+            return PageResult(year, url, "error", [], None)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(pages)))) as executor:
+        return list(executor.map(fetch, pages))
+
+
+def _existing_keys(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, newline="") as f:
+        return {
+            (
+                row["campus"].strip().lower(),
+                row["branch"].strip().lower(),
+                int(row["year"]),
+            )
+            for row in csv.DictReader(f)
+        }
+
+
+def append_new_rows(rows, output_dir=OUTPUT_DIR):
+    """
+    appends the rows whose (campus, branch, year) isn't in cutoff_<year>.csv yet and returns
+    how many were added per year. each file is replaced atomically so the bot's data reload
+    never sees half a write.
+    """
+
+    by_year = {}
+    for row in rows:
+        by_year.setdefault(row["year"], []).append(row)
+
+    os.makedirs(output_dir, exist_ok=True)
+    added = {}
+    for year, year_rows in sorted(by_year.items()):
+        path = os.path.join(output_dir, f"cutoff_{year}.csv")
+        seen = _existing_keys(path)
+
+        new_rows = []
+        for row in year_rows:
+            key = (row["campus"].lower(), row["branch"].lower(), year)
+            if key not in seen:
+                seen.add(key)
+                new_rows.append(row)
+
+        added[year] = len(new_rows)
+        if not new_rows:
+            continue
+
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMNS, lineterminator="\n")
+        existing = b""
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                existing = f.read()
+            if existing and not existing.endswith(b"\n"):
+                existing += b"\n"
+        if not existing:
+            writer.writeheader()
+        writer.writerows(new_rows)
+
+        fd, tmp_path = tempfile.mkstemp(dir=output_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(existing)
+            f.write(buffer.getvalue().encode())
+        os.replace(tmp_path, path)
+
+    return added
+
+
+def update(
+    pages,
+    output_dir=OUTPUT_DIR,
+    validators_path=VALIDATORS_PATH,
+    workers=8,
+    force=False,
+):
+    """
+    fetches every page, appends what is new and remembers the validators of every page that
+    was stored, so the next run only downloads pages that changed. returns the page results
+    and the rows added per year.
+    """
+
+    validators = {} if force else load_validators(validators_path)
+    results = fetch_pages(pages, validators=validators, workers=workers)
+
+    rows = [row for result in results for row in result.rows]
+    added = append_new_rows(rows, output_dir)
+
+    for result in results:
+        if result.status != "fetched":
+            continue
+        if not result.rows:
+            # most likely the page layout moved, keep re-downloading until it parses again
+            log.warning(
+                "no cutoffs found in the %s div",
+                year_div_id(result.year),
+                extra={"year": result.year, "url": result.url},
+            )
+            validators.pop(result.url, None)
+            continue
+        validators[result.url] = result.validators
+    save_validators(validators, validators_path)
+
+    return results, added
@@ -0,0 +1,44 @@
+import asyncio
+
+
+class SingleFlight:
+    """
+    coalesces concurrent calls for the same key: the first caller's coroutine runs as a task
+    and everyone asking for that key while it runs awaits the same task instead of starting
+    their own. once it finishes the key is free again, results are not cached here.
+    """
+
+    def __init__(self):
+        self._tasks = {}
+        self.started = 0
+        self.coalesced = 0
+
+    def __len__(self):
+        return len(self._tasks)
+
+    def __contains__(self, key):
+        return key in self._tasks
+
+    def _release(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def do(self, key, func):
+        """
+        result of func() for key, shared with every concurrent caller of the same key.
+        returns (result, shared), shared being False only for the caller whose func ran.
+        exceptions reach every caller alike.
+        """
+
+        task = self._tasks.get(key)
+        shared = task is not None
+        if shared:
+            self.coalesced += 1
+        else:
+            self.started += 1
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._release(key, done))
+
+        # a cancelled caller must not cancel the work the others are waiting for
+        return await asyncio.shield(task), shared
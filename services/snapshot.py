@@ -0,0 +1,203 @@
+"""
+typed binary snapshot of the cutoff & prediction csv files so a cold start doesn't re-parse them.
+
+layout: magic, 8-byte header length, a json header, then every column as a raw
+64-byte-aligned array. numeric columns are memory-mapped straight out of the file, string
+columns are stored as int32 codes into a per-column list of values.
+
+    uv run python -m services.snapshot    # (re)build it from the csv files right now
+"""
+
+import json
+import logging
+import os
+import struct
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+log = logging.getLogger(__name__)
+
+DEFAULT_PATH = os.getenv("DATA_SNAPSHOT_PATH", os.path.join(".cache", "data.snapshot"))
+
+MAGIC = b"BSNAP1\n"
+ALIGN = 64
+
+
+def signature(source):
+    stat = os.stat(source)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def _pad(offset):
+    return -offset % ALIGN
+
+
+def _encode(series):
+    if pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+        return np.ascontiguousarray(series.to_numpy()), None
+
+    codes, uniques = pd.factorize(series)
+    return codes.astype(np.int32), [str(value) for value in uniques]
+
+
+def _group_key(frame):
+    return tuple((str(name), str(dtype)) for name, dtype in frame.dtypes.items())
+
+
+def write_snapshot(tables, path=DEFAULT_PATH):
+    """
+    tables maps each source csv path to the frame parsed from it, the file is replaced atomically.
+    frames with the same columns are stored back to back as one group, so loading them back
+    builds a single DataFrame instead of one per file.
+    """
+
+    grouped = {}
+    for source, frame in tables.items():
+        grouped.setdefault(_group_key(frame), []).append((source, frame))
+
+    header = {"version": 1, "groups": []}
+    arrays = []
+    offset = 0
+
+    for members in grouped.values():
+        combined = pd.concat([frame for _, frame in members], ignore_index=True)
+        sources, start = {}, 0
+        for source, frame in members:
+            sources[source] = {
+                "signature": signature(source),
+                "start": start,
+                "stop": start + len(frame),
+            }
+            start += len(frame)
+
+        columns = []
+        for name in combined.columns:
+            array, values = _encode(combined[name])
+            offset += _pad(offset)
+            columns.append(
+                {
+                    "name": str(name),
+                    "dtype": array.dtype.str,
+                    "offset": offset,
+                    "values": values,
+                }
+            )
+            arrays.append((offset, array))
+            offset += array.nbytes
+
+        header["groups"].append(
+            {"rows": len(combined), "columns": columns, "sources": sources}
+        )
+
+    blob = json.dumps(header).encode()
+    data_start = len(MAGIC) + 8 + len(blob)
+    data_start += _pad(data_start)
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<Q", len(blob)))
+            f.write(blob)
+            for array_offset, array in arrays:
+                f.seek(data_start + array_offset)
+                f.write(array.tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class Snapshot:
+    """
+    a snapshot file opened read-only through one memory map.
+    """
+
+    def __init__(self, path, header, data_start):
+        self.path = path
+        self.groups = header["groups"]
+        # source path -> (group number, its entry)
+        self.tables = {
+            source: (number, entry)
+            for number, group in enumerate(self.groups)
+            for source, entry in group["sources"].items()
+        }
+        self._map = np.memmap(path, dtype=np.uint8, mode="r")
+        self._data_start = data_start
+        self._frames = {}
+
+    @classmethod
+    def open(cls, path=DEFAULT_PATH):
+        """
+        the snapshot at path, None if there is none or it isn't one this code can read.
+        """
+
+        try:
+            with open(path, "rb") as f:
+                if f.read(len(MAGIC)) != MAGIC:
+                    return None
+                (length,) = struct.unpack("<Q", f.read(8))
+                header = json.loads(f.read(length))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, struct.error) as e:
+            log.warning("ignoring unreadable data snapshot %s: %s", path, e)
+            return None
+
+        data_start = len(MAGIC) + 8 + length
+        return cls(path, header, data_start + _pad(data_start))
+
+    def is_fresh(self, source):
+        """
+        True when the source csv is exactly the file this snapshot was compiled from.
+        """
+
+        table = self.tables.get(source)
+        if table is None:
+            return False
+        try:
+            return signature(source) == table[1]["signature"]
+        except FileNotFoundError:
+            return False
+
+    def _group_frame(self, number):
+        frame = self._frames.get(number)
+        if frame is not None:
+            return frame
+
+        group = self.groups[number]
+        rows = group["rows"]
+        columns = {}
+
+        for column in group["columns"]:
+            dtype = np.dtype(column["dtype"])
+            start = self._data_start + column["offset"]
+            array = np.frombuffer(self._map, dtype=dtype, count=rows, offset=start)
+
+            if column["values"] is None:
+                columns[column["name"]] = array
+            else:
+                # code -1 is a missing value, it indexes the trailing None
+                values = np.array(column["values"] + [None], dtype=object)
+                columns[column["name"]] = pd.Series(values[array], dtype="str")
+
+        frame = self._frames[number] = pd.DataFrame(columns, copy=False)
+        return frame
+
+    def frame(self, source):
+        number, entry = self.tables[source]
+        rows = self._group_frame(number).iloc[entry["start"] : entry["stop"]]
+        return rows.reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # importing analytics loads the csv files and refreshes a stale snapshot on its own
+    import analytics
+
+    analytics.write_data_snapshot()
+    print(f"wrote {analytics.SNAPSHOT_PATH}")
@@ -0,0 +1,241 @@
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlparse
+
+DEFAULT_PATH = os.getenv("URL_CACHE_PATH", os.path.join(".cache", "url_cache.db"))
+
+
+def url_expiry(url):
+    """
+    unix time a signed discord-CDN url stops working at (hex `ex=` parameter), None if unsigned.
+    """
+
+    values = parse_qs(urlparse(url).query).get("ex")
+    if not values:
+        return None
+    try:
+        return int(values[0], 16)
+    except ValueError:
+        return None
+
+
+class URLCache:
+    """
+    discord-CDN attachment urls keyed by cache-key, persisted in sqlite so a redeploy does not
+    re-render and re-upload every plot.
+
+    attachment urls are signed and expire, refresh_expiring() re-signs the ones about to run
+    out in the background. an entry it could not renew and that is within refresh_margin
+    seconds of its expiry is reported as a miss, so the next request uploads a fresh copy
+    before the old link breaks. the cache holds at most max_entries urls and evicts the least
+    recently used.
+
+    every method does sqlite I/O, the bot calls them through the default executor.
+    """
+
+    def __init__(self, path=DEFAULT_PATH, max_entries=512, refresh_margin=6 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.refresh_margin = refresh_margin
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.renewed = 0
+        self.evictions = 0
+
+        self._entries = OrderedDict()
+        self._touched = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connect(self):
+        # opened on first use so importing analytics never touches the disk
+        if self._conn is not None:
+            return self._conn
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS url_cache (
+                key TEXT PRIMARY KEY,
+                url TEXT NOT NULL,
+                expires_at INTEGER,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        rows = conn.execute(
+            "SELECT key, url, expires_at FROM url_cache ORDER BY last_used"
+        ).fetchall()
+        for key, url, expires_at in rows:
+            self._entries[key] = (url, expires_at)
+
+        self._conn = conn
+        return conn
+
+    def get(self, key):
+        with self._lock:
+            self._connect()
+            entry = self._entries.get(key)
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            url, expires_at = entry
+            if self._needs_refresh(expires_at):
+                self.refreshes += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._touched[key] = time.time()
+            self.hits += 1
+            return url
+
+    def peek(self, key):
+        """
+        same freshness rules as get() but leaves the counters & LRU order alone.
+        """
+
+        with self._lock:
+            self._connect()
+            entry = self._entries.get(key)
+            if entry is None or self._needs_refresh(entry[1]):
+                return None
+            return entry[0]
+
+    def _needs_refresh(self, expires_at):
+        return expires_at is not None and expires_at - time.time() < self.refresh_margin
+
+    def set(self, key, url):
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            expires_at = url_expiry(url)
+
+            self._entries[key] = (url, expires_at)
+            self._entries.move_to_end(key)
+            self._touched.pop(key, None)
+
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._touched.pop(old_key, None)
+                evicted.append((old_key,))
+            self.evictions += len(evicted)
+
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO url_cache (key, url, expires_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, url, expires_at, now),
+                )
+                conn.executemany("DELETE FROM url_cache WHERE key = ?", evicted)
+                # recency of hits is written lazily, piggybacking on the next write
+                conn.executemany(
+                    "UPDATE url_cache SET last_used = ? WHERE key = ?",
+                    [(used, touched) for touched, used in self._touched.items()],
+                )
+            self._touched.clear()
+
+    def delete(self, keys):
+        with self._lock:
+            conn = self._connect()
+            keys = [key for key in keys if self._entries.pop(key, None)]
+            for key in keys:
+                self._touched.pop(key, None)
+            with conn:
+                conn.executemany(
+                    "DELETE FROM url_cache WHERE key = ?", [(key,) for key in keys]
+                )
+            return len(keys)
+
+    def expiring(self, within):
+        """
+        (key, url) of every signed url that stops working in less than `within` seconds.
+        """
+
+        with self._lock:
+            self._connect()
+            deadline = time.time() + within
+            return [
+                (key, url)
+                for key, (url, expires_at) in self._entries.items()
+                if expires_at is not None and expires_at < deadline
+            ]
+
+    def renew(self, urls):
+        """
+        swaps in re-signed urls from (key, old url, new url) triples. a key that no longer maps
+        to its old url (uploaded again or deleted by a reload meanwhile) is left alone, and the
+        LRU order does not move since a renewal is not a use. returns how many were swapped.
+        """
+
+        with self._lock:
+            conn = self._connect()
+            rows = []
+            for key, old_url, new_url in urls:
+                entry = self._entries.get(key)
+                if entry is None or entry[0] != old_url:
+                    continue
+                expires_at = url_expiry(new_url)
+                self._entries[key] = (new_url, expires_at)
+                rows.append((new_url, expires_at, key))
+
+            with conn:
+                conn.executemany(
+                    "UPDATE url_cache SET url = ?, expires_at = ? WHERE key = ?", rows
+                )
+            self.renewed += len(rows)
+            return len(rows)
+
+    def __len__(self):
+        with self._lock:
+            self._connect()
+            return len(self._entries)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "renewed": self.renewed,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+async def refresh_expiring(cache, resolve, within, batch_size=50):
+    """
+    re-signs the cached urls that expire within `within` seconds before get() starts treating
+    them as misses. `resolve(urls)` takes at most batch_size urls and returns {old url: new url}
+    for the ones it could refresh, the sqlite work runs on the default executor. returns how
+    many urls were renewed.
+    """
+
+    loop = asyncio.get_running_loop()
+    entries = await loop.run_in_executor(None, cache.expiring, within)
+
+    renewed = 0
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start : start + batch_size]
+        fresh = await resolve([url for _, url in batch])
+        swaps = [(key, url, fresh[url]) for key, url in batch if fresh.get(url)]
+        if swaps:
+            renewed += await loop.run_in_executor(None, cache.renew, swaps)
+    return renewed
+
+
+# the one instance the bot uses, shared by main.py and analytics.py
+URL_CACHE = URLCache()
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+# a render that trips over its data or a dead render worker (BrokenProcessPool is a
+# RuntimeError) skips that job, anything else still stops the warmup
+JOB_ERRORS = (
+    ArithmeticError,
+    LookupError,
+    OSError,
+    RuntimeError,
+    TypeError,
+    ValueError,
+)
+
+
+async def warm_renders(jobs, render, upload=None, pause=0.05, progress_every=10):
+    """
+    renders every job one at a time so warmup never takes more than a single worker away
+    from real commands, sleeping for `pause` between jobs to let them in first.
+    `render(job)` returns the image buffer (or None), `upload(job, buffer)` is optional.
+    """
+
+    start = time.perf_counter()
+    rendered = uploaded = failed = 0
+
+    for position, job in enumerate(jobs, 1):
+        try:
+            image = await render(job)
+            if image is not None:
+                rendered += 1
+                if upload is not None and await upload(job, image):
+                    uploaded += 1
+        except JOB_ERRORS as e:
+            failed += 1
+            log.warning("warmup render failed: %s", e, extra={"cache_key": job.key})
+
+        if position % progress_every == 0 or position == len(jobs):
+            log.info("warmup: %d/%d done", position, len(jobs))
+        await asyncio.sleep(pause)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "rendered": rendered,
+        "uploaded": uploaded,
+        "failed": failed,
+        "seconds": elapsed,
+    }
+    log.info("warmup finished", extra=summary)
+    return summary
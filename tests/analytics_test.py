@@ -0,0 +1,424 @@
+import asyncio
+
+from services.render_jobs import (
+    branch_plot_key,
+    campus_plot_key,
+    predict_key,
+    select_key,
+)
+from services.render_service import RenderService
+
+
+class TestRenderJobs:
+    def test_every_command_shape_is_covered(self, analytics_data):
+        jobs = analytics_data.render_jobs()
+        keys = {job.key for job in jobs}
+
+        assert campus_plot_key("pilani") in keys
+        assert branch_plot_key("goa", "B.E. Computer Science") in keys
+        assert select_key(2024, None) in keys
+        assert select_key(2024, "Hyderabad") in keys
+        assert "predict_most-likely_all" in keys
+        assert len(keys) == len(jobs)
+
+    def test_jobs_render(self, analytics_data):
+        jobs = {job.key: job for job in analytics_data.render_jobs()}
+
+        for key in (campus_plot_key("pilani"), select_key(2025, "Goa")):
+            job = jobs[key]
+            image = getattr(analytics_data, job.func)(*job.args)
+            assert image.getvalue().startswith(b"\x89PNG")
+
+
+class TestRenderService:
+    def test_thread_fallback(self, analytics_data):
+        service = RenderService(workers=0)
+        service.start()
+        before = service.cache_stats()["_get_campus_plot_bytes"]
+
+        image = asyncio.run(service.render("plot_marks_by_campus", "pilani"))
+        assert image.getvalue().startswith(b"\x89PNG")
+
+        asyncio.run(service.render("plot_marks_by_campus", "pilani"))
+        after = service.cache_stats()["_get_campus_plot_bytes"]
+        assert after["misses"] - before["misses"] == 1
+        assert after["hits"] - before["hits"] == 1
+        assert service.stats()["completed"] == 2
+        assert service.stats()["in_flight"] == 0
+
+    def test_worker_process_returns_none_for_unknown_campus(self):
+        service = RenderService(workers=1)
+        service.start()
+        try:
+            assert (
+                asyncio.run(service.render("plot_marks_by_campus", "nowhere")) is None
+            )
+            # the worker's cache counters come back with every render, a forked worker
+            # starts from whatever this process had counted already
+            assert service.cache_stats()["_get_campus_plot_bytes"]["misses"] >= 1
+            assert service.stats() == {
+                "workers": 1,
+                "in_flight": 0,
+                "queued": 0,
+                "completed": 1,
+            }
+        finally:
+            service.shutdown()
+
+
+class TestTableTemplates:
+    def test_template_is_reused_per_shape(self, analytics_data):
+        headers = ["Campus", "Course", "Marks", "Year"]
+        first = analytics_data._tabulate_to_bytes(
+            [["Pilani", "B.E. Civil", 250, 2025]], headers
+        )
+        second = analytics_data._tabulate_to_bytes(
+            [["Goa", "B.E. Chemical", 240, 2025]], headers
+        )
+
+        assert first.startswith(b"\x89PNG") and second.startswith(b"\x89PNG")
+        assert first != second
+        assert (1, (0.15, 0.6, 0.15, 0.1)) in analytics_data._table_templates
+
+    def test_rows_beyond_limit_are_dropped(self, analytics_data):
+        rows = [["Pilani", f"branch {i}", 300 - i, 2025] for i in range(40)]
+        analytics_data._tabulate_to_bytes(rows, ["a", "b", "c", "d"], limit=25)
+        assert (25, (0.15, 0.6, 0.15, 0.1)) in analytics_data._table_templates
+
+    def test_the_longest_branch_name_is_not_clipped(self, analytics_data):
+        import io
+
+        from matplotlib.image import imread
+
+        def width(png):
+            return imread(io.BytesIO(png)).shape[1]
+
+        # three columns get a third of the width each, too narrow for the longest name
+        headers = ["Campus", "Marks", "Course"]
+        branch = max(analytics_data.alias_to_actual.values(), key=len)
+        short = analytics_data._tabulate_to_bytes([["Goa", 250, "B. Pharm"]], headers)
+        longest = analytics_data._tabulate_to_bytes([["Goa", 250, branch]], headers)
+
+        template = analytics_data._table_templates[(1, (1 / 3,) * 3)]
+        renderer = template.fig.canvas.get_renderer()
+        text = template.texts[1][2].get_window_extent(renderer)
+        spill = (
+            template.centers[2] + text.width / template.fig.dpi / 2 - template.bbox.x1
+        )
+
+        assert spill > 0
+        assert width(short) == int(template.bbox.width * 150)
+        assert width(longest) >= width(short) + spill * 150
+
+
+class TestDiskRenderCache:
+    def test_restart_is_served_from_disk(self, analytics_data):
+        first = analytics_data._get_campus_plot_bytes("pilani")
+        analytics_data._get_campus_plot_bytes.cache_clear()
+
+        assert analytics_data._get_campus_plot_bytes("pilani") == first
+        assert analytics_data.RENDER_CACHE.stats()["hits"] == 1
+
+
+class TestDataReload:
+    def _rewrite(self, path, frame):
+        import os
+
+        frame.to_csv(path, index=False)
+        # same-second rewrites can keep the mtime, the watcher also looks at size & content
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    def test_nothing_changed(self, reloadable_data):
+        assert reloadable_data.reload_changed_data() is None
+
+    def test_only_changed_rows_are_evicted(self, reloadable_data, tmp_path):
+        import pandas as pd
+
+        anal = reloadable_data
+        anal.plot_marks_by_campus("pilani")
+        anal.plot_marks_by_campus("goa")
+        anal.select(25, 2025, None)
+        anal.select(25, 2024, "Goa")
+        anal.get_predictions(25, None, "most-likely")
+
+        path = tmp_path / "analysis_data" / "2025.csv"
+        frame = pd.read_csv(path)
+        frame.loc[frame["campus"] == "Pilani", "marks"] += 5
+        self._rewrite(path, frame)
+
+        version = anal.data_version
+        change = anal.reload_changed_data()
+
+        assert change.campuses == {"pilani"}
+        assert change.campus_years == {("pilani", 2025)}
+        assert change.scenarios == set()
+        assert anal.data_version == version + 1
+        assert anal.df.loc[anal.df["campus"] == "Pilani", "marks"].max() == 340
+
+        # goa & the untouched year survived, pilani & 2025/all are re-rendered
+        before = anal._get_campus_plot_bytes.cache_info()["misses"]
+        anal.plot_marks_by_campus("goa")
+        anal.select(25, 2024, "Goa")
+        anal.get_predictions(25, None, "most-likely")
+        assert anal._get_campus_plot_bytes.cache_info()["misses"] == before
+        anal.plot_marks_by_campus("pilani")
+        assert anal._get_campus_plot_bytes.cache_info()["misses"] == before + 1
+
+        keys = anal.affected_url_keys(change)
+        assert campus_plot_key("pilani") in keys
+        assert campus_plot_key("goa") not in keys
+        assert select_key(2025, "Pilani") in keys
+        assert select_key(2025, None) in keys
+        assert select_key(2024, None) not in keys
+
+    def test_new_and_removed_files(self, reloadable_data, tmp_path):
+        anal = reloadable_data
+        assert anal.select(25, 2026, None) is None
+
+        new_year = anal.df[anal.df["year"] == 2025].assign(year=2026)
+        new_year.to_csv(tmp_path / "analysis_data" / "2026.csv", index=False)
+        change = anal.reload_changed_data()
+        assert {year for _, year in change.campus_years} == {2026}
+        assert anal.select(25, 2026, None) is not None
+
+        (tmp_path / "analysis_data" / "2023.csv").unlink()
+        change = anal.reload_changed_data()
+        assert {year for _, year in change.campus_years} == {2023}
+        assert 2023 not in set(anal.df["year"])
+
+    def test_prediction_scenario_reload(self, reloadable_data, tmp_path):
+        anal = reloadable_data
+        anal.URL_CACHE.set(predict_key("most-likely", "goa"), "https://cdn/a.png")
+        anal.URL_CACHE.set(campus_plot_key("goa"), "https://cdn/b.png")
+        first = anal.get_predictions(25, None, "most-likely").getvalue()
+
+        path = tmp_path / "most_likely_case.csv"
+        frame = anal.PREDICTIONS["most-likely"].copy()
+        frame["marks"] -= 10
+        self._rewrite(path, frame)
+
+        change = anal.reload_changed_data()
+        assert change.scenarios == {"most-likely"} and not change.campuses
+        assert anal.URL_CACHE.delete(anal.affected_url_keys(change)) == 1
+        assert anal.URL_CACHE.peek(campus_plot_key("goa")) == "https://cdn/b.png"
+        assert anal.get_predictions(25, None, "most-likely").getvalue() != first
+
+    def test_touch_without_change_is_ignored(self, reloadable_data, tmp_path):
+        import pandas as pd
+
+        path = tmp_path / "analysis_data" / "2024.csv"
+        self._rewrite(path, pd.read_csv(path))
+        assert reloadable_data.reload_changed_data() is None
+
+    def test_restart_maps_the_snapshot(self, reloadable_data, monkeypatch, mocker):
+        from services.data_reload import FileWatcher
+
+        anal = reloadable_data
+        before = anal.df.sort_values(["year", "campus", "branch"]).reset_index(
+            drop=True
+        )
+
+        # a fresh process: nothing loaded yet, every file unseen
+        monkeypatch.setattr(anal, "_analysis_frames", {})
+        monkeypatch.setattr(anal, "_analysis_watcher", FileWatcher())
+        monkeypatch.setattr(anal, "_prediction_watcher", FileWatcher())
+        monkeypatch.setattr(anal, "PREDICTIONS", {})
+        read_csv = mocker.spy(anal.pd, "read_csv")
+
+        anal.reload_changed_data()
+
+        assert read_csv.call_count == 0
+        after = anal.df.sort_values(["year", "campus", "branch"]).reset_index(drop=True)
+        assert after.equals(before)
+        assert "most-likely" in anal.PREDICTIONS
+
+    def test_stale_snapshot_is_rebuilt(self, reloadable_data, tmp_path):
+        from services.snapshot import Snapshot
+
+        anal = reloadable_data
+        path = tmp_path / "analysis_data" / "2025.csv"
+        frame = anal.df[anal.df["year"] == 2025].assign(marks=1)
+        self._rewrite(path, frame)
+        anal.reload_changed_data()
+
+        snapshot = Snapshot.open(anal.SNAPSHOT_PATH)
+        assert snapshot.is_fresh(str(path))
+        assert set(snapshot.frame(str(path))["marks"]) == {1}
+
+    def test_live_predictions_follow_the_reference_rows(
+        self, reloadable_data, monkeypatch, tmp_path
+    ):
+        import os
+
+        import pandas as pd
+
+        from services.render_jobs import live_predict_key
+
+        anal = reloadable_data
+        monkeypatch.setattr(
+            anal,
+            "MODEL_DIR",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "models"),
+        )
+        anal.reload_changed_model()
+        tag = anal.live_model_tag()
+        anal.get_live_predictions(25, "pilani", 0.65)
+        anal.get_live_predictions(25, "goa", 0.65)
+
+        # new marks leave the latest year's (campus, branch) pairs alone
+        path = tmp_path / "analysis_data" / "2025.csv"
+        frame = pd.read_csv(path)
+        frame["marks"] += 5
+        self._rewrite(path, frame)
+        change = anal.reload_changed_data()
+        assert change.live_campuses == frozenset()
+        assert anal._get_live_prediction_bytes.cache_info()["size"] == 2
+        assert not any(
+            key.startswith("predict_d") for key in anal.affected_url_keys(change)
+        )
+
+        # goa losing a branch only moves goa's predictions and the all-campus table
+        dropped = (frame["campus"] == "Goa") & (frame["branch"] == "B.E. Mechanical")
+        self._rewrite(path, frame[~dropped])
+        change = anal.reload_changed_data()
+        assert change.live_campuses == {"goa"}
+        assert anal._get_live_prediction_bytes.cache_info()["size"] == 1
+
+        keys = anal.affected_url_keys(change)
+        assert live_predict_key(0.65, "goa", tag) in keys
+        assert live_predict_key(0.0, None, tag) in keys
+        assert live_predict_key(1.0, "goa", tag) in keys
+        assert live_predict_key(0.65, "pilani", tag) not in keys
+
+        # a new latest year moves every campus
+        frame.assign(year=2026).to_csv(path.with_name("2026.csv"), index=False)
+        change = anal.reload_changed_data()
+        assert change.live_campuses == {"goa", "hyderabad", "pilani"}
+        assert anal._get_live_prediction_bytes.cache_info()["size"] == 0
+
+
+class TestDatabaseSource:
+    def test_renders_and_reloads_from_the_tables(
+        self, analytics_data, cutoff_repo, ingest_cutoffs, monkeypatch, mocker
+    ):
+        anal = analytics_data
+        monkeypatch.setattr(anal, "DATA_SOURCE", "database")
+        monkeypatch.setattr(anal, "_cutoff_repository", lambda: cutoff_repo)
+        monkeypatch.setattr(anal, "_database_version", None)
+
+        change = anal.reload_changed_data()
+        assert change.campuses == {"goa", "hyderabad", "pilani"}
+        assert change.scenarios == {"most-likely"}
+        assert anal.reload_changed_data() is None
+
+        keys = {job.key for job in anal.render_jobs()}
+        assert select_key(2024, "Hyderabad") in keys
+        assert "predict_most-likely_all" in keys
+
+        assert anal.plot_marks_by_campus("pilani").getvalue().startswith(b"\x89PNG")
+        assert anal.select(25, 2025, "Goa").getvalue().startswith(b"\x89PNG")
+        predictions = mocker.spy(cutoff_repo, "predictions")
+        assert anal.get_predictions(25, "goa", "most-likely") is not None
+        predictions.assert_called_once_with("most-likely", "goa")
+
+        # the url keys of a reload come from the campus list, not from the predictions table
+        predictions.reset_mock()
+        assert predict_key("most-likely", "hyderabad") in anal.affected_url_keys(change)
+        predictions.assert_not_called()
+
+        # an ingest is picked up by the next poll and drops what was rendered from the tables
+        ingest_cutoffs()
+        assert anal.reload_changed_data() is not None
+        assert anal._get_campus_plot_bytes.cache_info()["size"] == 0
+
+
+class TestEvictableCache:
+    def test_evict_and_in_flight_results(self):
+        from services.lru import evictable_lru_cache
+
+        calls = []
+
+        @evictable_lru_cache(maxsize=2)
+        def square(x):
+            calls.append(x)
+            if x == 3:
+                # a reload landing while this value is being computed
+                square.evict(lambda _: False)
+            return x * x
+
+        square(1), square(2), square(1)
+        assert calls == [1, 2]
+        assert square.evict(lambda x: x == 2) == 1
+        square(2)
+        assert calls == [1, 2, 2]
+
+        square(3), square(3)
+        assert calls == [1, 2, 2, 3, 3]
+        assert square.cache_info()["size"] == 2
+
+
+class TestLivePredictions:
+    def test_render_and_cache_key(self, analytics_data, monkeypatch):
+        import os
+
+        from services.render_jobs import live_predict_key
+
+        monkeypatch.setattr(
+            analytics_data,
+            "MODEL_DIR",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "models"),
+        )
+        monkeypatch.setattr(analytics_data, "_live_predictor", None)
+
+        image = analytics_data.get_live_predictions(25, "pilani", 0.65)
+        assert image.getvalue().startswith(b"\x89PNG")
+        assert analytics_data.get_live_predictions(25, "delhi", 0.65) is None
+
+        # 0.651 lands on the same quantized difficulty and is served from memory
+        before = analytics_data._get_live_prediction_bytes.cache_info()["hits"]
+        analytics_data.get_live_predictions(25, "pilani", 0.651)
+        assert (
+            analytics_data._get_live_prediction_bytes.cache_info()["hits"] == before + 1
+        )
+
+        tag = analytics_data.live_model_tag()
+        assert live_predict_key(0.65, "pilani", tag) == live_predict_key(
+            0.651, "pilani", tag
+        )
+
+    def test_retrained_model_is_picked_up(self, analytics_data, monkeypatch, tmp_path):
+        import os
+        import pickle
+        import shutil
+
+        from services.data_reload import FileWatcher
+
+        model_dir = tmp_path / "models"
+        shutil.copytree(
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "models"),
+            model_dir,
+        )
+        monkeypatch.setattr(analytics_data, "MODEL_DIR", str(model_dir))
+        monkeypatch.setattr(analytics_data, "_model_watcher", FileWatcher())
+        monkeypatch.setattr(analytics_data, "_live_predictor", None)
+        monkeypatch.setattr(analytics_data, "_model_tag", None)
+
+        analytics_data.reload_changed_model()
+        first = analytics_data.get_live_predictions(25, "pilani", 0.65).getvalue()
+        tag = analytics_data.live_model_tag()
+        assert not analytics_data.reload_changed_model()
+
+        # a retrain writes new pickles, the old numpy export no longer matches them
+        with open(model_dir / "model.pkl", "rb") as f:
+            model = pickle.load(f)
+        model.steps[-1][1].intercept_ += 20
+        with open(model_dir / "model.pkl", "wb") as f:
+            pickle.dump(model, f)
+
+        assert analytics_data.reload_changed_model()
+        assert analytics_data._get_live_prediction_bytes.cache_info()["size"] == 0
+        assert analytics_data.live_model_tag() != tag
+        assert (
+            analytics_data.get_live_predictions(25, "pilani", 0.65).getvalue() != first
+        )
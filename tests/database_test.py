@@ -1,4 +1,12 @@
-from sqlalchemy import Integer, BigInteger, String, Date
+import asyncio
+from datetime import date, datetime, UTC
+import pytest
+from sqlalchemy import Integer, BigInteger, String, Date, create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import QueuePool
+from database.connection import session_scope, watch_pool, pool_stats
+from database.models import UserExam
+from database.repository import ExamRepository
 
 
 # basic tests to assert datatype & existence.
@@ -15,3 +23,246 @@ class TestDatabase:
         actual_columns = set(exam_columns.keys())
 
         assert actual_columns == expected_columns
+
+
+class TestAsyncExamRepository:
+    def test_set_and_get(self, async_repo):
+        async def scenario():
+            await async_repo.set_user_exam(123, "testuser", 456, date(2026, 4, 15))
+            return await async_repo.get_user_exam(123)
+
+        user_exam = asyncio.run(scenario())
+        assert user_exam.username == "testuser"
+        assert user_exam.exam_date == date(2026, 4, 15)
+        assert user_exam.channel_id == 456
+
+    def test_set_updates_existing(self, async_repo):
+        async def scenario():
+            await async_repo.set_user_exam(123, "testuser", 456, date(2026, 4, 15))
+            await async_repo.set_user_exam(123, "renamed", 789, date(2026, 5, 24))
+            return await async_repo.get_all_users()
+
+        users = asyncio.run(scenario())
+        assert len(users) == 1
+        assert users[0].username == "renamed"
+        assert users[0].exam_date == date(2026, 5, 24)
+
+    def test_delete(self, async_repo):
+        async def scenario():
+            await async_repo.set_user_exam(123, "testuser", 456, date(2026, 4, 15))
+            first = await async_repo.delete_user_exam(123)
+            second = await async_repo.delete_user_exam(123)
+            return first, second, await async_repo.get_user_exam(123)
+
+        assert asyncio.run(scenario()) == (True, False, None)
+
+
+class TestExamRepository:
+    def test_each_call_uses_a_fresh_session(self, repo):
+        repo.set_user_exam(123, "testuser", 456, date(2026, 4, 15))
+        first = repo.get_user_exam(123)
+        repo.set_user_exam(123, "testuser", 456, date(2026, 5, 24))
+
+        # rows are detached copies, a later write is only visible on a new read
+        assert first.exam_date == date(2026, 4, 15)
+        assert repo.get_user_exam(123).exam_date == date(2026, 5, 24)
+
+    def test_delete(self, repo):
+        repo.set_user_exam(123, "testuser", 456, date(2026, 4, 15))
+        assert repo.delete_user_exam(123) is True
+        assert repo.delete_user_exam(123) is False
+        assert repo.get_all_users() == []
+
+    def test_session_scope_rolls_back(self, session_factory, async_session_factory):
+        with (
+            pytest.raises(RuntimeError),
+            session_scope(session_factory) as session,
+        ):
+            session.add(
+                UserExam(user_id=1, username="x", channel_id=2, exam_date=date.today())
+            )
+            session.flush()
+            raise RuntimeError("boom")
+
+        assert ExamRepository(async_session_factory).get_all_users() == []
+
+
+class TestPoolStats:
+    def test_peak_checkouts_are_tracked(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=2,
+        )
+        watch_pool(engine)
+
+        first, second = engine.connect(), engine.connect()
+        stats = pool_stats(engine)
+        first.close()
+        second.close()
+
+        assert stats["checked_out"] == 2
+        assert stats["overflow"] == 1
+        assert stats["checkouts"] == 2
+        assert pool_stats(engine)["peak_checked_out"] == 2
+        assert pool_stats(engine)["checked_out"] == 0
+
+
+class TestReminderCandidates:
+    def test_only_matching_dates_are_returned(self, repo):
+        repo.set_user_exam(1, "a", 10, date(2026, 4, 15))
+        repo.set_user_exam(2, "b", 20, date(2026, 4, 16))
+        repo.set_user_exam(3, "c", 30, date(2025, 4, 15))
+
+        rows = list(
+            repo.iter_reminder_candidates([date(2026, 4, 15), date(2026, 4, 16)])
+        )
+        assert [(r.user_id, r.channel_id) for r in rows] == [(1, 10), (2, 20)]
+
+    def test_pages_hold_no_connection(self, async_session_factory, monkeypatch):
+        from database import repository
+        from database.connection import run_sync
+
+        # a pooled engine on the same file, the fixture's NullPool has nothing to count
+        engine = create_async_engine(async_session_factory.kw["bind"].url)
+        repo = ExamRepository(async_sessionmaker(bind=engine, expire_on_commit=False))
+        monkeypatch.setattr(repository, "STREAM_BATCH_SIZE", 2)
+        for user_id in range(5):
+            repo.set_user_exam(user_id, "u", 10, date(2026, 4, 15 + user_id % 2))
+
+        rows = repo.iter_reminder_candidates([date(2026, 4, 15), date(2026, 4, 16)])
+        first = next(rows)
+        # a caller that stops here has nothing checked out of the pool
+        assert pool_stats(engine)["checked_out"] == 0
+
+        rest = [(row.exam_date.day, row.user_id) for row in rows]
+        assert [(first.exam_date.day, first.user_id), *rest] == [
+            (15, 0),
+            (15, 2),
+            (15, 4),
+            (16, 1),
+            (16, 3),
+        ]
+        run_sync(engine.dispose())
+
+    def test_async_stream(self, async_repo):
+        async def scenario():
+            await async_repo.set_user_exam(1, "a", 10, date(2026, 4, 15))
+            await async_repo.set_user_exam(2, "b", 20, date(2026, 5, 15))
+            return [
+                row.user_id
+                async for row in async_repo.stream_reminder_candidates(
+                    [date(2026, 5, 15)]
+                )
+            ]
+
+        assert asyncio.run(scenario()) == [2]
+
+    def test_exam_date_is_indexed(self):
+        indexed = {
+            column.name
+            for index in UserExam.__table__.indexes
+            for column in index.columns
+        }
+        assert "exam_date" in indexed
+
+
+class TestReminderDeliveries:
+    @staticmethod
+    def _row(user_id, window_days):
+        return {
+            "user_id": user_id,
+            "exam_date": date(2026, 4, 15),
+            "window_days": window_days,
+            "channel_id": 10,
+            "delivered_at": datetime(2026, 4, 8, 3, 30, tzinfo=UTC),
+        }
+
+    def test_deliveries_are_idempotent(self, repo):
+        repo.record_deliveries([self._row(1, 7), self._row(2, 7)])
+        repo.record_deliveries([self._row(1, 7), self._row(1, 6)])
+
+        assert repo.get_delivered_keys([date(2026, 4, 15)]) == {
+            (1, date(2026, 4, 15), 7),
+            (2, date(2026, 4, 15), 7),
+            (1, date(2026, 4, 15), 6),
+        }
+
+    def test_async_deliveries(self, async_repo):
+        async def scenario():
+            await async_repo.record_deliveries([self._row(1, 7)])
+            await async_repo.record_deliveries([self._row(1, 7)])
+            return await async_repo.get_delivered_keys([date(2026, 4, 15)])
+
+        assert asyncio.run(scenario()) == {(1, date(2026, 4, 15), 7)}
+
+
+class TestCutoffRepository:
+    def test_campus_slices(self, cutoff_repo):
+        rows = cutoff_repo.campus(" pilani ")
+        assert len(rows) == 6
+        assert {row[0] for row in rows} == {"Pilani"}
+        # in the order they were ingested, which the campus plot colours its branches by
+        assert [(row[1], row[3]) for row in rows[:3]] == [
+            ("B.E. Computer Science", 2023),
+            ("B.E. Mechanical", 2023),
+            ("B.E. Computer Science", 2024),
+        ]
+
+        branch = cutoff_repo.campus_branch("goa", "b.e. mechanical")
+        assert branch == [
+            ("Goa", "B.E. Mechanical", 243, 2023),
+            ("Goa", "B.E. Mechanical", 244, 2024),
+            ("Goa", "B.E. Mechanical", 245, 2025),
+        ]
+        assert cutoff_repo.campus("delhi") == []
+
+    def test_year_table_is_sorted_by_marks(self, cutoff_repo):
+        marks = [row[2] for row in cutoff_repo.year(2025)]
+        assert len(marks) == 6
+        assert marks == sorted(marks, reverse=True)
+        assert {row[0] for row in cutoff_repo.year(2025, "hyderabad")} == {"Hyderabad"}
+
+        assert cutoff_repo.years() == [2023, 2024, 2025]
+        assert cutoff_repo.campuses() == ["Goa", "Hyderabad", "Pilani"]
+
+    def test_predictions(self, cutoff_repo):
+        assert cutoff_repo.scenarios() == ["most-likely"]
+        rows = cutoff_repo.predictions("Most-Likely", "goa")
+        assert rows == [
+            ("Goa", "B.E. Computer Science", 315, 2026),
+            ("Goa", "B.E. Mechanical", 245, 2026),
+        ]
+        assert cutoff_repo.predictions("worst") == []
+
+    def test_reingest_replaces_years_and_changes_the_version(
+        self, cutoff_repo, ingest_cutoffs
+    ):
+        version = cutoff_repo.version()
+        assert ingest_cutoffs() == {"cutoffs": 18, "predictions": 6}
+
+        assert len(cutoff_repo.keys()) == 18
+        assert len(cutoff_repo.predictions("most-likely")) == 6
+        assert cutoff_repo.version() != version
+        assert cutoff_repo.version()[0] == version[0]
+
+    def test_lookups_use_the_composite_indexes(self, cutoff_repo, session_factory):
+        from sqlalchemy import text
+
+        with session_factory.kw["bind"].connect() as conn:
+            by_campus = conn.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM cutoffs "
+                    "WHERE campus = 'Goa' AND branch_key = 'b.e. mechanical'"
+                )
+            ).fetchall()
+            by_year = conn.execute(
+                text(
+                    "EXPLAIN QUERY PLAN SELECT * FROM cutoffs "
+                    "WHERE year = 2025 AND campus = 'Goa'"
+                )
+            ).fetchall()
+
+        assert "ix_cutoffs_campus_branch_year" in str(by_campus)
+        assert "ix_cutoffs_year_campus" in str(by_year)
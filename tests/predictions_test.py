@@ -0,0 +1,253 @@
+import os
+import warnings
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import predictions
+
+MODEL_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models")
+
+
+@pytest.fixture
+def model():
+    with warnings.catch_warnings():
+        # the pickles may come from another scikit-learn version
+        warnings.simplefilter("ignore")
+        return predictions.load_model(MODEL_DIR)
+
+
+class TestPredictions:
+    def test_stacked_matches_one_scenario_at_a_time(self, model, cutoffs_df):
+        stacked = predictions.predict_cutoffs(2026, [0.2, 0.8], cutoffs_df, *model)
+
+        for difficulty in (0.2, 0.8):
+            alone = predictions.predict_cutoffs(2026, [difficulty], cutoffs_df, *model)
+            pd.testing.assert_frame_equal(
+                predictions.scenario_frame(stacked, difficulty).reset_index(drop=True),
+                predictions.scenario_frame(alone, difficulty).reset_index(drop=True),
+            )
+
+        assert len(stacked) == 2 * len(
+            cutoffs_df[["campus", "branch"]].drop_duplicates()
+        )
+
+    def test_cli_writes_every_scenario_and_the_sweep(self, tmp_path, cutoffs_df):
+        reference = tmp_path / "cutoff_2025.csv"
+        cutoffs_df[cutoffs_df["year"] == 2025].to_csv(reference, index=False)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            predictions.main(
+                [
+                    "--reference",
+                    str(reference),
+                    "--models",
+                    MODEL_DIR,
+                    "--output-dir",
+                    str(tmp_path / "predict"),
+                    "--sweep",
+                    "0",
+                    "1",
+                    "0.25",
+                ]
+            )
+
+        written = sorted(os.listdir(tmp_path / "predict"))
+        assert written == [
+            "best_case.csv",
+            "difficulty_sweep.csv",
+            "most_likely_case.csv",
+            "worst_case.csv",
+        ]
+
+        worst = pd.read_csv(tmp_path / "predict" / "worst_case.csv")
+        assert list(worst.columns) == ["campus", "branch", "marks", "year"]
+        assert worst["marks"].is_monotonic_decreasing
+
+        sweep = pd.read_csv(tmp_path / "predict" / "difficulty_sweep.csv")
+        assert sorted(sweep["difficulty"].unique()) == [0, 0.25, 0.5, 0.75, 1.0]
+
+
+class TestLivePredictor:
+    @pytest.fixture
+    def predictor(self, cutoffs_df):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            predictor = predictions.LivePredictor(MODEL_DIR)
+        predictor.set_reference(cutoffs_df[cutoffs_df["year"] == 2025], 2026)
+        return predictor
+
+    def test_matches_the_batch_path(self, predictor, model, cutoffs_df):
+        stacked = predictions.predict_cutoffs(
+            2026, [0.65], cutoffs_df[cutoffs_df["year"] == 2025], *model
+        )
+        pd.testing.assert_frame_equal(
+            predictor.predict(0.65),
+            predictions.scenario_frame(stacked, 0.65).reset_index(drop=True),
+        )
+
+    def test_memoized_by_quantized_difficulty(self, predictor, mocker, cutoffs_df):
+        spy = mocker.spy(predictor.model, "predict")
+
+        first = predictor.predict(0.651)
+        assert predictor.predict(0.649) is first
+        assert spy.call_count == 1
+
+        # same pairs, same grid: the memo survives
+        predictor.set_reference(cutoffs_df[cutoffs_df["year"] == 2024], 2026)
+        assert predictor.predict(0.65) is first
+
+        predictor.set_reference(cutoffs_df[cutoffs_df["campus"] == "Goa"], 2026)
+        assert set(predictor.predict(0.65)["campus"]) == {"Goa"}
+        assert spy.call_count == 2
+
+
+class TestNumpyModel:
+    def test_parity_with_sklearn(self, model, cutoffs_df, tmp_path):
+        from services.numpy_model import NumpyModel, export_model
+
+        path = tmp_path / "model.npz"
+        export_model(*model, path)
+        runtime = NumpyModel(path)
+
+        grid = predictions.predict_cutoffs(
+            2026, np.linspace(0, 1, 21).tolist(), cutoffs_df, *model
+        )[["campus", "branch", "year", "difficulty"]]
+        grid.loc[0, "branch"] = "B.Sc. Astrology"
+
+        preprocessor, fitted = model
+        expected = fitted.predict(preprocessor.transform(grid))
+        np.testing.assert_allclose(runtime.predict(grid), expected, rtol=0, atol=1e-9)
+        assert np.array_equal(runtime.predict(grid).round(), expected.round())
+
+    def test_only_categories_before_numbers_is_exported(self, cutoffs_df, tmp_path):
+        from sklearn.compose import ColumnTransformer
+        from sklearn.linear_model import LinearRegression
+        from sklearn.pipeline import Pipeline
+        from sklearn.preprocessing import (
+            OneHotEncoder,
+            PolynomialFeatures,
+            StandardScaler,
+        )
+
+        from services.numpy_model import NumpyModel, export_model
+
+        frame = cutoffs_df.assign(difficulty=0.5)
+        features = frame[["campus", "branch", "year", "difficulty"]]
+        steps = {
+            "cat": (OneHotEncoder(handle_unknown="ignore"), ["campus", "branch"]),
+            "num": (StandardScaler(), ["year", "difficulty"]),
+        }
+
+        def fit(order):
+            preprocessor = ColumnTransformer(
+                [(name, *steps[name]) for name in order]
+            ).fit(features)
+            model = Pipeline(
+                [
+                    ("poly", PolynomialFeatures(2, include_bias=False)),
+                    ("linear", LinearRegression()),
+                ]
+            ).fit(preprocessor.transform(features), frame["marks"])
+            return preprocessor, model
+
+        preprocessor, model = fit(["cat", "num"])
+        export_model(preprocessor, model, tmp_path / "model.npz")
+        np.testing.assert_allclose(
+            NumpyModel(tmp_path / "model.npz").predict(features),
+            model.predict(preprocessor.transform(features)),
+            rtol=0,
+            atol=1e-6,
+        )
+
+        # same steps, numbers first: the exported layout would put them in the wrong slots
+        with pytest.raises(ValueError, match="unsupported preprocessor layout"):
+            export_model(*fit(["num", "cat"]), tmp_path / "swapped.npz")
+        assert not (tmp_path / "swapped.npz").exists()
+
+    def test_shipped_artifact_is_current(self):
+        from services.numpy_model import NumpyModel
+
+        # re-run `python -m services.numpy_model` after retraining if this fails
+        assert isinstance(predictions.load_runtime_model(MODEL_DIR), NumpyModel)
+
+
+@pytest.fixture
+def model_data(tmp_path):
+    rng = np.random.default_rng(0)
+    frames = []
+    for year in range(2019, 2026):
+        difficulty = rng.uniform(0.2, 0.8)
+        for campus, base in (("Pilani", 300), ("Goa", 270), ("Hyderabad", 280)):
+            for offset, branch in enumerate(("cse", "ece", "mech", "civil")):
+                frames.append(
+                    {
+                        "campus": campus,
+                        "branch": branch,
+                        "year": year,
+                        "difficulty": difficulty,
+                        "marks": base
+                        - 20 * offset
+                        + 2 * (year - 2019)
+                        - 60 * difficulty
+                        + rng.normal(0, 1),
+                    }
+                )
+    df = pd.DataFrame(frames)
+    directory = tmp_path / "model_data"
+    directory.mkdir()
+    for year, rows in df.groupby("year"):
+        rows.to_csv(directory / f"cutoff_{year}.csv", index=False)
+    return str(directory / "*.csv")
+
+
+class TestTraining:
+    def test_cli_writes_models_metrics_and_the_numpy_artifact(
+        self, tmp_path, model_data
+    ):
+        import train
+
+        args = [
+            "--data",
+            model_data,
+            "--output-dir",
+            str(tmp_path / "models"),
+            "--cache-dir",
+            str(tmp_path / "cache"),
+            "--degrees",
+            "1",
+            "2",
+            "--alphas",
+            "1",
+            "--folds",
+            "3",
+            "--jobs",
+            "1",
+        ]
+        metrics = train.main(args)
+
+        written = sorted(os.listdir(tmp_path / "models"))
+        assert written == ["metrics.json", "model.npz", "model.pkl", "scaler.pkl"]
+        # 2 degrees x (plain + one ridge alpha) + both ensembles
+        assert len(metrics["candidates"]) == 6
+        assert metrics["best"] == metrics["candidates"][0]["model"]
+        assert metrics["test"]["r2"] > 0.9
+
+        frame = pd.DataFrame(
+            {
+                "campus": ["Pilani", "Goa"],
+                "branch": ["cse", "mech"],
+                "year": [2026, 2026],
+                "difficulty": [0.5, 0.5],
+            }
+        )
+        runtime = predictions.load_runtime_model(str(tmp_path / "models"))
+        pickled = predictions.PickledModel(
+            *predictions.load_model(str(tmp_path / "models"))
+        )
+        np.testing.assert_allclose(runtime.predict(frame), pickled.predict(frame))
+
+        # same data again: the design matrix comes from the cache, the result is identical
+        assert train.main(args) == metrics
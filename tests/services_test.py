@@ -1,5 +1,37 @@
-from datetime import date
-from unittest.mock import Mock, patch
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from datetime import UTC, date, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+import discord
+import pandas as pd
+import pytest
+import requests
+
+from services import logging_config, scraper
+from services.analytics_service import AnalyticsService
+from services.arguments import split_difficulty
+from services.branches import normalize_branch_name
+from services.dataset import DatabaseDataset, DatabasePredictions, IndexedDataset
+from services.dispatcher import MESSAGE_LIMIT, ReminderDispatcher, merge_reminders
+from services.metrics import Registry, start_http_server
+from services.rate_limit import Cooldowns, TokenBucketLimiter, rate_limited
+from services.reminder import AsyncReminder
+from services.render_cache import RenderCache
+from services.render_jobs import RenderJob
+from services.single_flight import SingleFlight
+from services.snapshot import Snapshot, write_snapshot
+from services.url_cache import URLCache, refresh_expiring, url_expiry
+from services.warmup import warm_renders
+
+
+async def async_rows(rows):
+    for row in rows:
+        yield row
 
 
 # a lot of unit-tests from here and on.
@@ -92,7 +124,7 @@ class TestReminder:
         mock_user.exam_date = date(2026, 4, 15)
         mock_user.channel_id = 456
 
-        mock_repo.get_all_users.return_value = [mock_user]
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
         reminders = reminder.users_to_remind()
 
         assert len(reminders) == 1
@@ -110,7 +142,7 @@ class TestReminder:
         mock_user.exam_date = date(2026, 4, 15)
         mock_user.channel_id = 456
 
-        mock_repo.get_all_users.return_value = [mock_user]
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
         reminders = reminder.users_to_remind()
 
         assert len(reminders) == 1
@@ -125,7 +157,7 @@ class TestReminder:
         mock_user.exam_date = date(2026, 4, 15)
         mock_user.channel_id = 456
 
-        mock_repo.get_all_users.return_value = [mock_user]
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
         reminders = reminder.users_to_remind()
 
         assert len(reminders) == 1
@@ -141,7 +173,7 @@ class TestReminder:
         mock_user.exam_date = date(2026, 4, 15)
         mock_user.channel_id = 456
 
-        mock_repo.get_all_users.return_value = [mock_user]
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
         reminders = reminder.users_to_remind()
 
         assert len(reminders) == 1
@@ -158,7 +190,7 @@ class TestReminder:
         mock_user.exam_date = today
         mock_user.channel_id = 456
 
-        mock_repo.get_all_users.return_value = [mock_user]
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
 
         reminders = reminder.users_to_remind()
 
@@ -185,7 +217,9 @@ class TestReminder:
         user3.exam_date = date(2026, 5, 1)
         user3.channel_id = 111
 
-        mock_repo.get_all_users.return_value = [user1, user2, user3]
+        mock_repo.stream_reminder_candidates.return_value = async_rows(
+            [user1, user2, user3]
+        )
         reminders = reminder.users_to_remind()
 
         assert len(reminders) == 2
@@ -195,6 +229,1006 @@ class TestReminder:
     @patch("services.reminder.date")
     def test_empty_user_list(self, mock_date_class, reminder, mock_repo):
         mock_date_class.today.return_value = date(2026, 4, 15)
-        mock_repo.get_all_users.return_value = []
+        mock_repo.stream_reminder_candidates.return_value = async_rows([])
         reminders = reminder.users_to_remind()
         assert len(reminders) == 0
+
+    @patch("services.reminder.date")
+    def test_only_reminder_windows_are_queried(
+        self, mock_date_class, reminder, mock_repo
+    ):
+        mock_date_class.today.return_value = date(2026, 4, 15)
+        mock_repo.stream_reminder_candidates.return_value = async_rows([])
+        reminder.users_to_remind()
+
+        (exam_dates,), _ = mock_repo.stream_reminder_candidates.call_args
+        assert sorted(exam_dates) == [
+            date(2026, 4, 15),
+            date(2026, 4, 16),
+            date(2026, 4, 17),
+            date(2026, 4, 18),
+            date(2026, 4, 19),
+            date(2026, 4, 20),
+            date(2026, 4, 21),
+            date(2026, 4, 22),
+            date(2026, 5, 15),
+        ]
+
+    @patch("services.reminder.date")
+    def test_delivered_reminders_are_skipped(
+        self, mock_date_class, reminder, mock_repo
+    ):
+        mock_date_class.today.return_value = date(2026, 4, 14)
+
+        mock_user = Mock()
+        mock_user.user_id = 123
+        mock_user.exam_date = date(2026, 4, 15)
+        mock_user.channel_id = 456
+
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
+        mock_repo.get_delivered_keys.return_value = {(123, date(2026, 4, 15), 1)}
+
+        assert reminder.users_to_remind() == []
+
+    @patch("services.reminder.date")
+    def test_mark_delivered_writes_one_batch(
+        self, mock_date_class, reminder, mock_repo
+    ):
+        mock_date_class.today.return_value = date(2026, 4, 14)
+
+        mock_user = Mock()
+        mock_user.user_id = 123
+        mock_user.exam_date = date(2026, 4, 15)
+        mock_user.channel_id = 456
+
+        mock_repo.stream_reminder_candidates.return_value = async_rows([mock_user])
+        reminder.mark_delivered(reminder.users_to_remind())
+
+        (rows,), _ = mock_repo.record_deliveries.call_args
+        assert len(rows) == 1
+        assert rows[0]["window_days"] == 1
+        assert rows[0]["exam_date"] == date(2026, 4, 15)
+
+
+class TestAsyncExamTracker:
+    @patch("services.exam_tracker.date")
+    def test_set_exam_date(self, mock_date_class, async_tracker, mock_async_repo):
+        mock_date_class.today.return_value = date(2026, 1, 1)
+        exam_date = date(2026, 4, 15)
+        result = asyncio.run(
+            async_tracker.set_exam_date(123, "testuser", 456, exam_date)
+        )
+        mock_async_repo.set_user_exam.assert_awaited_once_with(
+            123, "testuser", 456, exam_date
+        )
+        assert "**104 days** remaining" in result
+
+    @patch("services.exam_tracker.date")
+    def test_countdown(self, mock_date_class, async_tracker, mock_async_repo):
+        mock_date_class.today.return_value = date(2026, 1, 1)
+        mock_exam = Mock()
+        mock_exam.exam_date = date(2026, 4, 15)
+        mock_async_repo.get_user_exam.return_value = mock_exam
+        result = asyncio.run(async_tracker.get_countdown(123))
+        assert "14 weeks and 6 days" in result
+
+    def test_reset(self, async_tracker, mock_async_repo):
+        mock_async_repo.delete_user_exam.return_value = True
+        assert asyncio.run(async_tracker.reset(123)) == "record cleared"
+
+
+class TestReminderDispatcher:
+    @staticmethod
+    def _reminder(user_id, channel_id, message="**5 Days Until BITSAT**"):
+        return {"user_id": user_id, "channel_id": channel_id, "message": message}
+
+    def test_same_channel_is_merged(self, fake_bot):
+        channel = Mock(send=AsyncMock())
+        fake_bot.channels[10] = channel
+        reminders = [self._reminder(user_id, 10) for user_id in (1, 2, 3)]
+
+        stats = asyncio.run(ReminderDispatcher(fake_bot).dispatch(reminders))
+
+        channel.send.assert_awaited_once()
+        text = channel.send.call_args.args[0]
+        assert "<@1>" in text and "<@2>" in text and "<@3>" in text
+        assert (stats.sent, stats.merged, stats.failed) == (1, 2, 0)
+
+    def test_zero_concurrency_is_rejected(self, fake_bot):
+        with pytest.raises(ValueError):
+            ReminderDispatcher(fake_bot, concurrency=0)
+
+    def test_merged_messages_respect_length_limit(self):
+        reminders = [self._reminder(user_id, 10, "x" * 900) for user_id in range(5)]
+        batches = merge_reminders(reminders)
+
+        assert [len(batch) for _, batch in batches] == [2, 2, 1]
+        assert all(len(text) <= MESSAGE_LIMIT for text, _ in batches)
+
+    def test_forbidden_channel_falls_back_to_cached_user(self, fake_bot):
+        response = Mock(status=403, reason="Forbidden")
+        channel = Mock(send=AsyncMock(side_effect=discord.Forbidden(response, "no")))
+        fake_bot.channels[10] = channel
+        user = Mock(send=AsyncMock())
+        fake_bot.get_user.return_value = user
+
+        stats = asyncio.run(
+            ReminderDispatcher(fake_bot).dispatch([self._reminder(1, 10)])
+        )
+
+        user.send.assert_awaited_once_with("**5 Days Until BITSAT**")
+        fake_bot.fetch_user.assert_not_awaited()
+        assert (stats.sent, stats.dm_fallback) == (0, 1)
+
+    def test_missing_channel_fetches_user(self, fake_bot):
+        user = Mock(send=AsyncMock())
+        fake_bot.fetch_user.return_value = user
+
+        stats = asyncio.run(
+            ReminderDispatcher(fake_bot).dispatch([self._reminder(1, 99)])
+        )
+
+        fake_bot.fetch_user.assert_awaited_once_with(1)
+        assert stats.dm_fallback == 1
+
+    def test_failures_are_counted(self, fake_bot):
+        response = Mock(status=503, reason="Service Unavailable")
+        fake_bot.channels[10] = Mock(
+            send=AsyncMock(side_effect=discord.HTTPException(response, "down"))
+        )
+        fake_bot.channels[20] = Mock(send=AsyncMock())
+        reminders = [
+            self._reminder(1, 10),
+            self._reminder(2, 10),
+            self._reminder(3, 20),
+        ]
+
+        stats = asyncio.run(
+            ReminderDispatcher(fake_bot, concurrency=2).dispatch(reminders)
+        )
+
+        assert (stats.sent, stats.merged, stats.failed) == (1, 0, 2)
+
+    def test_delivered_batches_are_reported(self, fake_bot):
+        fake_bot.channels[10] = Mock(send=AsyncMock())
+        fake_bot.get_user.return_value = Mock(send=AsyncMock())
+        on_delivered = AsyncMock()
+        reminders = [
+            self._reminder(1, 10),
+            self._reminder(2, 10),
+            self._reminder(3, 99),
+        ]
+
+        asyncio.run(
+            ReminderDispatcher(fake_bot, on_delivered=on_delivered).dispatch(reminders)
+        )
+
+        delivered = [
+            r["user_id"] for call in on_delivered.await_args_list for r in call.args[0]
+        ]
+        assert sorted(delivered) == [1, 2, 3]
+
+
+class TestAsyncReminderLedger:
+    def test_restart_does_not_resend(self, async_repo):
+        exam_date = date.today() + timedelta(days=7)
+
+        async def run_once():
+            with patch(
+                "services.reminder.AsyncExamRepository", return_value=async_repo
+            ):
+                reminder = AsyncReminder()
+            reminders = await reminder.users_to_remind()
+            await reminder.mark_delivered(reminders)
+            await reminder.flush_deliveries()
+            return reminders
+
+        async def scenario():
+            await async_repo.set_user_exam(123, "testuser", 456, exam_date)
+            return await run_once(), await run_once()
+
+        first, second = asyncio.run(scenario())
+        assert [r["user_id"] for r in first] == [123]
+        assert second == []
+
+    def test_restart_after_a_day_long_outage(self, async_repo):
+        from datetime import datetime
+
+        today = date.today()
+        yesterday = today - timedelta(days=1)
+
+        with patch("services.reminder.AsyncExamRepository", return_value=async_repo):
+            reminder = AsyncReminder()
+
+        async def scenario():
+            # the bot last sent something two days ago and was down all of yesterday, when
+            # 123's 30-day and 456's 7-day windows came due
+            await async_repo.record_deliveries(
+                [
+                    {
+                        "user_id": 1,
+                        "exam_date": today + timedelta(days=5),
+                        "window_days": 7,
+                        "channel_id": 1,
+                        "delivered_at": datetime.now(UTC) - timedelta(days=2),
+                    }
+                ]
+            )
+            await async_repo.set_user_exam(123, "a", 10, today + timedelta(days=29))
+            await async_repo.set_user_exam(456, "b", 20, today + timedelta(days=6))
+
+            since = await reminder.missed_since(today)
+            before_nine = await reminder.users_to_remind(since, yesterday)
+            caught_up = await reminder.users_to_remind(since, today)
+            await reminder.mark_delivered(caught_up)
+            await reminder.flush_deliveries()
+            return (
+                since,
+                before_nine,
+                caught_up,
+                await reminder.users_to_remind(since, today),
+                await reminder.users_to_remind(),
+            )
+
+        since, before_nine, caught_up, again, daily = asyncio.run(scenario())
+        assert since == today - timedelta(days=2)
+
+        # before 09:00 only the missed window goes out, 456's is superseded by today's
+        assert [(r["user_id"], r["window_days"]) for r in before_nine] == [(123, 30)]
+        assert "**29 Days Until BITSAT**" in before_nine[0]["message"]
+
+        assert [(r["user_id"], r["window_days"]) for r in caught_up] == [
+            (456, 6),
+            (123, 30),
+        ]
+        assert "**6 Days Until BITSAT**" in caught_up[0]["message"]
+        assert again == [] and daily == []
+
+
+class TestURLCache:
+    @staticmethod
+    def _url(expires_at, name="plot.png"):
+        return f"https://cdn.discordapp.com/attachments/1/2/{name}?ex={expires_at:x}&is=0&hm=abc&"
+
+    def test_expiry_is_parsed(self):
+        assert url_expiry(self._url(0x66B8A4C1)) == 0x66B8A4C1
+        assert url_expiry("https://example.com/plot.png") is None
+
+    def test_entries_survive_restart(self, tmp_path):
+        url = self._url(int(time.time()) + 86400)
+        URLCache(str(tmp_path / "urls.db")).set("plot_pilani", url)
+
+        reopened = URLCache(str(tmp_path / "urls.db"))
+        assert reopened.get("plot_pilani") == url
+        assert reopened.stats()["hits"] == 1
+
+    def test_near_expiry_is_a_miss(self, tmp_path):
+        cache = URLCache(str(tmp_path / "urls.db"), refresh_margin=3600)
+        cache.set("plot_goa", self._url(int(time.time()) + 600))
+
+        assert cache.get("plot_goa") is None
+        assert cache.stats()["refreshes"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_least_recently_used_is_evicted(self, tmp_path):
+        cache = URLCache(str(tmp_path / "urls.db"), max_entries=2)
+        expires_at = int(time.time()) + 86400
+        cache.set("a", self._url(expires_at, "a.png"))
+        cache.set("b", self._url(expires_at, "b.png"))
+        cache.get("a")
+        cache.set("c", self._url(expires_at, "c.png"))
+
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+        assert len(URLCache(str(tmp_path / "urls.db"))) == 2
+
+    def test_expiring_urls_are_renewed_before_they_miss(self, tmp_path):
+        cache = URLCache(str(tmp_path / "urls.db"), refresh_margin=3600)
+        now = int(time.time())
+        soon, later = (
+            self._url(now + 5400, "soon.png"),
+            self._url(now + 86400, "later.png"),
+        )
+        cache.set("soon", soon)
+        cache.set("later", later)
+        cache.set("gone", self._url(now + 5400, "gone.png"))
+
+        async def resolve(urls):
+            resolve.calls.append(urls)
+            # discord leaves out what it cannot refresh, and a reload drops "gone" meanwhile
+            cache.delete(["gone"])
+            return {
+                url: url.replace(f"{now + 5400:x}", f"{now + 90000:x}") for url in urls
+            }
+
+        resolve.calls = []
+        renewed = asyncio.run(refresh_expiring(cache, resolve, 7200, batch_size=1))
+
+        assert renewed == 1
+        assert [len(urls) for urls in resolve.calls] == [1, 1]
+        assert url_expiry(cache.peek("soon")) == now + 90000
+        assert cache.peek("later") == later
+        assert cache.peek("gone") is None
+        assert cache.stats()["renewed"] == 1
+        # the renewal is persisted, a restart does not bring the expiring url back
+        reopened = URLCache(str(tmp_path / "urls.db"), refresh_margin=3600)
+        assert reopened.expiring(7200) == []
+
+
+class TestWarmup:
+    def test_every_job_is_rendered_and_uploaded(self):
+        jobs = [RenderJob(f"key{i}", "render", (i,)) for i in range(3)]
+        render = AsyncMock(side_effect=[b"png", None, RuntimeError("boom")])
+        upload = AsyncMock(return_value=True)
+
+        stats = asyncio.run(warm_renders(jobs, render, upload, pause=0))
+
+        assert render.await_count == 3
+        upload.assert_awaited_once_with(jobs[0], b"png")
+        assert (stats["rendered"], stats["uploaded"], stats["failed"]) == (1, 1, 1)
+
+
+class TestRenderCache:
+    def test_rendered_once_then_served_from_disk(self, tmp_path):
+        render = Mock(return_value=b"png-bytes")
+        RenderCache(str(tmp_path)).get_or_render("plot", ("pilani",), [1, 2], render)
+
+        restarted = RenderCache(str(tmp_path))
+        assert (
+            restarted.get_or_render("plot", ("pilani",), [1, 2], render) == b"png-bytes"
+        )
+        assert render.call_count == 1
+        assert restarted.stats()["hits"] == 1
+
+    def test_changed_data_changes_the_key(self, tmp_path, cutoffs_df):
+        cache = RenderCache(str(tmp_path))
+        changed = cutoffs_df.copy()
+        changed.loc[0, "marks"] += 1
+
+        assert cache.key("plot", ("pilani",), cutoffs_df) != cache.key(
+            "plot", ("pilani",), changed
+        )
+        assert cache.key("plot", ("pilani",), cutoffs_df) == cache.key(
+            "plot", ("pilani",), cutoffs_df.copy()
+        )
+
+    def test_size_budget_evicts_least_recently_used(self, tmp_path):
+        cache = RenderCache(str(tmp_path), max_bytes=25)
+        for name in ("a", "b", "c"):
+            cache.put(name, b"x" * 10)
+            past = time.time() - {"a": 30, "b": 20, "c": 10}[name]
+            os.utime(tmp_path / f"{name}.png", (past, past))
+        cache.put("d", b"x" * 10)
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["c.png", "d.png"]
+        assert cache.stats()["evictions"] == 2
+
+    def test_overwriting_a_key_keeps_the_size_right(self, tmp_path):
+        cache = RenderCache(str(tmp_path), max_bytes=25)
+        cache.put("a", b"x" * 10)
+        cache.put("a", b"x" * 12)
+        cache.put("a", b"x" * 12)
+
+        assert cache.stats()["bytes"] == 12
+        assert cache.stats()["evictions"] == 0
+
+
+class TestIndexedDataset:
+    def test_lookups_match_filters(self, cutoffs_df):
+        dataset = IndexedDataset(cutoffs_df)
+
+        rows = dataset.campus(" GOA ")
+        expected = cutoffs_df[cutoffs_df["campus"] == "Goa"]
+        assert sorted(rows.marks.tolist()) == sorted(expected["marks"].tolist())
+        assert set(rows.campus) == {"Goa"}
+
+        rows = dataset.campus_branch("pilani", "b.e. mechanical")
+        assert rows.year.tolist() == [2023, 2024, 2025]
+        assert rows.marks.tolist() == [263, 264, 265]
+
+        assert dataset.campus("delhi") is None
+        assert dataset.campus_branch("goa", "b.pharm") is None
+
+    def test_campus_rows_keep_the_source_order(self):
+        # the campus plot colours branches in the order they first appear, like filtering
+        # the source frame did, so neither alphabetical nor year order may leak in
+        frame = pd.DataFrame(
+            [
+                ("Goa", "B.E. Mechanical", 250, 2025),
+                ("Pilani", "B.E. Civil", 270, 2025),
+                ("Goa", "B.E. Civil", 230, 2025),
+                ("Goa", "B.E. Mechanical", 245, 2024),
+                ("Goa", "B.E. Chemical", 240, 2024),
+            ],
+            columns=["campus", "branch", "marks", "year"],
+        )
+        expected = frame[frame["campus"].str.lower() == "goa"].reset_index(drop=True)
+
+        rows = IndexedDataset(frame).campus("goa").to_frame()
+        pd.testing.assert_frame_equal(rows, expected)
+        assert rows["branch"].unique().tolist() == [
+            "B.E. Mechanical",
+            "B.E. Civil",
+            "B.E. Chemical",
+        ]
+
+    def test_year_tables_are_sorted_by_marks(self, cutoffs_df):
+        dataset = IndexedDataset(cutoffs_df)
+
+        everything = dataset.year(2024)
+        assert len(everything.marks) == 6
+        assert everything.marks.tolist() == sorted(everything.marks, reverse=True)
+
+        hyderabad = dataset.year(2024, "Hyderabad").tolist()
+        assert hyderabad == [
+            ["Hyderabad", "B.E. Computer Science", 309, 2024],
+            ["Hyderabad", "B.E. Mechanical", 239, 2024],
+        ]
+        assert dataset.year(1999) is None
+
+    def test_lookups_are_views(self, cutoffs_df):
+        dataset = IndexedDataset(cutoffs_df)
+        first, second = dataset.campus("goa"), dataset.campus("goa")
+
+        assert first.marks.base is not None
+        assert first.marks.base is second.marks.base
+        assert dataset.memory_usage() > 0
+
+    def test_database_dataset_serves_the_same_rows(self, cutoffs_df, cutoff_repo):
+        indexed = IndexedDataset(cutoffs_df)
+        database = DatabaseDataset(cutoff_repo)
+
+        assert (
+            database.campuses() == indexed.campuses() == ["goa", "hyderabad", "pilani"]
+        )
+        assert database.years() == indexed.years() == [2023, 2024, 2025]
+        for lookup, args in (
+            ("campus", ("GOA",)),
+            ("campus_branch", ("pilani", "b.e. mechanical")),
+            ("year", (2024,)),
+            ("year", (2024, "hyderabad")),
+        ):
+            expected = getattr(indexed, lookup)(*args).tolist()
+            assert sorted(getattr(database, lookup)(*args).tolist()) == sorted(expected)
+        assert database.year(2024).tolist() == indexed.year(2024).tolist()
+        assert database.campus("delhi") is None
+
+        predictions = DatabasePredictions(cutoff_repo)
+        assert list(predictions) == ["most-likely"]
+        assert predictions["most-likely"]["marks"].tolist()[0] == 335
+        assert predictions.get("worst") is None
+
+
+class TestSnapshot:
+    def test_round_trip(self, tmp_path, cutoffs_df):
+        source = tmp_path / "cutoffs.csv"
+        cutoffs_df.to_csv(source, index=False)
+        path = str(tmp_path / "data.snapshot")
+
+        write_snapshot({str(source): pd.read_csv(source)}, path)
+        snapshot = Snapshot.open(path)
+
+        assert snapshot.is_fresh(str(source))
+        frame = snapshot.frame(str(source))
+        pd.testing.assert_frame_equal(frame, pd.read_csv(source))
+        # numeric columns come straight out of the memory map
+        assert not frame["marks"].to_numpy().flags.writeable
+
+    def test_touched_source_is_stale(self, tmp_path, cutoffs_df):
+        source = tmp_path / "cutoffs.csv"
+        cutoffs_df.to_csv(source, index=False)
+        path = str(tmp_path / "data.snapshot")
+        write_snapshot({str(source): cutoffs_df}, path)
+
+        stat = os.stat(source)
+        os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        snapshot = Snapshot.open(path)
+        assert not snapshot.is_fresh(str(source))
+        assert not snapshot.is_fresh(str(tmp_path / "other.csv"))
+
+    def test_missing_or_foreign_file(self, tmp_path):
+        assert Snapshot.open(str(tmp_path / "nope.snapshot")) is None
+        (tmp_path / "junk.snapshot").write_bytes(b"not a snapshot")
+        assert Snapshot.open(str(tmp_path / "junk.snapshot")) is None
+
+
+class TestAnalyticsService:
+    def test_loads_once_in_the_background(self, mocker):
+        import_module = mocker.patch(
+            "services.analytics_service.importlib.import_module",
+            return_value="module",
+        )
+        service = AnalyticsService()
+
+        async def run():
+            assert not service.is_ready
+            first = service.start()
+            assert service.start() is first
+            results = await asyncio.gather(service.ready(), service.ready())
+            return results
+
+        assert asyncio.run(run()) == ["module", "module"]
+        assert service.is_ready
+        assert service.load_seconds is not None
+        import_module.assert_called_once_with("analytics")
+
+    def test_failed_load_is_retried(self, mocker):
+        mocker.patch(
+            "services.analytics_service.importlib.import_module",
+            side_effect=[ImportError("no pandas"), "module"],
+        )
+        service = AnalyticsService()
+
+        async def run():
+            try:
+                await service.ready()
+            except ImportError:
+                pass
+            else:
+                raise AssertionError("expected the first load to fail")
+            return await service.ready()
+
+        assert asyncio.run(run()) == "module"
+
+
+class TestBranchNames:
+    def test_alias_and_full_name(self):
+        aliases = {"cse": "B.E. Computer Science"}
+
+        assert normalize_branch_name(" CSE ", aliases) == "B.E. Computer Science"
+        assert (
+            normalize_branch_name("b.e. computer science", aliases)
+            == "B.E. Computer Science"
+        )
+        assert normalize_branch_name("astrology", aliases) is None
+
+
+class TestPredictArguments:
+    def test_trailing_difficulty(self):
+        assert split_difficulty("pilani 0.65") == (0.65, "pilani")
+        assert split_difficulty("goa, .5") == (0.5, "goa")
+        assert split_difficulty("1") == (1.0, "")
+
+    def test_year_like_numbers_are_not_a_difficulty(self):
+        # these go on to the precomputed scenario lookup like before
+        assert split_difficulty("pilani 2026") == (None, "pilani 2026")
+        assert split_difficulty("best 1.5") == (None, "best 1.5")
+        assert split_difficulty("0.5 pilani") == (None, "0.5 pilani")
+
+
+class TestScraper:
+    PAGES = ((2024, "https://cutoffs.test/2024"), (2025, "https://cutoffs.test/2025"))
+
+    def fixture(self, name):
+        with open(os.path.join(os.path.dirname(__file__), "fixtures", name), "rb") as f:
+            return f.read()
+
+    def test_parses_only_the_years_div(self):
+        rows = scraper.parse_cutoffs(self.fixture("bitsat_cutoffs_2025.html"), 2025)
+
+        assert rows == [
+            {
+                "campus": "Pilani",
+                "branch": "B.E. Computer Science",
+                "marks": 327,
+                "year": 2025,
+            },
+            {
+                "campus": "Pilani",
+                "branch": "B.E. Electrical & Electronics",
+                "marks": 285,
+                "year": 2025,
+            },
+            {
+                "campus": "Goa",
+                "branch": "B.E. Computer Science",
+                "marks": 301,
+                "year": 2025,
+            },
+            {"campus": "Goa", "branch": "B.E. Mechanical", "marks": 232, "year": 2025},
+            {
+                "campus": "Hyderabad",
+                "branch": "B.E. Computer Science",
+                "marks": 298,
+                "year": 2025,
+            },
+            {"campus": "Hyderabad", "branch": "B.E. Civil", "marks": 205, "year": 2025},
+        ]
+
+    def test_parses_an_older_year_from_the_same_page(self):
+        rows = scraper.parse_cutoffs(self.fixture("bitsat_cutoffs_2025.html"), 2024)
+
+        assert [(row["campus"], row["marks"]) for row in rows] == [
+            ("Pilani", 331),
+            ("Goa", 306),
+            ("Hyderabad", 303),
+        ]
+        assert (
+            scraper.parse_cutoffs(self.fixture("bitsat_cutoffs_2024.html"), 2025) == []
+        )
+
+    def test_update_appends_every_year(self, cutoff_site, tmp_path):
+        output = tmp_path / "analysis_data"
+        results, added = scraper.update(
+            self.PAGES, output_dir=str(output), validators_path=str(tmp_path / "v.json")
+        )
+
+        assert [result.status for result in results] == ["fetched", "fetched"]
+        assert added == {2024: 4, 2025: 6}
+        written = pd.read_csv(output / "cutoff_2025.csv")
+        assert list(written.columns) == ["campus", "branch", "marks", "year"]
+        assert len(written) == 6
+
+    def test_unchanged_pages_are_not_downloaded_again(self, cutoff_site, tmp_path):
+        kwargs = {
+            "output_dir": str(tmp_path / "analysis_data"),
+            "validators_path": str(tmp_path / "v.json"),
+        }
+        scraper.update(self.PAGES, **kwargs)
+        results, added = scraper.update(self.PAGES, **kwargs)
+
+        assert [result.status for result in results] == ["not-modified"] * 2
+        assert added == {}
+        sent = [call.kwargs["headers"] for call in cutoff_site.get.call_args_list[2:]]
+        assert sent == [
+            {"If-None-Match": '"bitsat_cutoffs_2024.html-v1"'},
+            {"If-None-Match": '"bitsat_cutoffs_2025.html-v1"'},
+        ]
+
+    def test_only_new_rows_are_appended(self, cutoff_site, tmp_path):
+        output = tmp_path / "analysis_data"
+        output.mkdir()
+        # an existing file written by hand, its rows & formatting must survive untouched
+        existing = 'campus,branch,marks,year\nPilani,"b.e. computer science",330,2024\n'
+        (output / "cutoff_2024.csv").write_text(existing)
+
+        _, added = scraper.update(
+            self.PAGES[:1],
+            output_dir=str(output),
+            validators_path=str(tmp_path / "v.json"),
+        )
+
+        assert added == {2024: 3}
+        text = (output / "cutoff_2024.csv").read_text()
+        assert text.startswith(existing)
+        assert text.count("Computer Science") == 2
+
+    def test_a_failing_page_does_not_stop_the_others(
+        self, cutoff_site, tmp_path, caplog
+    ):
+        original = cutoff_site.get.side_effect
+
+        def get(url, **kwargs):
+            if url.endswith("2024"):
+                raise requests.ConnectionError("connection reset")
+            return original(url, **kwargs)
+
+        cutoff_site.get.side_effect = get
+        results, added = scraper.update(
+            self.PAGES,
+            output_dir=str(tmp_path / "analysis_data"),
+            validators_path=str(tmp_path / "v.json"),
+        )
+
+        assert [result.status for result in results] == ["error", "fetched"]
+        assert added == {2025: 6}
+        (record,) = [r for r in caplog.records if r.name == "services.scraper"]
+        assert record.levelno == logging.WARNING
+        assert (record.year, record.url) == (2024, "https://cutoffs.test/2024")
+        assert list(scraper.load_validators(str(tmp_path / "v.json"))) == [
+            "https://cutoffs.test/2025"
+        ]
+
+
+class TestMetrics:
+    def test_render_format(self):
+        registry = Registry()
+        registry.counter("commands_total", "commands run", ["command"]).inc(
+            command="plot"
+        )
+        registry.gauge("queued", "renders waiting").set(3)
+
+        text = registry.render()
+        assert "# TYPE commands_total counter" in text
+        assert 'commands_total{command="plot"} 1' in text
+        assert "queued 3" in text
+
+    def test_histogram_buckets_and_summary(self):
+        registry = Registry()
+        latency = registry.histogram(
+            "latency_seconds", "latency", ["phase"], buckets=(0.1, 1.0)
+        )
+        for value in (0.05, 0.1, 0.5, 2.0):
+            latency.observe(value, phase="render")
+
+        text = registry.render()
+        assert 'latency_seconds_bucket{phase="render",le="0.1"} 2' in text
+        assert 'latency_seconds_bucket{phase="render",le="1.0"} 3' in text
+        assert 'latency_seconds_bucket{phase="render",le="+Inf"} 4' in text
+        assert 'latency_seconds_count{phase="render"} 4' in text
+
+        count, mean, p95 = latency.summary()[("render",)]
+        assert (count, p95) == (4, float("inf"))
+        assert mean == (0.05 + 0.1 + 0.5 + 2.0) / 4
+
+    def test_conflicting_registration_fails(self):
+        registry = Registry()
+        assert registry.counter("a", "a") is registry.counter("a", "a")
+        with pytest.raises(ValueError):
+            registry.gauge("a", "a")
+
+    def test_failing_collector_is_skipped(self):
+        registry = Registry()
+
+        @registry.collector
+        def broken():
+            raise RuntimeError("pool gone")
+
+        @registry.collector
+        def pools():
+            return [("pool_checked_out", "gauge", "in use", [({"engine": "sync"}, 2)])]
+
+        text = registry.render()
+        assert 'pool_checked_out{engine="sync"} 2' in text
+
+    def test_http_endpoint(self):
+        import aiohttp
+
+        registry = Registry()
+        registry.counter("scrapes_total", "scrapes").inc()
+
+        async def scrape():
+            with socket.socket() as s:
+                s.bind(("127.0.0.1", 0))
+                port = s.getsockname()[1]
+            runner = await start_http_server(registry, "127.0.0.1", port)
+            try:
+                async with (
+                    aiohttp.ClientSession() as session,
+                    session.get(f"http://127.0.0.1:{port}/metrics") as r,
+                ):
+                    return r.status, r.headers["Content-Type"], await r.text()
+            finally:
+                await runner.cleanup()
+
+        status, content_type, body = asyncio.run(scrape())
+        assert status == 200
+        assert content_type.startswith("text/plain")
+        assert "scrapes_total 1" in body
+
+    def test_endpoint_is_off_without_port(self):
+        assert asyncio.run(start_http_server(Registry(), port=0)) is None
+
+
+class TestLogging:
+    def test_parse_levels(self):
+        assert logging_config.parse_levels("discord=info, bot=DEBUG,") == {
+            "discord": logging.INFO,
+            "bot": logging.DEBUG,
+        }
+        with pytest.raises(ValueError):
+            logging_config.parse_levels("discord=loud")
+
+    def test_gateway_debug_is_sampled(self):
+        sample = logging_config.SampleFilter(every=10)
+
+        def record(name, level=logging.DEBUG):
+            return logging.makeLogRecord({"name": name, "levelno": level})
+
+        kept = sum(sample.filter(record("discord.gateway")) for _ in range(100))
+        assert kept == 10
+        assert sample.filter(record("discord.gateway", logging.WARNING))
+        assert sample.filter(record("bot"))
+        assert not logging_config.SampleFilter(every=0).filter(record("discord.http"))
+
+    def test_structured_records_reach_the_file(self, tmp_path, isolated_logging):
+        path = tmp_path / "logs" / "bot.log"
+        isolated_logging("discord")
+        listener = logging_config.configure(
+            path=str(path), levels="discord=WARNING", console=False
+        )
+        try:
+            logging.getLogger("bot").info(
+                "rendered %s",
+                "plot",
+                extra={"cache_key": "plot_pilani", "render_ms": 12.5},
+            )
+            logging.getLogger("discord.gateway").info("heartbeat")
+            try:
+                raise RuntimeError("boom")
+            except RuntimeError:
+                logging.getLogger("bot").exception("upload failed")
+        finally:
+            listener.stop()
+
+        rendered, failed = [json.loads(line) for line in path.read_text().splitlines()]
+        assert rendered["message"] == "rendered plot"
+        assert rendered["logger"] == "bot"
+        assert (rendered["cache_key"], rendered["render_ms"]) == ("plot_pilani", 12.5)
+        assert failed["level"] == "ERROR"
+        assert "RuntimeError: boom" in failed["exc"]
+
+    def test_file_is_rotated_by_size(self, tmp_path, isolated_logging):
+        path = tmp_path / "bot.log"
+        isolated_logging("discord")
+        listener = logging_config.configure(
+            path=str(path), max_bytes=2000, backups=2, console=False
+        )
+        try:
+            for i in range(200):
+                logging.getLogger("bot").warning("line %d", i)
+        finally:
+            listener.stop()
+
+        assert sorted(p.name for p in tmp_path.iterdir()) == [
+            "bot.log",
+            "bot.log.1",
+            "bot.log.2",
+        ]
+        assert path.stat().st_size <= 2000
+
+
+class TestSingleFlight:
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def render():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return b"png"
+
+        async def run():
+            return await asyncio.gather(
+                *(flight.do("plot_pilani", render) for _ in range(10))
+            )
+
+        results = asyncio.run(run())
+        assert len(calls) == 1
+        assert [result for result, _ in results] == [b"png"] * 10
+        assert [shared for _, shared in results].count(False) == 1
+        assert (flight.started, flight.coalesced, len(flight)) == (1, 9, 0)
+
+    def test_keys_are_independent_and_released(self):
+        flight = SingleFlight()
+
+        async def render(name):
+            await asyncio.sleep(0)
+            return name
+
+        async def run():
+            first = await asyncio.gather(
+                flight.do("a", lambda: render("a")), flight.do("b", lambda: render("b"))
+            )
+            again = await flight.do("a", lambda: render("a2"))
+            return first, again
+
+        first, again = asyncio.run(run())
+        assert first == [("a", False), ("b", False)]
+        assert again == ("a2", False)
+
+    def test_errors_reach_every_caller(self):
+        flight = SingleFlight()
+
+        async def broken():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("render failed")
+
+        async def run():
+            return await asyncio.gather(
+                flight.do("k", broken), flight.do("k", broken), return_exceptions=True
+            )
+
+        results = asyncio.run(run())
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.started == 1
+
+    def test_cancelled_leader_does_not_cancel_followers(self):
+        flight = SingleFlight()
+
+        async def render():
+            await asyncio.sleep(0.02)
+            return "done"
+
+        async def run():
+            leader = asyncio.ensure_future(flight.do("k", render))
+            await asyncio.sleep(0)
+            follower = asyncio.ensure_future(flight.do("k", render))
+            await asyncio.sleep(0)
+            leader.cancel()
+            return await follower
+
+        assert asyncio.run(run()) == ("done", True)
+
+
+class TestCooldowns:
+    @staticmethod
+    def _cooldowns(now):
+        def clock():
+            return now[0]
+
+        return Cooldowns(
+            user=TokenBucketLimiter(4, 1.0, clock),
+            channel=TokenBucketLimiter(10, 1.0, clock),
+            hit_cost=1,
+            render_cost=3,
+            clock=clock,
+        )
+
+    def test_bucket_refills_over_time(self):
+        now = [0.0]
+        bucket = TokenBucketLimiter(4, 0.5, lambda: now[0])
+
+        bucket.consume("a", 4)
+        assert bucket.retry_after("a", 1) == 2.0
+        now[0] = 1.0
+        assert bucket.tokens("a") == 0.5
+        now[0] = 100.0
+        assert bucket.tokens("a") == 4
+        with pytest.raises(ValueError):
+            bucket.retry_after("a", 5)
+
+    def test_renders_cost_more_than_hits(self):
+        now = [0.0]
+        cooldowns = self._cooldowns(now)
+
+        assert cooldowns.charge(1, 100, cooldowns.hit_cost) == 0
+        assert cooldowns.charge_render(1, 100) == 0
+        # 1 token left, another hit passes but the render after it has to wait 2s
+        assert cooldowns.charge(1, 100, cooldowns.hit_cost) == 0
+        assert cooldowns.charge_render(1, 100) == 2.0
+        assert cooldowns.limited == 1
+
+        now[0] = 2.0
+        assert cooldowns.charge_render(1, 100) == 0
+
+    def test_channel_bucket_is_shared_by_its_users(self):
+        now = [0.0]
+        cooldowns = self._cooldowns(now)
+
+        for user_id in range(10):
+            assert cooldowns.charge(user_id, 100, 1) == 0
+        assert cooldowns.charge(99, 100, 1) == 1.0
+        assert cooldowns.charge(99, 200, 1) == 0
+
+    def test_limited_charge_takes_nothing(self):
+        now = [0.0]
+        cooldowns = self._cooldowns(now)
+
+        cooldowns.charge(1, 100, 4)
+        assert cooldowns.charge(1, 100, 1) > 0
+        assert cooldowns.channel.tokens(100) == 6
+
+    def test_full_buckets_are_cleaned_up(self):
+        now = [0.0]
+        cooldowns = self._cooldowns(now)
+        cooldowns.charge(1, 100, 1)
+        cooldowns.charge(2, 200, 4)
+
+        # user 1 & channel 100 refilled their single token, user 2 & channel 200 did not
+        now[0] = 2.0
+        assert cooldowns.cleanup() == 2
+        assert cooldowns.user.tokens(2) == 2
+        now[0] = 10.0
+        assert cooldowns.cleanup() == 2
+        assert len(cooldowns.user) == len(cooldowns.channel) == 0
+
+    def test_decorator_answers_instead_of_running(self):
+        now = [0.0]
+        cooldowns = self._cooldowns(now)
+        on_limited = AsyncMock()
+        ran = []
+
+        @rate_limited(cooldowns, on_limited)
+        async def plot(ctx, *, args=None):
+            ran.append(args)
+
+        ctx = Mock()
+        ctx.author.id, ctx.channel.id = 1, 100
+        for _ in range(5):
+            asyncio.run(plot(ctx, args="pilani"))
+
+        assert ran == ["pilani"] * 4
+        on_limited.assert_awaited_once_with(ctx, 1.0)
@@ -0,0 +1,275 @@
+"""
+retrains the cutoff model from data/model_data/*.csv and writes models/model.pkl, scaler.pkl,
+metrics.json and the numpy artifact the bot serves from:
+
+    uv run python train.py
+    uv run python train.py --jobs 4 --folds 5 --degrees 1 2 3 --alphas 0.1 1 10
+
+every candidate (plain & ridge polynomial regressions of each degree, random forest and
+gradient boosting) is scored with the same k-fold cross-validation, in parallel, on a design
+matrix that is cached on disk until the csv files change.
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.compose import ColumnTransformer
+from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
+from sklearn.linear_model import LinearRegression, Ridge
+from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from sklearn.model_selection import GridSearchCV, KFold, train_test_split
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import OneHotEncoder, PolynomialFeatures, StandardScaler
+
+from services.numpy_model import export_model, source_digest
+
+FEATURE_COLS = ["campus", "branch", "year", "difficulty"]
+TARGET_COL = "marks"
+
+CACHE_DIR = os.path.join(".cache", "train")
+
+
+def load_training_data(pattern):
+    files = sorted(glob.glob(pattern))
+    if not files:
+        raise SystemExit(f"no training data matches {pattern}")
+
+    digest = hashlib.sha256()
+    for path in files:
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    df = pd.concat([pd.read_csv(f) for f in files], ignore_index=True)
+    return df, digest.hexdigest()
+
+
+def build_preprocessor():
+    return ColumnTransformer(
+        transformers=[
+            ("cat", OneHotEncoder(handle_unknown="ignore"), ["campus", "branch"]),
+            ("num", StandardScaler(), ["year", "difficulty"]),
+        ]
+    )
+
+
+def design_matrix(df, data_digest, test_size, seed, cache_dir=CACHE_DIR):
+    """
+    fitted preprocessor plus the transformed train/test split, read from cache_dir when the
+    same data was already split & transformed with the same settings.
+    """
+
+    key = hashlib.sha256(f"{data_digest}/{test_size}/{seed}".encode()).hexdigest()[:16]
+    path = os.path.join(cache_dir, f"design_{key}.pkl")
+    if os.path.exists(path):
+        with open(path, "rb") as f:
+            return pickle.load(f), True
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        df[FEATURE_COLS], df[TARGET_COL], test_size=test_size, random_state=seed
+    )
+    preprocessor = build_preprocessor()
+    design = {
+        "preprocessor": preprocessor,
+        "X_train": preprocessor.fit_transform(X_train),
+        "X_test": preprocessor.transform(X_test),
+        "y_train": y_train.to_numpy(),
+        "y_test": y_test.to_numpy(),
+    }
+
+    os.makedirs(cache_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    with os.fdopen(fd, "wb") as f:
+        pickle.dump(design, f)
+    os.replace(tmp_path, path)
+    return design, False
+
+
+def candidate_grid(degrees, alphas, seed):
+    return [
+        {"poly__degree": degrees, "regressor": [LinearRegression()]},
+        {
+            "poly__degree": degrees,
+            "regressor": [Ridge()],
+            "regressor__alpha": alphas,
+        },
+        {
+            "poly": ["passthrough"],
+            "regressor": [
+                RandomForestRegressor(n_estimators=100, max_depth=10, random_state=seed)
+            ],
+        },
+        {
+            "poly": ["passthrough"],
+            "regressor": [
+                GradientBoostingRegressor(
+                    n_estimators=100, max_depth=5, random_state=seed
+                )
+            ],
+        },
+    ]
+
+
+def _describe(params):
+    regressor = params["regressor"]
+    name = type(regressor).__name__
+    if "regressor__alpha" in params:
+        name += f"(alpha={params['regressor__alpha']})"
+    if params.get("poly") != "passthrough":
+        name += f" degree={params['poly__degree']}"
+    return name
+
+
+def search(design, degrees, alphas, folds, jobs, seed, cache_dir=CACHE_DIR):
+    pipeline = Pipeline(
+        [
+            ("poly", PolynomialFeatures(include_bias=False)),
+            ("regressor", LinearRegression()),
+        ],
+        # polynomial expansions are shared by every regressor using the same degree & fold
+        memory=os.path.join(cache_dir, "pipeline"),
+    )
+    grid = GridSearchCV(
+        pipeline,
+        candidate_grid(degrees, alphas, seed),
+        scoring="neg_root_mean_squared_error",
+        cv=KFold(n_splits=folds, shuffle=True, random_state=seed),
+        n_jobs=jobs,
+    )
+    grid.fit(design["X_train"], design["y_train"])
+
+    results = grid.cv_results_
+    candidates = sorted(
+        (
+            {
+                "model": _describe(params),
+                "cv_rmse": float(-mean),
+                "cv_rmse_std": float(std),
+            }
+            for params, mean, std in zip(
+                results["params"],
+                results["mean_test_score"],
+                results["std_test_score"],
+            )
+        ),
+        key=lambda candidate: candidate["cv_rmse"],
+    )
+
+    model = grid.best_estimator_
+    # the cache directory is a training detail, it must not end up in the shipped pickle
+    model.memory = None
+    return model, _describe(grid.best_params_), candidates
+
+
+def evaluate(model, X, y):
+    predicted = model.predict(X)
+    return {
+        "rmse": float(np.sqrt(mean_squared_error(y, predicted))),
+        "mae": float(mean_absolute_error(y, predicted)),
+        "r2": float(r2_score(y, predicted)),
+    }
+
+
+def save(model, preprocessor, metrics, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "model.pkl"), "wb") as f:
+        pickle.dump(model, f)
+    with open(os.path.join(output_dir, "scaler.pkl"), "wb") as f:
+        pickle.dump(preprocessor, f)
+    with open(os.path.join(output_dir, "metrics.json"), "w") as f:
+        json.dump(metrics, f, indent=2)
+
+    artifact = os.path.join(output_dir, "model.npz")
+    try:
+        export_model(preprocessor, model, artifact, source=source_digest(output_dir))
+        return artifact
+    except (ValueError, AttributeError) as e:
+        # tree ensembles have no numpy export, the bot then serves the pickles directly
+        if os.path.exists(artifact):
+            os.remove(artifact)
+        print(f"no numpy artifact for this model: {e}")
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--data", default=os.path.join("data", "model_data", "*.csv"))
+    parser.add_argument("--output-dir", default="models")
+    parser.add_argument("--cache-dir", default=CACHE_DIR)
+    parser.add_argument("--degrees", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument(
+        "--alphas", type=float, nargs="+", default=[0.01, 0.1, 1.0, 10.0]
+    )
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--test-size", type=float, default=0.15)
+    parser.add_argument(
+        "--jobs", type=int, default=-1, help="parallel fits, -1 uses every core"
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+
+    timings = {}
+    clock = time.perf_counter()
+    df, data_digest = load_training_data(args.data)
+    design, cached = design_matrix(
+        df, data_digest, args.test_size, args.seed, args.cache_dir
+    )
+    timings["features"] = time.perf_counter() - clock
+
+    clock = time.perf_counter()
+    model, best, candidates = search(
+        design,
+        args.degrees,
+        args.alphas,
+        args.folds,
+        args.jobs,
+        args.seed,
+        args.cache_dir,
+    )
+    timings["search"] = time.perf_counter() - clock
+
+    metrics = {
+        "best": best,
+        "rows": len(df),
+        "data_sha256": data_digest,
+        "folds": args.folds,
+        "seed": args.seed,
+        "train": evaluate(model, design["X_train"], design["y_train"]),
+        "test": evaluate(model, design["X_test"], design["y_test"]),
+        "candidates": candidates,
+    }
+
+    clock = time.perf_counter()
+    artifact = save(model, design["preprocessor"], metrics, args.output_dir)
+    timings["save"] = time.perf_counter() - clock
+
+    for candidate in candidates:
+        print(
+            f"{candidate['model']:<48} cv rmse {candidate['cv_rmse']:>7.3f} "
+            f"± {candidate['cv_rmse_std']:.3f}"
+        )
+    print(
+        f"\nbest: {best}, test rmse {metrics['test']['rmse']:.3f}, "
+        f"r2 {metrics['test']['r2']:.4f}"
+    )
+    print(
+        f"wrote {args.output_dir}/model.pkl, scaler.pkl, metrics.json"
+        + (f" and {artifact}" if artifact else "")
+    )
+    print(
+        f"{len(df)} rows, features {'cached' if cached else 'built'}: "
+        + ", ".join(f"{step} {seconds:.2f}s" for step, seconds in timings.items())
+    )
+    return metrics
+
+
+if __name__ == "__main__":
+    main()